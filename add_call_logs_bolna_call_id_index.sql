@@ -0,0 +1,9 @@
+-- Index call_logs by Bolna call id for batched status-callback writes
+-- The call status writer looks rows up with metadata->>bolna_call_id=in.(...) and
+-- upserts them back by id, so this lookup must not scan the whole table.
+
+ALTER TABLE public.call_logs
+ADD COLUMN IF NOT EXISTS metadata jsonb;
+
+CREATE INDEX IF NOT EXISTS idx_call_logs_bolna_call_id
+    ON public.call_logs ((metadata->>'bolna_call_id'));
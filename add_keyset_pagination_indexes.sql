@@ -0,0 +1,19 @@
+-- Indexes for keyset pagination on (created_at, id)
+-- List endpoints read `order=created_at.desc.nullslast,id.desc` after the last row of the
+-- previous page; each index matches a listing's filter followed by the sort key,
+-- so every page is one short index range scan regardless of its depth.
+
+CREATE INDEX IF NOT EXISTS idx_call_logs_enterprise_keyset
+    ON public.call_logs (enterprise_id, created_at DESC NULLS LAST, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_contacts_agent_keyset
+    ON public.contacts (voice_agent_id, enterprise_id, created_at DESC NULLS LAST, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_purchased_phone_numbers_enterprise_keyset
+    ON public.purchased_phone_numbers (enterprise_id, created_at DESC NULLS LAST, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_enterprises_keyset
+    ON public.enterprises (created_at DESC NULLS LAST, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_users_keyset
+    ON public.users (created_at DESC NULLS LAST, id DESC);
@@ -0,0 +1,28 @@
+-- Shared revocation list for logged-out access tokens
+-- Each gunicorn worker keeps its own verified-token cache; logout writes the
+-- token's SHA-256 digest here so the other workers reject it too (they
+-- re-check whenever a cached token is older than TOKEN_REVOCATION_CHECK_TTL).
+-- Rows are only needed until the token would have expired anyway.
+
+CREATE TABLE IF NOT EXISTS public.revoked_tokens (
+    token_digest text PRIMARY KEY,
+    user_id uuid,
+    expires_at timestamptz NOT NULL,
+    revoked_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON public.revoked_tokens (expires_at);
+
+-- Run periodically (e.g. pg_cron) to drop revocations for tokens past exp
+CREATE OR REPLACE FUNCTION purge_expired_revoked_tokens()
+RETURNS integer AS $$
+DECLARE
+    purged integer;
+BEGIN
+    DELETE FROM public.revoked_tokens WHERE expires_at < now();
+    GET DIAGNOSTICS purged = ROW_COUNT;
+    RETURN purged;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON TABLE public.revoked_tokens IS 'SHA-256 digests of logged-out JWTs, checked by every app worker until the token expires';
@@ -0,0 +1,28 @@
+-- Add token_version to users for claims-first authentication
+-- Access tokens carry the token_version they were issued with. The app trusts the
+-- enterprise_id / role / status claims only while the version still matches, so
+-- any change to those columns must bump the version.
+
+ALTER TABLE public.users
+ADD COLUMN IF NOT EXISTS token_version integer NOT NULL DEFAULT 0;
+
+-- Bump token_version whenever role, enterprise or status changes
+CREATE OR REPLACE FUNCTION bump_users_token_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.role IS DISTINCT FROM OLD.role
+       OR NEW.enterprise_id IS DISTINCT FROM OLD.enterprise_id
+       OR NEW.status IS DISTINCT FROM OLD.status THEN
+        NEW.token_version = COALESCE(OLD.token_version, 0) + 1;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_users_token_version ON public.users;
+CREATE TRIGGER bump_users_token_version
+    BEFORE UPDATE ON public.users
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_users_token_version();
+
+COMMENT ON COLUMN public.users.token_version IS 'Incremented when role, enterprise_id or status changes; tokens with an older version fall back to a database lookup';
@@ -0,0 +1,85 @@
+-- Materialised per-user usage counters for trial limit checks
+-- One row per user per period: period 'total' holds all-time usage and
+-- 'YYYY-MM-DD' rows hold one UTC day. Limit checks read two rows instead of
+-- scanning call_logs / activity_logs.
+
+CREATE TABLE IF NOT EXISTS public.user_usage_counters (
+    user_id uuid NOT NULL,
+    period text NOT NULL,
+    voice_seconds numeric NOT NULL DEFAULT 0,
+    api_calls integer NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, period)
+);
+
+-- Batches already applied, so a flush retried after a lost response is a no-op
+CREATE TABLE IF NOT EXISTS public.user_usage_batches (
+    batch_id uuid PRIMARY KEY,
+    applied_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_usage_batches_applied_at ON public.user_usage_batches (applied_at);
+
+-- Apply a batch of deltas atomically, once per p_batch_id:
+-- [{"user_id": "...", "day": "2025-01-31", "voice_seconds": 42, "api_calls": 3}, ...]
+DROP FUNCTION IF EXISTS increment_user_usage(jsonb);
+CREATE OR REPLACE FUNCTION increment_user_usage(p_deltas jsonb, p_batch_id uuid DEFAULT NULL)
+RETURNS void AS $$
+BEGIN
+    IF p_batch_id IS NOT NULL THEN
+        INSERT INTO public.user_usage_batches (batch_id) VALUES (p_batch_id)
+        ON CONFLICT (batch_id) DO NOTHING;
+        IF NOT FOUND THEN
+            RETURN;
+        END IF;
+        -- Retries happen within seconds; a day of ids is plenty
+        DELETE FROM public.user_usage_batches WHERE applied_at < now() - interval '1 day';
+    END IF;
+
+    INSERT INTO public.user_usage_counters AS c (user_id, period, voice_seconds, api_calls, updated_at)
+    SELECT (d->>'user_id')::uuid,
+           p.period,
+           SUM(COALESCE((d->>'voice_seconds')::numeric, 0)),
+           SUM(COALESCE((d->>'api_calls')::integer, 0)),
+           now()
+    FROM jsonb_array_elements(p_deltas) AS d
+    CROSS JOIN LATERAL (VALUES ('total'), (d->>'day')) AS p(period)
+    GROUP BY 1, 2
+    ON CONFLICT (user_id, period) DO UPDATE
+        SET voice_seconds = c.voice_seconds + EXCLUDED.voice_seconds,
+            api_calls = c.api_calls + EXCLUDED.api_calls,
+            updated_at = now();
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill from existing activity logs and call durations. GREATEST keeps a
+-- re-run from lowering counters that have been incremented since.
+WITH daily AS (
+    SELECT user_id, to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD') AS period,
+           0::numeric AS voice_seconds, COUNT(*)::integer AS api_calls
+    FROM public.activity_logs
+    WHERE activity_type = 'api_call' AND user_id IS NOT NULL
+    GROUP BY 1, 2
+    UNION ALL
+    SELECT user_id, to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD'),
+           SUM(COALESCE(duration, 0))::numeric, 0
+    FROM public.call_logs
+    WHERE user_id IS NOT NULL
+    GROUP BY 1, 2
+),
+periods AS (
+    SELECT user_id, period, SUM(voice_seconds) AS voice_seconds, SUM(api_calls)::integer AS api_calls
+    FROM daily
+    GROUP BY 1, 2
+    UNION ALL
+    SELECT user_id, 'total', SUM(voice_seconds), SUM(api_calls)::integer
+    FROM daily
+    GROUP BY 1
+)
+INSERT INTO public.user_usage_counters AS c (user_id, period, voice_seconds, api_calls)
+SELECT user_id, period, voice_seconds, api_calls FROM periods
+ON CONFLICT (user_id, period) DO UPDATE
+    SET voice_seconds = GREATEST(c.voice_seconds, EXCLUDED.voice_seconds),
+        api_calls = GREATEST(c.api_calls, EXCLUDED.api_calls);
+
+COMMENT ON TABLE public.user_usage_counters IS 'Per-user usage totals and daily usage maintained by the app (increment_user_usage); read by trial limit checks';
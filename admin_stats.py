@@ -0,0 +1,79 @@
+"""
+Admin Stats
+Platform totals for the superadmin dashboard from count-only PostgREST
+requests (HEAD + Prefer: count=...), run in parallel and cached per worker,
+so the endpoint costs the same for 50 or 50,000 enterprises.
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple
+
+from supabase_client import SupabaseClient, supabase_client
+
+# stat name -> (table, filter params)
+STAT_QUERIES = {
+    'total_enterprises': ('enterprises', {}),
+    'trial_enterprises': ('enterprises', {'status': 'eq.trial'}),
+    'total_users': ('users', {}),
+    'total_agents': ('voice_agents', {})
+}
+
+
+class AdminStats:
+    """Cached platform counts; a stale rollup is refreshed by one caller while others keep serving it"""
+
+    def __init__(self, client: SupabaseClient = None, ttl: float = None, count_method: str = None):
+        self.client = client or supabase_client
+        self.ttl = ttl or float(os.getenv('ADMIN_STATS_TTL', '60'))
+        # 'exact' counts rows; 'planned'/'estimated' read planner statistics on very large tables
+        self.count_method = count_method or os.getenv('ADMIN_STATS_COUNT', 'exact')
+
+        self._stats = None
+        self._computed_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=len(STAT_QUERIES), thread_name_prefix='admin-stats')
+
+    def compute(self) -> Dict[str, int]:
+        """Run every count query in parallel; a failed count is None"""
+        futures = {
+            name: self._executor.submit(self.client.count, table, params, self.count_method)
+            for name, (table, params) in STAT_QUERIES.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+    def get(self) -> Tuple[Dict[str, int], float]:
+        """Return (stats, age in seconds), computing them on first use or when stale"""
+        with self._lock:
+            fresh = self._stats is not None and time.time() - self._computed_at < self.ttl
+            refresh = not fresh and not (self._refreshing and self._stats is not None)
+            if refresh:
+                self._refreshing = True
+
+        if refresh:
+            try:
+                stats = self.compute()
+                with self._lock:
+                    previous = self._stats or {}
+                    complete = all(value is not None for value in stats.values())
+                    self._stats = {name: value if value is not None else previous.get(name, 0)
+                                   for name, value in stats.items()}
+                    # Only a complete rollup is cached; otherwise the next request retries
+                    self._computed_at = time.time() if complete else time.time() - self.ttl
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        with self._lock:
+            return dict(self._stats), max(0.0, time.time() - self._computed_at)
+
+    def invalidate(self):
+        with self._lock:
+            self._computed_at = 0.0
+
+
+# Global rollup for /api/admin/stats
+admin_stats = AdminStats()
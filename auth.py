@@ -4,7 +4,6 @@ Role and Status based authentication with JWT tokens
 """
 
 import jwt
-import bcrypt
 import sqlite3
 import os
 from datetime import datetime, timedelta
@@ -12,6 +11,10 @@ from functools import wraps
 from flask import request, jsonify, session, current_app
 import secrets
 from dotenv import load_dotenv
+from user_context import apply_token_context
+from password_hashing import password_hasher, HashingOverloadedError
+from token_cache import verified_token_cache
+from supabase_client import supabase_client
 
 # Load environment variables
 load_dotenv()
@@ -71,12 +74,12 @@ class AuthManager:
         conn.close()
     
     def hash_password(self, password):
-        """Hash password using bcrypt"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        """Hash password using bcrypt on the hashing pool"""
+        return password_hasher.hash_password(password)
     
     def verify_password(self, password, hashed):
-        """Verify password against hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        """Verify password against hash on the hashing pool"""
+        return password_hasher.verify_password(password, hashed)
     
     def generate_token(self, user_data):
         """Generate JWT token for user"""
@@ -88,6 +91,8 @@ class AuthManager:
             'role': user_data['role'],
             'status': user_data['status'],
             'enterprise_id': user_data.get('enterprise_id'),
+            'trial_end_date': user_data.get('trial_end_date'),
+            'token_version': user_data.get('token_version', 0),
             'exp': datetime.utcnow() + timedelta(hours=24)
         }
         return jwt.encode(payload, self.secret_key, algorithm='HS256')
@@ -104,28 +109,12 @@ class AuthManager:
     
     def authenticate_user(self, email, password):
         """Authenticate user with email and password - Updated for Supabase"""
-        import requests
-
-        # Supabase configuration
-        SUPABASE_URL = os.getenv("SUPABASE_URL")
-        SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
-
-        if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+        if not supabase_client.available:
             return None, "Database configuration error"
 
-        headers = {
-            'apikey': SUPABASE_SERVICE_KEY,
-            'Authorization': f'Bearer {SUPABASE_SERVICE_KEY}',
-            'Content-Type': 'application/json'
-        }
-
         try:
-            # Get user from Supabase
-            response = requests.get(
-                f"{SUPABASE_URL}/rest/v1/users",
-                headers=headers,
-                params={'email': f'eq.{email}', 'select': '*'}
-            )
+            # Get user from Supabase (pooled session with connect/read timeouts)
+            response = supabase_client.get('users', params={'email': f'eq.{email}', 'select': '*'})
 
             if response.status_code != 200:
                 return None, "Database connection error"
@@ -154,6 +143,8 @@ class AuthManager:
 
             return user, None
 
+        except HashingOverloadedError:
+            raise
         except Exception as e:
             return None, f"Authentication failed: {str(e)}"
     
@@ -198,29 +189,14 @@ class AuthManager:
 
     def register_user(self, email, password, name, organization, role='user', status='active', enterprise_id=None):
         """Register new user and return user data - Updated for Supabase"""
-        import requests
         import uuid
 
-        # Supabase configuration
-        SUPABASE_URL = os.getenv("SUPABASE_URL")
-        SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
-
-        if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+        if not supabase_client.available:
             return None, "Database configuration error"
 
-        headers = {
-            'apikey': SUPABASE_SERVICE_KEY,
-            'Authorization': f'Bearer {SUPABASE_SERVICE_KEY}',
-            'Content-Type': 'application/json'
-        }
-
         try:
             # Check if user already exists
-            response = requests.get(
-                f"{SUPABASE_URL}/rest/v1/users",
-                headers=headers,
-                params={'email': f'eq.{email}', 'select': 'id'}
-            )
+            response = supabase_client.get('users', params={'email': f'eq.{email}', 'select': 'id'})
 
             if response.status_code == 200 and response.json():
                 return None, "User with this email already exists"
@@ -241,11 +217,7 @@ class AuthManager:
             }
 
             # Insert user into Supabase
-            response = requests.post(
-                f"{SUPABASE_URL}/rest/v1/users",
-                headers=headers,
-                json=user_data
-            )
+            response = supabase_client.post('users', data=user_data)
 
             if response.status_code == 201:
                 # Remove password from returned data
@@ -291,10 +263,14 @@ def login_required(f):
         if token.startswith('Bearer '):
             token = token[7:]
         
-        user_data = auth_manager.verify_token(token)
+        # Decoded claims are cached per token until exp; revoked tokens return None
+        user_data = verified_token_cache.verify(token, auth_manager.verify_token)
         if not user_data:
             return jsonify({'error': 'Invalid or expired token'}), 401
         
+        # Claims-first enterprise context (g.user_id / g.enterprise_id / g.user_role)
+        user_data = apply_token_context(user_data)
+        
         if user_data['status'] != 'active':
             return jsonify({'error': f'Account is {user_data["status"]}'}), 403
         
@@ -5,6 +5,10 @@ Login, Logout, Register, Profile management
 
 from flask import Blueprint, request, jsonify, make_response, render_template_string
 from auth import auth_manager, login_required, admin_required, role_required
+from user_context import invalidate_user_context
+from password_hashing import password_hasher, HashingOverloadedError
+from token_cache import verified_token_cache
+from supabase_client import supabase_client
 import json
 
 auth_bp = Blueprint('auth', __name__)
@@ -20,7 +24,13 @@ def login():
         if not email or not password:
             return jsonify({'error': 'Email and password required'}), 400
         
-        user_data, error = auth_manager.authenticate_user(email, password)
+        try:
+            user_data, error = auth_manager.authenticate_user(email, password)
+        except HashingOverloadedError as e:
+            # Shed load quickly during login storms instead of queueing behind bcrypt
+            response = make_response(jsonify({'error': 'Login temporarily unavailable', 'details': str(e)}), 503)
+            response.headers['Retry-After'] = '1'
+            return response
         
         if error:
             return jsonify({'error': error}), 401
@@ -65,10 +75,25 @@ def login():
 @login_required
 def logout():
     """User logout endpoint"""
+    token = request.headers.get('Authorization') or request.cookies.get('auth_token')
+    if token and token.startswith('Bearer '):
+        token = token[7:]
+    if token:
+        verified_token_cache.revoke(token, claims=getattr(request, 'current_user', None))
+
     response = make_response(jsonify({'success': True, 'message': 'Logged out successfully'}))
     response.set_cookie('auth_token', '', expires=0)
     return response
 
+@auth_bp.route('/api/auth/hashing-metrics', methods=['GET'])
+@role_required('admin', 'superadmin')
+def hashing_metrics():
+    """Password hashing pool metrics (admin only)"""
+    return jsonify({
+        'success': True,
+        'metrics': password_hasher.get_metrics()
+    })
+
 @auth_bp.route('/api/auth/register', methods=['POST'])
 def register():
     """User registration endpoint"""
@@ -114,13 +139,7 @@ def register():
 def get_public_enterprises():
     """Get all enterprises for signup dropdown"""
     try:
-        import requests
-        import os
-
-        SUPABASE_URL = os.getenv("SUPABASE_URL")
-        SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
-
-        if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+        if not supabase_client.available:
             # Fallback to hardcoded enterprise types
             return jsonify({
                 'success': True,
@@ -133,18 +152,8 @@ def get_public_enterprises():
                 ]
             })
 
-        headers = {
-            'apikey': SUPABASE_SERVICE_KEY,
-            'Authorization': f'Bearer {SUPABASE_SERVICE_KEY}',
-            'Content-Type': 'application/json'
-        }
-
         # Get enterprises from Supabase
-        response = requests.get(
-            f"{SUPABASE_URL}/rest/v1/enterprises",
-            headers=headers,
-            params={'select': 'id,name,type', 'status': 'eq.active'}
-        )
+        response = supabase_client.get('enterprises', params={'select': 'id,name,type', 'status': 'eq.active'})
 
         if response.status_code == 200:
             enterprises = response.json()
@@ -343,6 +352,9 @@ def update_user_status(user_id):
         conn.commit()
         conn.close()
         
+        invalidate_user_context(user_id=user_id)
+        verified_token_cache.invalidate_user(user_id, revoke=new_status != 'active')
+        
         return jsonify({
             'success': True,
             'message': f'User status updated to {new_status}'
@@ -4,7 +4,6 @@ Role and Status based authentication with JWT tokens and encrypted passwords
 """
 
 import jwt
-import bcrypt
 import os
 import requests
 import json
@@ -13,6 +12,10 @@ from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify, session, current_app
 import secrets
+from supabase_client import supabase_client
+from user_context import apply_token_context, invalidate_user_context
+from password_hashing import password_hasher, HashingOverloadedError
+from token_cache import verified_token_cache
 
 class SupabaseAuthManager:
     def __init__(self):
@@ -29,15 +32,21 @@ class SupabaseAuthManager:
             'Authorization': f'Bearer {self.supabase_service_key}',
             'Content-Type': 'application/json'
         }
+        
+        # Shared pooled session (keep-alive + timeouts) instead of bare requests calls
+        self.client = supabase_client
     
     def hash_password(self, password):
-        """Hash password using bcrypt (compatible with Supabase function)"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=12)).decode('utf-8')
+        """Hash password using bcrypt (compatible with Supabase function) on the hashing pool"""
+        return password_hasher.hash_password(password, rounds=12)
     
     def verify_password_local(self, password, hashed):
-        """Verify password against hash locally"""
+        """Verify password against hash locally on the hashing pool"""
         try:
-            return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+            return password_hasher.verify_password(password, hashed)
+        except HashingOverloadedError:
+            # Let the login route answer 503 instead of "invalid password"
+            raise
         except:
             return False
     
@@ -45,8 +54,8 @@ class SupabaseAuthManager:
         """Verify password using Supabase function"""
         try:
             # Get user's password hash first
-            response = requests.get(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.get(
+                'users',
                 headers=self.headers,
                 params={'email': f'eq.{email}', 'select': 'password'}
             )
@@ -57,10 +66,10 @@ class SupabaseAuthManager:
                     password_hash = users[0].get('password')
                     if password_hash:
                         # Use Supabase function to verify password
-                        verify_response = requests.post(
-                            f"{self.supabase_url}/rest/v1/rpc/verify_password",
+                        verify_response = self.client.post(
+                            'rpc/verify_password',
                             headers=self.headers,
-                            json={'password': password, 'hash': password_hash}
+                            data={'password': password, 'hash': password_hash}
                         )
                         
                         if verify_response.status_code == 200:
@@ -80,6 +89,8 @@ class SupabaseAuthManager:
             'status': user_data['status'],
             'organization': user_data.get('organization', ''),
             'enterprise_id': user_data.get('enterprise_id'),
+            'trial_end_date': user_data.get('trial_end_date'),
+            'token_version': user_data.get('token_version', 0),
             'exp': datetime.utcnow() + timedelta(hours=24)
         }
         return jwt.encode(payload, self.secret_key, algorithm='HS256')
@@ -98,8 +109,8 @@ class SupabaseAuthManager:
         """Authenticate user with email and password"""
         try:
             # Get user from Supabase
-            response = requests.get(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.get(
+                'users',
                 headers=self.headers,
                 params={'email': f'eq.{email}', 'select': '*'}
             )
@@ -133,6 +144,8 @@ class SupabaseAuthManager:
             
             return user, None
             
+        except HashingOverloadedError:
+            raise
         except Exception as e:
             print(f"Authentication error: {e}")
             return None, "Authentication failed"
@@ -141,8 +154,8 @@ class SupabaseAuthManager:
         """Register a new user"""
         try:
             # Check if user already exists
-            response = requests.get(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.get(
+                'users',
                 headers=self.headers,
                 params={'email': f'eq.{email}', 'select': 'id'}
             )
@@ -166,10 +179,10 @@ class SupabaseAuthManager:
             }
             
             # Insert user into Supabase
-            response = requests.post(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.post(
+                'users',
                 headers=self.headers,
-                json=user_data
+                data=user_data
             )
             
             if response.status_code == 201:
@@ -186,11 +199,11 @@ class SupabaseAuthManager:
     def update_last_login(self, user_id):
         """Update user's last login timestamp"""
         try:
-            response = requests.patch(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.patch(
+                'users',
                 headers=self.headers,
                 params={'id': f'eq.{user_id}'},
-                json={'updated_at': datetime.utcnow().isoformat()}
+                data={'updated_at': datetime.utcnow().isoformat()}
             )
             return response.status_code == 204
         except:
@@ -199,8 +212,8 @@ class SupabaseAuthManager:
     def get_user_by_id(self, user_id):
         """Get user by ID"""
         try:
-            response = requests.get(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.get(
+                'users',
                 headers=self.headers,
                 params={'id': f'eq.{user_id}', 'select': '*'}
             )
@@ -218,8 +231,8 @@ class SupabaseAuthManager:
     def get_user_by_email(self, email):
         """Get user by email"""
         try:
-            response = requests.get(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.get(
+                'users',
                 headers=self.headers,
                 params={'email': f'eq.{email}', 'select': '*'}
             )
@@ -237,12 +250,14 @@ class SupabaseAuthManager:
     def update_user_status(self, user_id, status):
         """Update user status"""
         try:
-            response = requests.patch(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.patch(
+                'users',
                 headers=self.headers,
                 params={'id': f'eq.{user_id}'},
-                json={'status': status, 'updated_at': datetime.utcnow().isoformat()}
+                data={'status': status, 'updated_at': datetime.utcnow().isoformat()}
             )
+            invalidate_user_context(user_id=user_id)
+            verified_token_cache.invalidate_user(user_id, revoke=status != 'active')
             return response.status_code == 204
         except:
             return False
@@ -251,11 +266,11 @@ class SupabaseAuthManager:
         """Change user password"""
         try:
             password_hash = self.hash_password(new_password)
-            response = requests.patch(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.patch(
+                'users',
                 headers=self.headers,
                 params={'id': f'eq.{user_id}'},
-                json={'password': password_hash, 'updated_at': datetime.utcnow().isoformat()}
+                data={'password': password_hash, 'updated_at': datetime.utcnow().isoformat()}
             )
             return response.status_code == 204
         except:
@@ -277,10 +292,14 @@ def login_required(f):
         if not token:
             return jsonify({'error': 'Authentication required'}), 401
         
-        user_data = auth_manager.verify_token(token)
+        # Decoded claims are cached per token until exp; revoked tokens return None
+        user_data = verified_token_cache.verify(token, auth_manager.verify_token)
         if not user_data:
             return jsonify({'error': 'Invalid or expired token'}), 401
         
+        # Claims-first enterprise context (g.user_id / g.enterprise_id / g.user_role)
+        user_data = apply_token_context(user_data)
+        
         if user_data['status'] != 'active':
             return jsonify({'error': 'Account is not active'}), 403
         
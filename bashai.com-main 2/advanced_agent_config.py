@@ -448,29 +448,21 @@ class AdvancedAgentConfigManager:
     async def _save_agent_config(self, agent_config: AdvancedAgentConfig):
         """Save agent configuration to file and database"""
         
-        # Save to local file
+        # Convert to serializable format
+        config_dict = asdict(agent_config)
+        config_dict['created_at'] = agent_config.created_at.isoformat()
+        config_dict['updated_at'] = agent_config.updated_at.isoformat()
+        
+        # Save to local file off the event loop
         config_file = self.agent_configs_path / f"{agent_config.agent_id}.json"
-        with open(config_file, 'w', encoding='utf-8') as f:
-            # Convert to serializable format
-            config_dict = asdict(agent_config)
-            config_dict['created_at'] = agent_config.created_at.isoformat()
-            config_dict['updated_at'] = agent_config.updated_at.isoformat()
-            
-            json.dump(config_dict, f, indent=2, ensure_ascii=False)
+        await asyncio.to_thread(
+            config_file.write_text,
+            json.dumps(config_dict, indent=2, ensure_ascii=False),
+            encoding='utf-8'
+        )
         
         # Save to database (Supabase)
         try:
-            config_data = {
-                'id': agent_config.agent_id,
-                'name': agent_config.name,
-                'description': agent_config.description,
-                'agent_type': agent_config.agent_type.value,
-                'configuration': config_dict,
-                'is_active': agent_config.is_active,
-                'created_at': agent_config.created_at.isoformat(),
-                'updated_at': agent_config.updated_at.isoformat()
-            }
-            
             # This would integrate with the existing Supabase system
             # For now, we'll store locally
             self.logger.info(f"Agent configuration saved: {agent_config.agent_id}")
@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify, session, current_app
 import secrets
+from supabase_client import supabase_client
 
 class SupabaseAuthManager:
     def __init__(self):
@@ -29,6 +30,9 @@ class SupabaseAuthManager:
             'Authorization': f'Bearer {self.supabase_service_key}',
             'Content-Type': 'application/json'
         }
+        
+        # Shared pooled session (keep-alive + timeouts) instead of bare requests calls
+        self.client = supabase_client
     
     def hash_password(self, password):
         """Hash password using bcrypt (compatible with Supabase function)"""
@@ -45,8 +49,8 @@ class SupabaseAuthManager:
         """Verify password using Supabase function"""
         try:
             # Get user's password hash first
-            response = requests.get(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.get(
+                'users',
                 headers=self.headers,
                 params={'email': f'eq.{email}', 'select': 'password'}
             )
@@ -57,10 +61,10 @@ class SupabaseAuthManager:
                     password_hash = users[0].get('password')
                     if password_hash:
                         # Use Supabase function to verify password
-                        verify_response = requests.post(
-                            f"{self.supabase_url}/rest/v1/rpc/verify_password",
+                        verify_response = self.client.post(
+                            'rpc/verify_password',
                             headers=self.headers,
-                            json={'password': password, 'hash': password_hash}
+                            data={'password': password, 'hash': password_hash}
                         )
                         
                         if verify_response.status_code == 200:
@@ -98,8 +102,8 @@ class SupabaseAuthManager:
         """Authenticate user with email and password"""
         try:
             # Get user from Supabase
-            response = requests.get(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.get(
+                'users',
                 headers=self.headers,
                 params={'email': f'eq.{email}', 'select': '*'}
             )
@@ -141,8 +145,8 @@ class SupabaseAuthManager:
         """Register a new user"""
         try:
             # Check if user already exists
-            response = requests.get(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.get(
+                'users',
                 headers=self.headers,
                 params={'email': f'eq.{email}', 'select': 'id'}
             )
@@ -166,10 +170,10 @@ class SupabaseAuthManager:
             }
             
             # Insert user into Supabase
-            response = requests.post(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.post(
+                'users',
                 headers=self.headers,
-                json=user_data
+                data=user_data
             )
             
             if response.status_code == 201:
@@ -186,11 +190,11 @@ class SupabaseAuthManager:
     def update_last_login(self, user_id):
         """Update user's last login timestamp"""
         try:
-            response = requests.patch(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.patch(
+                'users',
                 headers=self.headers,
                 params={'id': f'eq.{user_id}'},
-                json={'updated_at': datetime.utcnow().isoformat()}
+                data={'updated_at': datetime.utcnow().isoformat()}
             )
             return response.status_code == 204
         except:
@@ -199,8 +203,8 @@ class SupabaseAuthManager:
     def get_user_by_id(self, user_id):
         """Get user by ID"""
         try:
-            response = requests.get(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.get(
+                'users',
                 headers=self.headers,
                 params={'id': f'eq.{user_id}', 'select': '*'}
             )
@@ -218,8 +222,8 @@ class SupabaseAuthManager:
     def get_user_by_email(self, email):
         """Get user by email"""
         try:
-            response = requests.get(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.get(
+                'users',
                 headers=self.headers,
                 params={'email': f'eq.{email}', 'select': '*'}
             )
@@ -237,11 +241,11 @@ class SupabaseAuthManager:
     def update_user_status(self, user_id, status):
         """Update user status"""
         try:
-            response = requests.patch(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.patch(
+                'users',
                 headers=self.headers,
                 params={'id': f'eq.{user_id}'},
-                json={'status': status, 'updated_at': datetime.utcnow().isoformat()}
+                data={'status': status, 'updated_at': datetime.utcnow().isoformat()}
             )
             return response.status_code == 204
         except:
@@ -251,11 +255,11 @@ class SupabaseAuthManager:
         """Change user password"""
         try:
             password_hash = self.hash_password(new_password)
-            response = requests.patch(
-                f"{self.supabase_url}/rest/v1/users",
+            response = self.client.patch(
+                'users',
                 headers=self.headers,
                 params={'id': f'eq.{user_id}'},
-                json={'password': password_hash, 'updated_at': datetime.utcnow().isoformat()}
+                data={'password': password_hash, 'updated_at': datetime.utcnow().isoformat()}
             )
             return response.status_code == 204
         except:
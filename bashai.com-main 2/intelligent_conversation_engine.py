@@ -16,6 +16,13 @@ import openai
 from dotenv import load_dotenv
 import re
 
+try:
+    # Shared E.164 normaliser from the main app tree
+    from phone_normalizer import phone_normalizer, PHONE_CANDIDATE_PATTERN
+except ImportError:
+    phone_normalizer = None
+    PHONE_CANDIDATE_PATTERN = r'(?:\+91[\s-]?)?[6-9]\d{9}'
+
 load_dotenv()
 
 class ConversationState(Enum):
@@ -102,7 +109,7 @@ class IntelligentConversationEngine:
         
         # Entity extraction patterns
         self.entity_patterns = {
-            'phone_number': r'(\+91[\s-]?)?[6-9]\d{9}',
+            'phone_number': PHONE_CANDIDATE_PATTERN,
             'name': r'(?i)(name|नाम).*?(?:is|है|हूं|हूँ)\s+([A-Za-z\u0900-\u097F\s]+)',
             'age': r'(?i)(age|उम्र|years|साल|वर्ष).*?(\d+)',
             'date': r'(?i)(today|आज|tomorrow|कल|(\d{1,2})[/-](\d{1,2})[/-](\d{2,4}))',
@@ -268,7 +275,11 @@ Intent:""",
         
         # Pattern-based entity extraction
         for entity_type, pattern in self.entity_patterns.items():
-            matches = re.findall(pattern, user_input)
+            if entity_type == 'phone_number' and phone_normalizer:
+                # Validated against the numbering plans and returned as E.164
+                matches = phone_normalizer.find_numbers(user_input)
+            else:
+                matches = re.findall(pattern, user_input)
             if matches:
                 if entity_type == 'name':
                     entities[entity_type] = matches[0][1].strip() if len(matches[0]) > 1 else matches[0]
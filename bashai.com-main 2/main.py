@@ -16,6 +16,7 @@ from bolna_integration import BolnaAPI, get_agent_config_for_voice_agent
 from relevance_ai_integration import RelevanceAIProvider, RelevanceAIAgentManager, create_relevance_agent_config
 from razorpay_integration import RazorpayIntegration, calculate_credits_from_amount, get_predefined_recharge_options
 from phone_provider_integration import phone_provider_manager
+from supabase_client import supabase_client
 from auth_routes import auth_bp
 from functools import wraps
 from flask_socketio import SocketIO
@@ -82,18 +83,9 @@ def supabase_request(method, endpoint, data=None, params=None):
     print(f"🔍 Supabase request: {method} {url} with params: {params}")
     
     try:
-        if method == 'GET':
-            response = requests.get(url, headers=SUPABASE_HEADERS, params=params)
-        elif method == 'POST':
-            response = requests.post(url, headers=SUPABASE_HEADERS, json=data)
-        elif method == 'PUT':
-            response = requests.put(url, headers=SUPABASE_HEADERS, json=data)
-        elif method == 'PATCH':
-            response = requests.patch(url, headers=SUPABASE_HEADERS, json=data)
-        elif method == 'DELETE':
-            response = requests.delete(url, headers=SUPABASE_HEADERS)
-        else:
-            raise ValueError(f"Unsupported HTTP method: {method}")
+        # Pooled keep-alive session with connect/read timeouts
+        response = supabase_client.request(method, endpoint, data=data, params=params,
+                                           headers=SUPABASE_HEADERS)
         
         print(f"🔍 Response status: {response.status_code}")
         response.raise_for_status()
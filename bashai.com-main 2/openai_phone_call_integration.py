@@ -215,7 +215,7 @@ class OpenAIPhoneCallManager:
             
             # Finalize usage tracking
             session_costs = usage_tracker.end_session_tracking(session_id)
-            usage_tracker.log_usage_to_database(
+            await usage_tracker.log_usage_to_database_async(
                 session_costs, 
                 call_info['user_id'],
                 None  # enterprise_id
@@ -236,6 +236,78 @@ class RealtimeUsageTracker:
             'cost_usd': Decimal('4.50')
         }
 
+    def _build_usage_records(self, session_info: Dict, user_id: str, enterprise_id: str = None):
+        """Build the realtime_voice_sessions row and realtime_usage_logs rows for a session"""
+        # Session record
+        session_record = {
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'session_id': session_info['session_id'],
+            'openai_session_id': session_info.get('openai_session_id'),
+            'status': 'completed' if session_info.get('ended_at') else 'active',
+            'voice_model': 'alloy',  # Default voice
+            'language': 'hi-IN',     # Default language
+            'instructions': 'Default realtime voice assistant',
+            'duration_seconds': session_info.get('total_duration_seconds', 0),
+            'audio_input_duration_seconds': session_info['audio_input_seconds'],
+            'audio_output_duration_seconds': session_info['audio_output_seconds'],
+            'transcript_length': session_info['text_tokens_used'],
+            'api_calls_count': 1,
+            'estimated_cost_usd': float(session_info['estimated_cost_usd']),
+            'started_at': session_info['started_at'].isoformat(),
+            'ended_at': session_info['ended_at'].isoformat() if session_info.get('ended_at') else None
+        }
+        
+        # Individual usage entries
+        usage_logs = []
+        
+        # Audio input usage
+        if session_info['audio_input_seconds'] > 0:
+            usage_logs.append({
+                'id': str(uuid.uuid4()),
+                'user_id': user_id,
+                'session_id': session_info['session_id'],
+                'usage_type': 'audio_input',
+                'quantity': session_info['audio_input_seconds'],
+                'unit': 'seconds',
+                'rate_per_unit': float(self.PRICING['gpt-4o-realtime-preview']['audio_input_per_minute'] / 60),
+                'total_cost_usd': float(session_info['cost_breakdown']['audio_input_cost']),
+                'is_trial': True,  # Assuming trial user
+                'enterprise_id': enterprise_id
+            })
+        
+        # Audio output usage
+        if session_info['audio_output_seconds'] > 0:
+            usage_logs.append({
+                'id': str(uuid.uuid4()),
+                'user_id': user_id,
+                'session_id': session_info['session_id'],
+                'usage_type': 'audio_output',
+                'quantity': session_info['audio_output_seconds'],
+                'unit': 'seconds',
+                'rate_per_unit': float(self.PRICING['gpt-4o-realtime-preview']['audio_output_per_minute'] / 60),
+                'total_cost_usd': float(session_info['cost_breakdown']['audio_output_cost']),
+                'is_trial': True,
+                'enterprise_id': enterprise_id
+            })
+        
+        # Text token usage
+        if session_info['text_tokens_used'] > 0:
+            usage_logs.append({
+                'id': str(uuid.uuid4()),
+                'user_id': user_id,
+                'session_id': session_info['session_id'],
+                'usage_type': 'text_generation',
+                'quantity': session_info['text_tokens_used'],
+                'unit': 'tokens',
+                'rate_per_unit': float(self.PRICING['gpt-4o-realtime-preview']['text_tokens_per_1k'] / 1000),
+                'total_cost_usd': float(session_info['cost_breakdown']['text_cost']),
+                'is_trial': True,
+                'enterprise_id': enterprise_id
+            })
+        
+        return session_record, usage_logs
+
     def log_usage_to_database(self, session_info: Dict, user_id: str, enterprise_id: str = None):
         """
         Log usage information to database
@@ -249,80 +321,37 @@ class RealtimeUsageTracker:
             # Import here to avoid circular imports
             from main import supabase_request
             
-            # Log session record
-            session_record = {
-                'id': str(uuid.uuid4()),
-                'user_id': user_id,
-                'session_id': session_info['session_id'],
-                'openai_session_id': session_info.get('openai_session_id'),
-                'status': 'completed' if session_info.get('ended_at') else 'active',
-                'voice_model': 'alloy',  # Default voice
-                'language': 'hi-IN',     # Default language
-                'instructions': 'Default realtime voice assistant',
-                'duration_seconds': session_info.get('total_duration_seconds', 0),
-                'audio_input_duration_seconds': session_info['audio_input_seconds'],
-                'audio_output_duration_seconds': session_info['audio_output_seconds'],
-                'transcript_length': session_info['text_tokens_used'],
-                'api_calls_count': 1,
-                'estimated_cost_usd': float(session_info['estimated_cost_usd']),
-                'started_at': session_info['started_at'].isoformat(),
-                'ended_at': session_info['ended_at'].isoformat() if session_info.get('ended_at') else None
-            }
+            session_record, usage_logs = self._build_usage_records(session_info, user_id, enterprise_id)
             
             supabase_request('POST', 'realtime_voice_sessions', data=session_record)
             
-            # Log individual usage entries
-            usage_logs = []
+            # Batch insert usage logs
+            if usage_logs:
+                supabase_request('POST', 'realtime_usage_logs', data=usage_logs)
+                
+        except Exception as e:
+            print(f"Error logging usage to database: {e}")
+
+    async def log_usage_to_database_async(self, session_info: Dict, user_id: str, enterprise_id: str = None):
+        """
+        Log usage information to database from asyncio code without blocking the loop
+        
+        The session row and the usage log batch are independent, so both writes
+        are issued concurrently on the shared connection pool.
+        """
+        try:
+            from supabase_client import async_supabase_client
             
-            # Audio input usage
-            if session_info['audio_input_seconds'] > 0:
-                usage_logs.append({
-                    'id': str(uuid.uuid4()),
-                    'user_id': user_id,
-                    'session_id': session_info['session_id'],
-                    'usage_type': 'audio_input',
-                    'quantity': session_info['audio_input_seconds'],
-                    'unit': 'seconds',
-                    'rate_per_unit': float(self.PRICING['gpt-4o-realtime-preview']['audio_input_per_minute'] / 60),
-                    'total_cost_usd': float(session_info['cost_breakdown']['audio_input_cost']),
-                    'is_trial': True,  # Assuming trial user
-                    'enterprise_id': enterprise_id
-                })
+            session_record, usage_logs = self._build_usage_records(session_info, user_id, enterprise_id)
             
-            # Audio output usage
-            if session_info['audio_output_seconds'] > 0:
-                usage_logs.append({
-                    'id': str(uuid.uuid4()),
-                    'user_id': user_id,
-                    'session_id': session_info['session_id'],
-                    'usage_type': 'audio_output',
-                    'quantity': session_info['audio_output_seconds'],
-                    'unit': 'seconds',
-                    'rate_per_unit': float(self.PRICING['gpt-4o-realtime-preview']['audio_output_per_minute'] / 60),
-                    'total_cost_usd': float(session_info['cost_breakdown']['audio_output_cost']),
-                    'is_trial': True,
-                    'enterprise_id': enterprise_id
-                })
+            writes = {
+                'session': {'method': 'POST', 'endpoint': 'realtime_voice_sessions', 'data': session_record}
+            }
+            if usage_logs:
+                writes['usage_logs'] = {'method': 'POST', 'endpoint': 'realtime_usage_logs', 'data': usage_logs}
             
-            # Text token usage
-            if session_info['text_tokens_used'] > 0:
-                usage_logs.append({
-                    'id': str(uuid.uuid4()),
-                    'user_id': user_id,
-                    'session_id': session_info['session_id'],
-                    'usage_type': 'text_generation',
-                    'quantity': session_info['text_tokens_used'],
-                    'unit': 'tokens',
-                    'rate_per_unit': float(self.PRICING['gpt-4o-realtime-preview']['text_tokens_per_1k'] / 1000),
-                    'total_cost_usd': float(session_info['cost_breakdown']['text_cost']),
-                    'is_trial': True,
-                    'enterprise_id': enterprise_id
-                })
+            await async_supabase_client.fan_out(writes)
             
-            # Batch insert usage logs
-            for log_entry in usage_logs:
-                supabase_request('POST', 'realtime_usage_logs', data=log_entry)
-                
         except Exception as e:
             print(f"Error logging usage to database: {e}")
 
@@ -14,7 +14,7 @@ from flask import request, g
 from flask_socketio import SocketIO, emit, disconnect, join_room, leave_room
 from openai_realtime_integration import session_manager, OpenAIRealtimeAPI
 from auth import auth_manager, login_required
-from trial_middleware import check_trial_limits, log_trial_activity
+from trial_middleware import check_trial_limits, log_trial_activity_async
 
 class RealtimeWebSocketHandler:
     """Handles WebSocket connections for real-time voice conversations"""
@@ -139,7 +139,7 @@ class RealtimeWebSocketHandler:
             }, room=socket_id)
             
             # Log trial activity
-            log_trial_activity(user_id, 'realtime_session_started', {
+            await log_trial_activity_async(user_id, 'realtime_session_started', {
                 'session_id': session_id,
                 'voice_agent_id': voice_agent_config.get('id')
             })
@@ -341,7 +341,7 @@ class RealtimeWebSocketHandler:
                 leave_room(session_id, sid=socket_id)
                 
                 # Log trial activity
-                log_trial_activity(user_id, 'realtime_session_ended', {
+                await log_trial_activity_async(user_id, 'realtime_session_ended', {
                     'session_id': session_id,
                     'duration_minutes': duration_minutes
                 })
@@ -363,7 +363,7 @@ class RealtimeWebSocketHandler:
         try:
             # Import here to avoid circular imports
             from main import SUPABASE_HEADERS, SUPABASE_URL
-            import requests
+            from supabase_client import supabase_client
             
             if not SUPABASE_URL or not SUPABASE_HEADERS:
                 # Fallback configuration for development
@@ -376,8 +376,8 @@ class RealtimeWebSocketHandler:
                 }
             
             # Query voice agent from database
-            response = requests.get(
-                f"{SUPABASE_URL}/rest/v1/voice_agents",
+            response = supabase_client.get(
+                'voice_agents',
                 headers=SUPABASE_HEADERS,
                 params={
                     'id': f'eq.{voice_agent_id}',
@@ -0,0 +1,241 @@
+"""
+Supabase Data Access Client
+Pooled, keep-alive HTTP session layer for the Supabase PostgREST API
+"""
+
+import os
+import asyncio
+import threading
+import functools
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class SupabaseClient:
+    """Shared PostgREST client with per-worker connection pooling and timeouts"""
+
+    def __init__(self,
+                 url: str = None,
+                 service_key: str = None,
+                 pool_connections: int = None,
+                 pool_maxsize: int = None,
+                 connect_timeout: float = None,
+                 read_timeout: float = None):
+        self.url = url or os.getenv('SUPABASE_URL')
+        self.service_key = service_key or os.getenv('SUPABASE_SERVICE_KEY')
+
+        # Pool sizing and timeouts (no timeout at all used to be the default)
+        self.pool_connections = pool_connections or int(os.getenv('SUPABASE_POOL_CONNECTIONS', '10'))
+        self.pool_maxsize = pool_maxsize or int(os.getenv('SUPABASE_POOL_MAXSIZE', '20'))
+        self.connect_timeout = connect_timeout or float(os.getenv('SUPABASE_CONNECT_TIMEOUT', '3.05'))
+        self.read_timeout = read_timeout or float(os.getenv('SUPABASE_READ_TIMEOUT', '15'))
+
+        self.available = bool(self.url and self.service_key)
+        self.headers = {}
+        if self.available:
+            self.headers = {
+                'apikey': self.service_key,
+                'Authorization': f'Bearer {self.service_key}',
+                'Content-Type': 'application/json'
+            }
+
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self):
+        """(connect, read) timeout tuple passed to every request"""
+        return (self.connect_timeout, self.read_timeout)
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        Keep-alive session for the current worker process.
+
+        Gunicorn forks workers after import, so the session is rebuilt when the
+        pid changes instead of sharing sockets with the parent process.
+        """
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            with self._lock:
+                if self._session is None or self._session_pid != pid:
+                    self._session = self._build_session()
+                    self._session_pid = pid
+        return self._session
+
+    def _build_session(self) -> requests.Session:
+        """Create a session with a sized connection pool mounted for http and https"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def rest_url(self, endpoint: str) -> str:
+        """Build the PostgREST URL for a table, view or rpc endpoint"""
+        return f"{self.url}/rest/v1/{endpoint.lstrip('/')}"
+
+    def request(self,
+                method: str,
+                endpoint: str,
+                data=None,
+                params: Dict = None,
+                headers: Dict = None,
+                timeout=None) -> requests.Response:
+        """
+        Send a request to the Supabase REST API over the pooled session
+
+        Args:
+            method: HTTP method ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+            endpoint: PostgREST path, optionally with a query string
+            data: JSON body for write requests
+            params: Query parameters
+            headers: Headers to use instead of the client defaults
+            timeout: Override for the (connect, read) timeout
+
+        Returns:
+            requests.Response (callers decide how to treat the status code)
+        """
+        method = method.upper()
+        if method not in ('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        return self.session.request(
+            method,
+            self.rest_url(endpoint),
+            headers=headers if headers is not None else self.headers,
+            params=params,
+            json=data if method in ('POST', 'PUT', 'PATCH') else None,
+            timeout=timeout or self.timeout
+        )
+
+    def get(self, endpoint: str, params: Dict = None, **kwargs) -> requests.Response:
+        return self.request('GET', endpoint, params=params, **kwargs)
+
+    def post(self, endpoint: str, data=None, **kwargs) -> requests.Response:
+        return self.request('POST', endpoint, data=data, **kwargs)
+
+    def patch(self, endpoint: str, data=None, **kwargs) -> requests.Response:
+        return self.request('PATCH', endpoint, data=data, **kwargs)
+
+    def delete(self, endpoint: str, **kwargs) -> requests.Response:
+        return self.request('DELETE', endpoint, **kwargs)
+
+    def close(self):
+        """Close pooled connections held by this worker"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._session_pid = None
+
+
+class AsyncSupabaseClient:
+    """
+    Awaitable Supabase client for asyncio code (realtime sessions, agent config)
+
+    Requests run on a bounded executor sized to the HTTP pool and share the
+    pooled session of the sync client, so the event loop never blocks on the
+    network and the worker keeps a single set of keep-alive connections.
+    Results follow supabase_request: parsed JSON, [] for failed GETs and None
+    for failed writes.
+    """
+
+    def __init__(self, client: SupabaseClient = None, max_workers: int = None):
+        self.client = client or supabase_client
+        self.max_workers = max_workers or self.client.pool_maxsize
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Per-process executor; at most pool_maxsize requests are in flight"""
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='supabase-async')
+                    self._executor_pid = pid
+        return self._executor
+
+    def _execute(self, method: str, endpoint: str, data=None, params: Dict = None,
+                 headers: Dict = None):
+        """Blocking request with supabase_request's graceful error handling"""
+        if not self.client.available:
+            print(f"⚠️  Supabase not available - {method} request to {endpoint} skipped")
+            return [] if method == 'GET' else None
+
+        try:
+            response = self.client.request(method, endpoint, data=data, params=params, headers=headers)
+            response.raise_for_status()
+            return response.json() if response.content else None
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️  Supabase API error ({method} {endpoint}): {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                print(f"   Response content: {e.response.text}")
+            return [] if method == 'GET' else None
+        except Exception as e:
+            print(f"⚠️  Unexpected error in async supabase request: {e}")
+            return [] if method == 'GET' else None
+
+    async def request(self, method: str, endpoint: str, data=None, params: Dict = None,
+                      headers: Dict = None):
+        """Await a Supabase REST request without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self._execute, method.upper(), endpoint,
+                                 data=data, params=params, headers=headers)
+        return await loop.run_in_executor(self.executor, call)
+
+    async def get(self, endpoint: str, params: Dict = None, **kwargs):
+        return await self.request('GET', endpoint, params=params, **kwargs)
+
+    async def post(self, endpoint: str, data=None, **kwargs):
+        return await self.request('POST', endpoint, data=data, **kwargs)
+
+    async def patch(self, endpoint: str, data=None, **kwargs):
+        return await self.request('PATCH', endpoint, data=data, **kwargs)
+
+    async def delete(self, endpoint: str, **kwargs):
+        return await self.request('DELETE', endpoint, **kwargs)
+
+    async def fan_out(self, queries: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Run independent queries concurrently
+
+        Args:
+            queries: name -> request kwargs, e.g.
+                {'sessions': {'method': 'GET', 'endpoint': 'realtime_voice_sessions',
+                              'params': {'user_id': 'eq.123'}}}
+
+        Returns:
+            name -> result, in the same shape as the individual requests
+        """
+        names = list(queries)
+        results = await asyncio.gather(*(
+            self.request(q.get('method', 'GET'), q['endpoint'],
+                         data=q.get('data'), params=q.get('params'), headers=q.get('headers'))
+            for q in (queries[name] for name in names)
+        ))
+        return dict(zip(names, results))
+
+    def shutdown(self):
+        """Stop the executor (pending requests are allowed to finish)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            self._executor = None
+            self._executor_pid = None
+
+
+# Global instances shared by main, auth, middleware and realtime modules
+supabase_client = SupabaseClient()
+async_supabase_client = AsyncSupabaseClient(supabase_client)
@@ -226,6 +226,23 @@ def log_trial_activity(user_id, activity_type, details=None):
     except Exception as e:
         print(f"Error logging trial activity: {e}")
 
+async def log_trial_activity_async(user_id, activity_type, details=None):
+    """Log trial user activity from asyncio code (realtime sessions) without blocking the loop"""
+    try:
+        from supabase_client import async_supabase_client
+        
+        activity_data = {
+            'user_id': user_id,
+            'activity_type': activity_type,
+            'details': json.dumps(details) if details else None,
+            'created_at': datetime.now(timezone.utc).isoformat()
+        }
+        
+        await async_supabase_client.post('activity_logs', data=activity_data)
+        
+    except Exception as e:
+        print(f"Error logging trial activity: {e}")
+
 def get_trial_usage_summary(user_id):
     """Get comprehensive usage summary for trial user"""
     try:
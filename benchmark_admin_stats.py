@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/admin/stats row downloads vs count-only rollup
+A local PostgREST stand-in holds a synthetic platform (--enterprises
+enterprises, two users and one voice agent each). Times the old approach
+(download every row, len()) against AdminStats cold (parallel HEAD counts)
+and cached.
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from admin_stats import AdminStats
+from supabase_client import SupabaseClient
+
+
+class PostgRESTStandIn(BaseHTTPRequestHandler):
+    """GET returns every row of a table; HEAD with Prefer: count returns only Content-Range"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    count_latency = 0.002
+    tables = {}
+    bodies = {}
+
+    def _table(self):
+        return urlparse(self.path).path.rsplit('/', 1)[-1]
+
+    def do_GET(self):
+        body = self.bodies.get(self._table(), b'[]')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        rows = self.tables.get(self._table(), [])
+        query = parse_qs(urlparse(self.path).query)
+        if 'status' in query:
+            wanted = query['status'][0].split('.', 1)[1]
+            rows = [row for row in rows if row.get('status') == wanted]
+        time.sleep(self.count_latency)  # the database still counts
+        self.send_response(200)
+        self.send_header('Content-Range', f'*/{len(rows)}')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(label, fn, iterations):
+    samples = []
+    result = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<30} p50={percentile(samples, 50):9.3f} ms  p99={percentile(samples, 99):9.3f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--enterprises', type=int, default=50000)
+    parser.add_argument('--iterations', type=int, default=5, help='iterations of the row-download path')
+    args = parser.parse_args()
+
+    enterprises = [{'id': f'ent-{i}', 'name': f'Enterprise {i}', 'status': 'trial' if i % 3 == 0 else 'active',
+                    'owner_id': f'user-{2 * i}', 'created_at': '2025-01-01T00:00:00Z'}
+                   for i in range(args.enterprises)]
+    users = [{'id': f'user-{i}', 'email': f'user{i}@example.com', 'enterprise_id': f'ent-{i // 2}',
+              'role': 'admin' if i % 2 == 0 else 'user', 'status': 'active'}
+             for i in range(2 * args.enterprises)]
+    agents = [{'id': f'agent-{i}', 'title': f'Agent {i}', 'enterprise_id': f'ent-{i}', 'status': 'active'}
+              for i in range(args.enterprises)]
+    PostgRESTStandIn.tables = {'enterprises': enterprises, 'users': users, 'voice_agents': agents}
+    PostgRESTStandIn.bodies = {name: json.dumps(rows).encode() for name, rows in PostgRESTStandIn.tables.items()}
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PostgRESTStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = SupabaseClient(url=f"http://127.0.0.1:{server.server_address[1]}", service_key='bench-key')
+
+    megabytes = sum(len(body) for body in PostgRESTStandIn.bodies.values()) / 1e6
+    print(f"🔍 {args.enterprises} enterprises, {len(users)} users, {len(agents)} voice agents "
+          f"({megabytes:.1f} MB of rows)")
+    print("=" * 72)
+
+    def legacy():
+        all_enterprises = client.get('enterprises').json()
+        return {
+            'total_enterprises': len(all_enterprises),
+            'trial_enterprises': len([e for e in all_enterprises if e.get('status') == 'trial']),
+            'total_users': len(client.get('users').json()),
+            'total_agents': len(client.get('voice_agents').json())
+        }
+
+    expected = run('row downloads + len()', legacy, args.iterations)
+
+    stats = AdminStats(client=client, ttl=60)
+
+    def cold():
+        stats.invalidate()
+        return stats.get()[0]
+
+    counted = run('count-only, cold', cold, 200)
+    run('count-only, cached', lambda: stats.get()[0], 10000)
+    print(f"results match: {counted == expected} {counted}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sequential vs concurrent Bolna campaign dispatch
+Runs a mock Bolna /call server with configurable latency and 429/503 rates
+and reports calls per second, retries and failures for each mode.
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault('BOLNA_API_KEY', 'bench-key')
+
+from bolna_dispatcher import BolnaDispatcher, SenderRateLimiter
+from bolna_integration import BolnaAPI
+
+
+class MockBolna(BaseHTTPRequestHandler):
+    """POST /call answers after `latency` seconds, sometimes with 429 or 503"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.15
+    throttle_rate = 0.05
+    error_rate = 0.02
+
+    def _reply(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.latency)
+        roll = random.random()
+        if roll < self.throttle_rate:
+            self._reply(429, {'error': 'rate limited'}, {'Retry-After': '0.2'})
+        elif roll < self.throttle_rate + self.error_rate:
+            self._reply(503, {'error': 'unavailable'})
+        else:
+            self._reply(200, {'call_id': str(uuid.uuid4()), 'status': 'queued'})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def build_calls(count, senders):
+    return [{
+        'agent_id': 'bench-agent',
+        'recipient_phone': f'+9198{i:08d}',
+        'sender_phone': senders[i % len(senders)],
+        'variables': {'contact_name': f'Contact {i}'},
+        'metadata': {'contact_id': str(i)}
+    } for i in range(count)]
+
+
+def run(label, api, calls, concurrency, sender_rate, sender_burst):
+    dispatcher = BolnaDispatcher(api, max_concurrency=concurrency,
+                                 rate_limiter=SenderRateLimiter(sender_rate, sender_burst),
+                                 backoff_base=0.1, backoff_cap=1.0)
+    first_result_at = None
+    start = time.perf_counter()
+    for _ in dispatcher.iter_dispatch(calls):
+        if first_result_at is None:
+            first_result_at = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    stats = dispatcher.stats
+    print(f"{label:<26} {len(calls) / elapsed:7.1f} calls/s  total={elapsed:6.2f}s  "
+          f"first result={first_result_at * 1000:6.0f} ms  ok={stats['succeeded']} "
+          f"failed={stats['failed']} retries={stats['retries']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--senders', type=int, default=4, help='distinct sender numbers')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--sender-rate', type=float, default=10.0, help='calls/sec per sender number')
+    parser.add_argument('--sender-burst', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=150.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.05, help='fraction of 429 responses')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='fraction of 503 responses')
+    args = parser.parse_args()
+
+    MockBolna.latency = args.latency_ms / 1000.0
+    MockBolna.throttle_rate = args.throttle_rate
+    MockBolna.error_rate = args.error_rate
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockBolna)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['BOLNA_API_URL'] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ['BOLNA_MAX_CONCURRENCY'] = str(args.concurrency)
+
+    api = BolnaAPI()
+    senders = [f'+91800000{i:04d}' for i in range(args.senders)]
+    calls = build_calls(args.calls, senders)
+
+    print(f"🔍 Mock Bolna at {os.environ['BOLNA_API_URL']}: {args.calls} calls, {args.senders} senders, "
+          f"{args.latency_ms} ms latency, {args.throttle_rate:.0%} 429 / {args.error_rate:.0%} 503")
+    print("=" * 72)
+
+    sequential = calls[:max(1, args.calls // 10)]
+    run(f'sequential ({len(sequential)} calls)', api, sequential, 1, 0, 1)
+    run(f'concurrent x{args.concurrency}', api, calls, args.concurrency, args.sender_rate, args.sender_burst)
+    run(f'concurrent x{args.concurrency} unlimited', api, calls, args.concurrency, 0, 1)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
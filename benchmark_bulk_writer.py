@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one POST per activity log vs the coalescing bulk writer
+Concurrent "requests" each log activity rows against a local PostgREST
+stand-in; reports round trips, request bytes and the largest request body.
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bulk_writer import BulkWriter, bulk_write
+from supabase_client import SupabaseClient
+
+
+class PostgRESTWriteStandIn(BaseHTTPRequestHandler):
+    """Accepts POSTs like PostgREST with return=representation/minimal and records their size"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.005
+    lock = threading.Lock()
+    requests = 0
+    rows = 0
+    bytes = 0
+    largest = 0
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        payload = json.loads(body)
+        with self.lock:
+            cls = type(self)
+            cls.requests += 1
+            cls.rows += len(payload) if isinstance(payload, list) else 1
+            cls.bytes += length
+            cls.largest = max(cls.largest, length)
+        time.sleep(self.latency)
+
+        if 'return=minimal' in self.headers.get('Prefer', ''):
+            self.send_response(201)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        response = body
+        self.send_response(201)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+    @classmethod
+    def reset(cls):
+        cls.requests = cls.rows = cls.bytes = cls.largest = 0
+
+
+def activity_row(i):
+    return {
+        'user_id': f'user-{i % 50}',
+        'activity_type': 'api_call',
+        'details': json.dumps({'endpoint': '/api/voice-agents', 'n': i}),
+        'created_at': datetime.now(timezone.utc).isoformat()
+    }
+
+
+def report(label, elapsed):
+    s = PostgRESTWriteStandIn
+    print(f"{label:<24} {s.rows:6d} rows  {s.requests:6d} requests  {s.bytes / 1024:8.1f} KiB  "
+          f"largest body {s.largest / 1024:7.1f} KiB  {elapsed:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2000, help='activity rows logged')
+    parser.add_argument('--threads', type=int, default=16, help='concurrent request threads')
+    parser.add_argument('--bulk-rows', type=int, default=5000, help='rows in one bulk call_logs write')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PostgRESTWriteStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = SupabaseClient(url=f"http://127.0.0.1:{server.server_address[1]}", service_key='bench-key')
+    representation = {**client.headers, 'Prefer': 'return=representation'}
+
+    print(f"🔍 {args.rows} activity rows from {args.threads} threads, "
+          f"{PostgRESTWriteStandIn.latency * 1000:.0f} ms per request")
+    print("=" * 72)
+
+    PostgRESTWriteStandIn.reset()
+    start = time.time()
+    with ThreadPoolExecutor(args.threads) as pool:
+        list(pool.map(lambda i: client.post('activity_logs', data=activity_row(i), headers=representation),
+                      range(args.rows)))
+    report('one POST per row', time.time() - start)
+
+    PostgRESTWriteStandIn.reset()
+    writer = BulkWriter(client=client, flush_interval=0.05)
+    start = time.time()
+    with ThreadPoolExecutor(args.threads) as pool:
+        list(pool.map(lambda i: writer.add('activity_logs', activity_row(i)), range(args.rows)))
+    writer.stop()
+    report('coalesced bulk writer', time.time() - start)
+
+    print()
+    print(f"🔍 one call_logs write of {args.bulk_rows} rows")
+    print("=" * 72)
+    rows = [dict(activity_row(i), metadata={'bolna_call_id': f'call-{i}'}) for i in range(args.bulk_rows)]
+
+    PostgRESTWriteStandIn.reset()
+    start = time.time()
+    client.post('call_logs', data=rows, headers=representation)
+    report('single giant POST', time.time() - start)
+
+    PostgRESTWriteStandIn.reset()
+    start = time.time()
+    bulk_write('call_logs', rows, client=client)
+    report('chunked bulk_write', time.time() - start)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
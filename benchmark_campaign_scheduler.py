@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: campaign scheduler pacing against live-call quotas
+Queues campaigns for several senders/enterprises against a mock Bolna server
+and reports achieved calls/minute next to the quota-bound ceiling
+(sender quota / call duration) and the peak concurrency observed.
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+os.environ.setdefault('BOLNA_API_KEY', 'bench-key')
+os.environ['BOLNA_SENDER_RATE'] = '0'
+os.environ.setdefault('CAMPAIGN_WORKER_ENABLED', 'false')
+
+from benchmark_bolna_dispatch import MockBolna, build_calls
+from campaign_queue import CampaignQueue
+from campaign_scheduler import CampaignScheduler
+
+
+class AcceptedResponse:
+    def raise_for_status(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=300, help='calls per campaign')
+    parser.add_argument('--campaigns', type=int, default=2)
+    parser.add_argument('--senders', type=int, default=2, help='sender numbers per campaign')
+    parser.add_argument('--sender-limit', type=int, default=5, help='live calls per sender number')
+    parser.add_argument('--enterprise-limit', type=int, default=8, help='live calls per enterprise')
+    parser.add_argument('--call-seconds', type=float, default=1.0,
+                        help='simulated call duration (slot is released after this)')
+    args = parser.parse_args()
+
+    MockBolna.latency = 0.02
+    MockBolna.throttle_rate = 0
+    MockBolna.error_rate = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockBolna)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['BOLNA_API_URL'] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # call_logs writes go nowhere; the benchmark is about pacing
+    import campaign_scheduler as scheduler_module
+    from supabase_client import supabase_client
+    scheduler_module.supabase_request = lambda method, endpoint, data=None, params=None: [] if method == 'GET' else [{}]
+    supabase_client.available = True
+    supabase_client.post = lambda endpoint, data=None, **kwargs: AcceptedResponse()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'campaigns.db')
+    queue = CampaignQueue(db_path=db_path, batch_size=100)
+    scheduler = CampaignScheduler(queue=queue, sender_limit=args.sender_limit,
+                                  enterprise_limit=args.enterprise_limit,
+                                  slot_seconds=args.call_seconds, poll_interval=0.2)
+
+    campaign_ids = []
+    for c in range(args.campaigns):
+        senders = [f'+9180{c:02d}{s:06d}' for s in range(args.senders)]
+        calls = build_calls(args.calls, senders)
+        campaign_ids.append(queue.enqueue(calls, agent_id='bench-agent', name=f'bench {c}',
+                                          enterprise_id=f'enterprise-{c}'))
+
+    per_enterprise = min(args.enterprise_limit, args.senders * args.sender_limit)
+    ceiling = args.campaigns * per_enterprise * 60.0 / args.call_seconds
+    print(f"🔍 {args.campaigns} campaigns x {args.calls} calls, {args.senders} senders each, "
+          f"quota {args.sender_limit}/sender {args.enterprise_limit}/enterprise, {args.call_seconds}s calls")
+    print(f"   quota-bound ceiling: {ceiling:.0f} calls/minute")
+    print("=" * 72)
+
+    start = time.time()
+    scheduler.start()
+    while True:
+        statuses = [queue.get_campaign(cid)['status'] for cid in campaign_ids]
+        if all(status == 'completed' for status in statuses):
+            break
+        time.sleep(0.2)
+    elapsed = time.time() - start
+    scheduler.stop()
+
+    stats = scheduler.stats()
+    total = args.campaigns * args.calls
+    print(f"achieved: {total / elapsed * 60:8.0f} calls/minute over {elapsed:.1f}s "
+          f"({total / elapsed * 60 / ceiling:.0%} of ceiling)")
+    print(f"peak live calls: {stats['quotas']['peak_sender']} per sender (limit {args.sender_limit}), "
+          f"{stats['quotas']['peak_enterprise']} per enterprise (limit {args.enterprise_limit})")
+    for cid in campaign_ids:
+        progress = queue.get_campaign(cid)['progress']
+        print(f"campaign {cid[:8]}: {progress['successful_calls']}/{progress['total']} ok, "
+              f"{progress['calls_per_minute']} calls/minute")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
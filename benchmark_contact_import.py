@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-contact create vs the chunked bulk importer
+A local PostgREST stand-in holds one agent's contacts (--existing of them
+already present). Imports a --contacts row CSV the old way (duplicate GET +
+single-row POST per contact) and through ContactImporter (one phone=in.(...)
+query + one batched upsert per chunk); reports round trips and wall time.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from contact_import import ContactImporter, ImportJobStore
+from phone_normalizer import phone_normalizer
+from supabase_client import SupabaseClient
+
+
+class PostgRESTContactsStandIn(BaseHTTPRequestHandler):
+    """contacts table keyed by phone: GET filters by phone=eq./in., POST inserts or merges"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.002
+    lock = threading.Lock()
+    phones = set()
+    requests = 0
+
+    def _reply(self, status, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        wanted = parse_qs(urlparse(self.path).query).get('phone', [''])[0]
+        op, _, value = wanted.partition('.')
+        candidates = value[1:-1].split(',') if op == 'in' else [value]
+        time.sleep(self.latency)
+        with self.lock:
+            type(self).requests += 1
+            found = [{'phone': phone} for phone in candidates if phone in self.phones]
+        self._reply(200, found)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        rows = payload if isinstance(payload, list) else [payload]
+        time.sleep(self.latency)
+        with self.lock:
+            type(self).requests += 1
+            self.phones.update(row['phone'] for row in rows)
+        self._reply(201)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--contacts', type=int, default=10000)
+    parser.add_argument('--existing', type=int, default=1000, help='contacts already stored for the agent')
+    parser.add_argument('--chunk-size', type=int, default=250)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PostgRESTContactsStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = SupabaseClient(url=f"http://127.0.0.1:{server.server_address[1]}", service_key='bench-key')
+
+    lines = [f'Contact {i},98{i:08d}' for i in range(args.contacts)]
+    existing = set(phone_normalizer.normalize_many([line.split(',')[1] for line in lines[:args.existing]]))
+    handle, path = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(handle, 'w') as target:
+        target.write('Name,Phone\n' + '\n'.join(lines) + '\n')
+
+    print(f"🔍 Importing {args.contacts} contacts ({args.existing} already stored)")
+    print("=" * 72)
+
+    # Old path: duplicate check + single insert per contact
+    PostgRESTContactsStandIn.phones = set(existing)
+    PostgRESTContactsStandIn.requests = 0
+    start = time.perf_counter()
+    samples = []
+    for line in lines:
+        name, phone = line.split(',')
+        phone = phone_normalizer.normalize(phone)
+        began = time.perf_counter()
+        if not client.get('contacts', params={'phone': f'eq.{phone}'}).json():
+            client.post('contacts', data={'name': name, 'phone': phone})
+        samples.append((time.perf_counter() - began) * 1000)
+    legacy_seconds = time.perf_counter() - start
+    print(f"{'per-contact GET + POST':<28} requests={PostgRESTContactsStandIn.requests:6d}  "
+          f"total={legacy_seconds:7.2f} s  p50/contact={percentile(samples, 50):.2f} ms")
+
+    # Bulk importer
+    PostgRESTContactsStandIn.phones = set(existing)
+    PostgRESTContactsStandIn.requests = 0
+    store = ImportJobStore(db_path=os.path.join(tempfile.mkdtemp(), 'jobs.db'))
+    importer = ContactImporter(store=store, chunk_size=args.chunk_size, client=client)
+    job_id = store.create('ent-1', 'agent-1', 'bench.csv')
+    start = time.perf_counter()
+    importer.run(job_id, path, 'csv', 'agent-1', 'ent-1')
+    bulk_seconds = time.perf_counter() - start
+    job = store.get(job_id)
+    print(f"{'chunked importer':<28} requests={PostgRESTContactsStandIn.requests:6d}  "
+          f"total={bulk_seconds:7.2f} s  inserted={job['inserted']} duplicates={job['duplicates']}")
+    print(f"speedup: {legacy_seconds / bulk_seconds:.1f}x, stored contacts: {len(PostgRESTContactsStandIn.phones)}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
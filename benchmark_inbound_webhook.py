@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /webhooks/voice latency under an inbound call burst
+Fires --rate calls/second for --seconds at the voice webhook (open loop, so
+a slow response backs up the calls behind it) with call_logs behind a local
+PostgREST stand-in that takes --db-ms per request. Compares the old inline
+call_logs POST with the write-behind queue, then repeats the burst during a
+Supabase outage to show rows spilling to disk and being replayed afterwards.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class PostgRESTStandIn(BaseHTTPRequestHandler):
+    """call_logs keyed by id (POST inserts/merges); 503 while down"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.05
+    down = False
+    lock = threading.Lock()
+    ids = set()
+    posts = 0
+
+    def _reply(self, status, body=b''):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply(200, b'[]')
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        time.sleep(self.latency)
+        if self.down:
+            self._reply(503, b'{"message": "unavailable"}')
+            return
+        rows = payload if isinstance(payload, list) else [payload]
+        with self.lock:
+            type(self).posts += 1
+            self.ids.update(row['id'] for row in rows)
+        self._reply(201)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def burst(app, rate, seconds, threads, numbers):
+    """Open-loop burst; latency runs from each call's scheduled arrival to its response"""
+    local = threading.local()
+    samples = []
+    total = int(rate * seconds)
+
+    def call(i, scheduled):
+        client = getattr(local, 'client', None) or app.test_client()
+        local.client = client
+        client.post('/webhooks/voice', data={'From': '+919800000000', 'To': numbers[i % len(numbers)],
+                                             'CallSid': f'burst-{time.time_ns()}-{i}'})
+        samples.append((time.perf_counter() - scheduled) * 1000)
+
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=threads) as pool:
+        started = time.perf_counter()
+        for i in range(total):
+            scheduled = started + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(call, i, scheduled)
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<30} p50={percentile(samples, 50):9.2f} ms  p99={percentile(samples, 99):9.2f} ms  "
+          f"max={max(samples):9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rate', type=float, default=200, help='inbound calls per second')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--db-ms', type=float, default=50, help='Supabase latency per request')
+    parser.add_argument('--threads', type=int, default=32, help='request threads (gunicorn --threads)')
+    args = parser.parse_args()
+
+    PostgRESTStandIn.latency = args.db_ms / 1000
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PostgRESTStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['SUPABASE_URL'] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ['SUPABASE_SERVICE_KEY'] = 'bench-key'
+    os.environ['INBOUND_LOG_SPILL_DB'] = os.path.join(tempfile.mkdtemp(), 'spill.db')
+    for flag in ('CAMPAIGN_WORKER_ENABLED', 'CALL_RECONCILER_ENABLED', 'NUMBER_INVENTORY_ENABLED',
+                 'NUMBER_ROUTING_ENABLED'):
+        os.environ[flag] = 'false'
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main as app_main
+    from inbound_log_queue import inbound_log_queue
+    from number_routing import number_routing
+
+    numbers = [f'+1415555{i:04d}' for i in range(100)]
+    for i, number in enumerate(numbers):
+        number_routing.add({'id': f'pn-{i}', 'enterprise_id': 'ent-1', 'phone_number': number})
+
+    print(f"🔍 {args.rate:.0f} calls/s for {args.seconds:.0f} s, Supabase {args.db_ms:.0f} ms per request, "
+          f"{args.threads} request threads")
+    print("=" * 72)
+
+    # Old path: call_logs POST inline, before the TwiML goes back
+    queued_submit = inbound_log_queue.submit
+    inbound_log_queue.submit = lambda table, row: app_main.supabase_request('POST', table, data=row)
+    report('inline call_logs POST', burst(app_main.app, args.rate, args.seconds, args.threads, numbers))
+    inbound_log_queue.submit = queued_submit
+
+    PostgRESTStandIn.ids = set()
+    PostgRESTStandIn.posts = 0
+    report('write-behind queue', burst(app_main.app, args.rate, args.seconds, args.threads, numbers))
+    inbound_log_queue.flush()
+    print(f"  rows stored={len(PostgRESTStandIn.ids)} in {PostgRESTStandIn.posts} requests")
+
+    # Outage: every flush fails, rows go to the spill file and are replayed on recovery
+    PostgRESTStandIn.ids = set()
+    PostgRESTStandIn.down = True
+    report('write-behind, Supabase down', burst(app_main.app, args.rate, args.seconds, args.threads, numbers))
+    inbound_log_queue.flush()
+    print(f"  spilled to disk: {inbound_log_queue.pending()['disk']} rows")
+    PostgRESTStandIn.down = False
+    start = time.perf_counter()
+    inbound_log_queue.flush()
+    print(f"  replayed after recovery: {len(PostgRESTStandIn.ids)} rows stored in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms, left on disk: {inbound_log_queue.pending()['disk']}")
+
+    inbound_log_queue.stop()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: auth.login_required and auth_supabase.login_required
+Times a protected no-op route with the verified-token cache cold (every
+request decodes the JWT) and warm (claims served from the cache).
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from flask import Flask, jsonify
+
+# auth_supabase refuses to import without credentials; nothing here calls Supabase
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('SUPABASE_SERVICE_KEY', 'bench-key')
+
+import auth
+import auth_supabase
+import user_context
+from token_cache import VerifiedTokenCache
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def build_app(decorator):
+    app = Flask(__name__)
+
+    @app.route('/protected')
+    @decorator
+    def protected():
+        return jsonify({'ok': True})
+
+    return app
+
+
+def run(label, client, token, iterations, before_each=None):
+    headers = {'Authorization': f'Bearer {token}'}
+    samples = []
+    for _ in range(iterations):
+        if before_each:
+            before_each()
+        start = time.perf_counter()
+        response = client.get('/protected', headers=headers)
+        samples.append((time.perf_counter() - start) * 1e6)
+        assert response.status_code == 200, response.get_json()
+    print(f"{label:<40} p50={percentile(samples, 50):7.1f} us  "
+          f"p99={percentile(samples, 99):7.1f} us  mean={statistics.mean(samples):7.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=5000)
+    args = parser.parse_args()
+
+    # Keep the benchmark on JWT/cache cost: no token_version lookups
+    user_context.AUTH_CONTEXT_MODE = 'database'
+
+    user = {'id': 'bench-user', 'email': 'bench@bhashai.com', 'role': 'admin', 'status': 'active',
+            'organization': 'BhashAI', 'enterprise_id': 'bench-enterprise'}
+
+    print(f"🔍 login_required microbenchmark ({args.iterations} requests per run)")
+    print("=" * 72)
+
+    for name, module in (('auth', auth), ('auth_supabase', auth_supabase)):
+        token = module.auth_manager.generate_token(user)
+        cache = VerifiedTokenCache(maxsize=1024, shared_revocations=False)
+        original = module.verified_token_cache
+        module.verified_token_cache = cache
+        try:
+            client = build_app(module.login_required).test_client()
+            run(f'{name}.login_required (decode)', client, token, args.iterations,
+                before_each=lambda: cache.invalidate_user('bench-user'))
+            run(f'{name}.login_required (cached)', client, token, args.iterations)
+        finally:
+            module.verified_token_cache = original
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: login storm with inline bcrypt vs the bounded hashing pool
+Fires concurrent password verifications and reports login p50/p99, 503
+rejections and the latency of a cheap request served alongside the storm.
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from password_hashing import PasswordHashingService, HashingOverloadedError
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def bystander_request():
+    """Stand-in for a cheap API request (JSON serialisation of a small payload)"""
+    payload = [{'id': i, 'status': 'completed', 'duration': i * 3} for i in range(200)]
+    return json.dumps(payload)
+
+
+def run_storm(label, verify, logins, concurrency):
+    login_ms, bystander_ms = [], []
+    rejected = 0
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def login():
+        nonlocal rejected
+        start = time.perf_counter()
+        try:
+            verify()
+        except HashingOverloadedError:
+            with lock:
+                rejected += 1
+            return
+        with lock:
+            login_ms.append((time.perf_counter() - start) * 1000)
+
+    def bystander():
+        while not done.is_set():
+            start = time.perf_counter()
+            bystander_request()
+            bystander_ms.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+
+    watcher = threading.Thread(target=bystander, daemon=True)
+    watcher.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(logins):
+            pool.submit(login)
+    elapsed = time.perf_counter() - start
+    done.set()
+    watcher.join()
+
+    print(f"{label:<22} logins ok={len(login_ms):4d} rejected={rejected:4d} "
+          f"in {elapsed:6.2f}s | login p50={percentile(login_ms, 50):8.1f} ms "
+          f"p99={percentile(login_ms, 99):8.1f} ms | bystander p99={percentile(bystander_ms, 99):6.2f} ms "
+          f"mean={statistics.mean(bystander_ms) if bystander_ms else 0:5.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=64, help='simultaneous login requests')
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost factor')
+    parser.add_argument('--workers', type=int, default=4, help='hashing pool processes')
+    parser.add_argument('--queue-depth', type=int, default=16, help='hashing pool queue depth')
+    args = parser.parse_args()
+
+    password = 'storm-password'
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=args.rounds)).decode('utf-8')
+
+    print(f"🔍 Login storm: {args.logins} logins, {args.concurrency} concurrent, "
+          f"bcrypt rounds={args.rounds}, pool {args.workers} workers + {args.queue_depth} queued")
+    print("=" * 72)
+
+    run_storm('inline bcrypt',
+              lambda: bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8')),
+              args.logins, args.concurrency)
+
+    hasher = PasswordHashingService(max_workers=args.workers, max_queue_depth=args.queue_depth, timeout=60)
+    hasher.verify_password(password, hashed)  # warm the worker processes
+    run_storm('bounded hashing pool', lambda: hasher.verify_password(password, hashed),
+              args.logins, args.concurrency)
+    print(f"📊 Pool metrics: {hasher.get_metrics()}")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
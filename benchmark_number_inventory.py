@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark: live provider search vs the in-memory number inventory
+A local stand-in answers Twilio, Telnyx and Plivo search requests after
+per-provider delays. Refreshes a NumberInventory for a few US area codes once,
+then times /api/phone-numbers/search-style lookups (area code, area code +
+capability, three-digit pattern) against search_all_providers without cache.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from number_inventory import NumberInventory
+from phone_provider_integration import PhoneProviderManager
+
+AREA_CODES = ['212', '310', '415', '646']
+
+
+class ProviderStandIn(BaseHTTPRequestHandler):
+    """Search responses in each provider's own format for the requested area code"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    delays = {}
+    page = 100
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        area_code = (query.get('AreaCode') or query.get('filter[national_destination_code]')
+                     or query.get('pattern') or [random.choice(AREA_CODES)])[0][:3]
+        if '/twilio/' in self.path:
+            provider = 'twilio'
+            payload = {'available_phone_numbers': [
+                {'phone_number': f'+1{area_code}555{i:04d}', 'capabilities': {'voice': True, 'SMS': i % 2 == 0}}
+                for i in range(self.page)]}
+        elif '/telnyx/' in self.path:
+            provider = 'telnyx'
+            payload = {'data': [
+                {'phone_number': f'+1{area_code}666{i:04d}', 'features': [{'name': 'voice'}, {'name': 'sms'}],
+                 'cost_information': {'monthly_cost': str(0.8 + i / 1000), 'upfront_cost': '0'}}
+                for i in range(self.page)]}
+        else:
+            provider = 'plivo'
+            payload = {'objects': [
+                {'number': f'1{area_code}777{i:04d}', 'capabilities': ['voice'],
+                 'monthly_rental_rate': str(0.5 + i / 1000), 'setup_rate': '0'} for i in range(self.page)]}
+        time.sleep(self.delays.get(provider, 0))
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(label, fn, iterations):
+    samples = []
+    result = None
+    for i in range(iterations):
+        start = time.perf_counter()
+        result = fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<34} p50={percentile(samples, 50):9.3f} ms  p99={percentile(samples, 99):9.3f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--twilio-ms', type=float, default=150)
+    parser.add_argument('--telnyx-ms', type=float, default=300)
+    parser.add_argument('--plivo-ms', type=float, default=400)
+    parser.add_argument('--per-provider', type=int, default=100, help='numbers each provider returns per search')
+    parser.add_argument('--iterations', type=int, default=10, help='live searches to time')
+    parser.add_argument('--lookups', type=int, default=20000, help='inventory lookups to time')
+    args = parser.parse_args()
+
+    ProviderStandIn.delays = {'twilio': args.twilio_ms / 1000, 'telnyx': args.telnyx_ms / 1000,
+                              'plivo': args.plivo_ms / 1000}
+    ProviderStandIn.page = args.per_provider
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ProviderStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    manager = PhoneProviderManager()
+    for name, provider in manager.providers.items():
+        provider.use_mock = False
+        provider.base_url = f"{base}/{name}"
+    providers = ['twilio', 'telnyx', 'plivo']
+
+    inventory = NumberInventory(manager=manager, targets=','.join(f'US:{code}' for code in AREA_CODES),
+                                fetch_limit=args.per_provider * len(providers))
+    start = time.perf_counter()
+    inventory.refresh()
+    print(f"🔍 inventory refresh: {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"{len(inventory._index['US'].numbers)} US numbers indexed")
+    print("=" * 72)
+
+    def live(i):
+        return manager.search_all_providers(providers, 'US', area_code=AREA_CODES[i % len(AREA_CODES)],
+                                            limit=20, use_cache=False)
+
+    run('live search (no cache)', live, args.iterations)
+    run('inventory: area code',
+        lambda i: inventory.search('US', area_code=AREA_CODES[i % len(AREA_CODES)], providers=providers),
+        args.lookups)
+    run('inventory: area code + sms',
+        lambda i: inventory.search('US', area_code=AREA_CODES[i % len(AREA_CODES)], capabilities=['sms'],
+                                   providers=providers), args.lookups)
+    result = run('inventory: 3-digit pattern',
+                 lambda i: inventory.search('US', pattern=AREA_CODES[i % len(AREA_CODES)], providers=providers),
+                 args.lookups)
+    print(f"  total_found={result['total_found']} cheapest={result['available_numbers'][0]['monthly_cost']}")
+    print(f"stats: {inventory.get_stats()['hits']} hits, {inventory.get_stats()['misses']} misses")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
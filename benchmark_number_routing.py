@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-webhook number lookup vs the in-memory routing table
+A local PostgREST stand-in holds --numbers purchased numbers behind
+--db-ms of latency. Resolves --lookups inbound To numbers (in the carriers'
+mixed formats) the old way, one purchased_phone_numbers query each, and
+through NumberRoutingTable; reports per-lookup latency and database calls.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from number_routing import NumberRoutingTable, phone_number_filter
+from supabase_client import SupabaseClient
+
+
+class PostgRESTNumbersStandIn(BaseHTTPRequestHandler):
+    """purchased_phone_numbers filtered by phone_number=in.(...)"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.01
+    rows = {}
+    requests = 0
+
+    def do_GET(self):
+        wanted = parse_qs(urlparse(self.path).query).get('phone_number', [''])[0]
+        candidates = [value.strip('"') for value in wanted[len('in.('):-1].split(',')]
+        time.sleep(self.latency)
+        type(self).requests += 1
+        body = json.dumps([self.rows[c] for c in candidates if c in self.rows][:1]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def carrier_format(e164, rng):
+    digits = e164[1:]
+    return rng.choice([e164, digits, f"+1 ({digits[1:4]}) {digits[4:7]}-{digits[7:]}"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--numbers', type=int, default=5000)
+    parser.add_argument('--lookups', type=int, default=500)
+    parser.add_argument('--db-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    numbers = [f'+1415{i:07d}' for i in range(args.numbers)]
+    rows = [{'id': f'pn-{i}', 'enterprise_id': f'ent-{i % 50}', 'phone_number': number}
+            for i, number in enumerate(numbers)]
+    PostgRESTNumbersStandIn.rows = {row['phone_number']: row for row in rows}
+    PostgRESTNumbersStandIn.latency = args.db_ms / 1000
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PostgRESTNumbersStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = SupabaseClient(url=f"http://127.0.0.1:{server.server_address[1]}", service_key='bench-key')
+
+    inbound = [carrier_format(rng.choice(numbers), rng) for _ in range(args.lookups)]
+    print(f"🔍 {args.numbers} purchased numbers, {args.lookups} inbound calls, {args.db_ms:.0f} ms database")
+    print("=" * 72)
+
+    samples = []
+    for to_number in inbound:
+        start = time.perf_counter()
+        client.get('purchased_phone_numbers', params={'phone_number': phone_number_filter(to_number),
+                                                      'status': 'eq.active'}).json()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{'query per webhook':<26} p50={percentile(samples, 50):8.3f} ms  p99={percentile(samples, 99):8.3f} ms  "
+          f"db calls={PostgRESTNumbersStandIn.requests}")
+
+    table = NumberRoutingTable()
+    start = time.perf_counter()
+    for row in rows:
+        table.add(row)
+    print(f"{'table warm (in memory)':<26} {(time.perf_counter() - start) * 1000:8.1f} ms for {len(rows)} routes")
+
+    samples = []
+    resolved = 0
+    for to_number in inbound:
+        start = time.perf_counter()
+        resolved += table.lookup(to_number) is not None
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{'routing table':<26} p50={percentile(samples, 50):8.3f} ms  p99={percentile(samples, 99):8.3f} ms  "
+          f"db calls={table.stats['db_lookups']}  resolved={resolved}/{len(inbound)}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
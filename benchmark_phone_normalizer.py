@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark: phone normaliser throughput
+Normalises a synthetic contact list (--numbers raw numbers in mixed national,
+international, punctuated and '00'-prefixed formats, --repeat-ratio of them
+repeated as in a real export) one call at a time and through the batch API,
+and extracts numbers from conversational transcripts. Reports numbers/second.
+"""
+
+import argparse
+import random
+import time
+
+from phone_normalizer import PhoneNormalizer
+
+
+def synthetic_numbers(count, repeat_ratio, seed=7):
+    rng = random.Random(seed)
+    formats = [
+        lambda: f"{rng.randint(6, 9)}{rng.randint(0, 999999999):09d}",                    # Indian mobile
+        lambda: f"+91 {rng.randint(70000, 99999)} {rng.randint(0, 99999):05d}",
+        lambda: f"0{rng.randint(6, 9)}{rng.randint(0, 999999999):09d}",                   # trunk prefix
+        lambda: f"+1 ({rng.randint(201, 989)}) {rng.randint(200, 999)}-{rng.randint(0, 9999):04d}",
+        lambda: f"0044 20 {rng.randint(7000, 8999)} {rng.randint(0, 9999):04d}",
+        lambda: f"+971-5{rng.randint(0, 9)}-{rng.randint(0, 9999999):07d}",
+        lambda: f"{rng.randint(0, 99999)}",                                                # junk
+    ]
+    unique = [rng.choice(formats)() for _ in range(int(count * (1 - repeat_ratio)) or 1)]
+    return unique + [rng.choice(unique) for _ in range(count - len(unique))]
+
+
+def run(label, fn, items):
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    print(f"{label:<34} {items / seconds:12,.0f} /s  ({seconds * 1000:8.1f} ms)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--numbers', type=int, default=200000)
+    parser.add_argument('--repeat-ratio', type=float, default=0.2)
+    parser.add_argument('--transcripts', type=int, default=20000)
+    args = parser.parse_args()
+
+    normalizer = PhoneNormalizer(default_region='IN')
+    numbers = synthetic_numbers(args.numbers, args.repeat_ratio)
+    print(f"🔍 {len(numbers)} raw numbers, {len(set(numbers))} distinct")
+    print("=" * 72)
+
+    single = run('normalize() per number', lambda: [normalizer.normalize(n) for n in numbers], len(numbers))
+    batch = run('normalize_many()', lambda: normalizer.normalize_many(numbers), len(numbers))
+    run('canonical_key() per number', lambda: [normalizer.canonical_key(n) for n in numbers], len(numbers))
+    valid = sum(1 for number in batch if number)
+    print(f"batch matches single: {batch == single}, valid: {valid}/{len(numbers)}")
+
+    transcripts = [f"My name is Rajesh, मेरा number है {numbers[i % len(numbers)]} and I want an appointment"
+                   for i in range(args.transcripts)]
+    found = run('find_numbers() per transcript', lambda: [normalizer.find_numbers(t) for t in transcripts],
+                len(transcripts))
+    print(f"transcripts with a number: {sum(1 for numbers_found in found if numbers_found)}/{len(transcripts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sequential vs concurrent multi-provider number search
+A local stand-in answers Twilio, Telnyx and Plivo search requests after
+per-provider delays (one provider deliberately slow). Times the old loop
+(providers one after another) against search_all_providers cold (fan-out
+with per-provider deadlines, heap merge) and cached, then with the slow
+provider failing outright until its circuit opens and it is skipped.
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from phone_provider_integration import PhoneProviderManager
+
+
+class ProviderStandIn(BaseHTTPRequestHandler):
+    """Minimal search responses in each provider's own format"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    delays = {}
+    failing = set()
+
+    def do_GET(self):
+        if '/twilio/' in self.path:
+            provider = 'twilio'
+            payload = {'available_phone_numbers': [
+                {'phone_number': f'+1415555{i:04d}', 'capabilities': {'voice': True, 'SMS': True}} for i in range(20)]}
+        elif '/telnyx/' in self.path:
+            provider = 'telnyx'
+            payload = {'data': [
+                {'phone_number': f'+1415666{i:04d}', 'features': [{'name': 'voice'}, {'name': 'sms'}],
+                 'cost_information': {'monthly_cost': str(0.8 + i / 100), 'upfront_cost': '0'}} for i in range(20)]}
+        else:
+            provider = 'plivo'
+            payload = {'objects': [
+                {'number': f'1415777{i:04d}', 'capabilities': ['voice', 'sms'],
+                 'monthly_rental_rate': str(0.5 + i / 100), 'setup_rate': '0'} for i in range(20)]}
+        time.sleep(self.delays.get(provider, 0))
+        status = 503 if provider in self.failing else 200
+        body = json.dumps(payload if status == 200 else {'error': 'unavailable'}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(label, fn, iterations):
+    samples = []
+    result = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<34} p50={percentile(samples, 50):9.2f} ms  p99={percentile(samples, 99):9.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--twilio-ms', type=float, default=150)
+    parser.add_argument('--telnyx-ms', type=float, default=300)
+    parser.add_argument('--plivo-ms', type=float, default=2500, help='the slow provider')
+    parser.add_argument('--deadline', type=float, default=1.0, help='per-provider search deadline (s)')
+    parser.add_argument('--degraded-deadline', type=float, default=0.4,
+                        help='deadline once a provider is tracked as slow or flaky (s)')
+    parser.add_argument('--iterations', type=int, default=5)
+    args = parser.parse_args()
+
+    ProviderStandIn.delays = {'twilio': args.twilio_ms / 1000, 'telnyx': args.telnyx_ms / 1000,
+                              'plivo': args.plivo_ms / 1000}
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ProviderStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    manager = PhoneProviderManager()
+    for name, provider in manager.providers.items():
+        provider.use_mock = False
+        provider.base_url = f"{base}/{name}"
+    manager.search_timeouts = {name: args.deadline for name in manager.providers}
+    manager.degraded_search_timeout = args.degraded_deadline
+    providers = ['twilio', 'telnyx', 'plivo']
+
+    print(f"🔍 provider delays: twilio {args.twilio_ms:.0f} ms, telnyx {args.telnyx_ms:.0f} ms, "
+          f"plivo {args.plivo_ms:.0f} ms; deadline {args.deadline:.1f} s")
+    print("=" * 72)
+
+    def sequential():
+        results = []
+        for name in providers:
+            found = manager.search_phone_numbers(name, 'US', '415', limit=20)
+            if found['success']:
+                results.extend(found['available_numbers'])
+        results.sort(key=lambda number: number.get('monthly_cost', 999))
+        return results[:20]
+
+    run('sequential providers', sequential, args.iterations)
+
+    def concurrent():
+        manager.search_cache.clear()
+        return manager.search_all_providers(providers, 'US', area_code='415', limit=20)
+
+    result = run('concurrent, cold', concurrent, args.iterations)
+    print(f"  providers_failed={result['providers_failed']} cheapest={result['available_numbers'][0]['monthly_cost']}")
+    run('concurrent, cached', lambda: manager.search_all_providers(providers, 'US', area_code='415', limit=20), 1000)
+
+    # Outage: plivo answers 503 after its usual delay until the breaker opens
+    ProviderStandIn.failing = {'plivo'}
+    run('plivo failing until circuit opens', concurrent, manager.health['plivo'].failure_threshold)
+    result = run('plivo skipped, circuit open', concurrent, args.iterations)
+    print(f"  providers_failed={result['providers_failed']}")
+    for name, status in manager.get_provider_status().items():
+        health = status['health']
+        print(f"  {name:<7} {status['status']:<12} circuit={health['circuit']:<9} "
+              f"latency={health['latency_ms']} ms errors={health['error_rate']}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bare requests vs pooled SupabaseClient
+Runs a local PostgREST stand-in and reports p50/p99 latency for both paths.
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from supabase_client import SupabaseClient
+
+
+class PostgRESTStandIn(BaseHTTPRequestHandler):
+    """Minimal keep-alive server answering /rest/v1/* with a small JSON row set"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    handshake_delay = 0.0
+    body = json.dumps([{'enterprise_id': 'ent-1', 'role': 'admin'}]).encode()
+
+    def setup(self):
+        # Simulate per-connection TLS handshake cost on new sockets only
+        if self.handshake_delay:
+            time.sleep(self.handshake_delay)
+        super().setup()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(label, fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<28} p50={percentile(samples, 50):7.2f} ms  "
+          f"p99={percentile(samples, 99):7.2f} ms  mean={statistics.mean(samples):7.2f} ms")
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--handshake-ms', type=float, default=20.0,
+                        help='simulated TLS handshake per new connection')
+    args = parser.parse_args()
+
+    PostgRESTStandIn.handshake_delay = args.handshake_ms / 1000.0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PostgRESTStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    client = SupabaseClient(url=base_url, service_key='bench-key')
+    endpoint = 'users?id=eq.bench&select=enterprise_id,role'
+
+    print(f"🔍 PostgREST stand-in at {base_url} "
+          f"({args.iterations} requests, {args.handshake_ms} ms handshake)")
+    print("=" * 72)
+
+    run('bare requests.get', lambda: requests.get(client.rest_url(endpoint), headers=client.headers).json(),
+        args.iterations)
+    run('pooled SupabaseClient.get', lambda: client.get(endpoint).json(), args.iterations)
+
+    client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: trial API token bucket shared by several worker processes
+Each process hammers the same users' buckets in one SQLite file; reports
+per-check latency and checks that the processes together admitted exactly
+the bucket capacity per user (no double spending across workers).
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from trial_rate_limiter import TokenBucketLimiter
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def worker(db_path, capacity, users, checks, results):
+    limiter = TokenBucketLimiter(capacity=capacity, refill_per_second=0, db_path=db_path)
+    allowed = {}
+    samples = []
+    for i in range(checks):
+        user = f'user-{i % users}'
+        start = time.perf_counter()
+        if limiter.acquire(user)['allowed']:
+            allowed[user] = allowed.get(user, 0) + 1
+        samples.append((time.perf_counter() - start) * 1e6)
+    results.put((allowed, samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4, help='processes sharing the limiter')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--capacity', type=int, default=100, help='tokens per user (no refill)')
+    parser.add_argument('--checks', type=int, default=5000, help='checks per process')
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'trial_limiter.db')
+    TokenBucketLimiter(capacity=args.capacity, refill_per_second=0, db_path=db_path)
+
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(db_path, args.capacity, args.users, args.checks, results))
+                 for _ in range(args.workers)]
+    start = time.time()
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.time() - start
+
+    totals = {}
+    samples = []
+    for allowed, worker_samples in outcomes:
+        samples.extend(worker_samples)
+        for user, count in allowed.items():
+            totals[user] = totals.get(user, 0) + count
+
+    print(f"🔍 {args.workers} processes x {args.checks} checks over {args.users} users, "
+          f"capacity {args.capacity}")
+    print("=" * 72)
+    print(f"check latency   p50={percentile(samples, 50):7.1f} us  p99={percentile(samples, 99):7.1f} us  "
+          f"({len(samples) / elapsed:,.0f} checks/s overall)")
+    exact = all(count == args.capacity for count in totals.values()) and len(totals) == args.users
+    print(f"admitted per user: min={min(totals.values())} max={max(totals.values())} "
+          f"(expected {args.capacity}) -> {'exact' if exact else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
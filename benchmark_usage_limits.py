@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: trial voice-minute limit check, row scan vs materialised counters
+Serves a user with --call-logs call_logs rows from a local PostgREST stand-in
+and times the old check (download today's and all-time rows, sum in Python)
+against check_usage_limits on user_usage_counters (cold load and cached).
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+class PostgRESTStandIn(BaseHTTPRequestHandler):
+    """Answers call_logs with a large pre-serialised row set and usage counters with two rows"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    bodies = {}
+
+    def do_GET(self):
+        table = urlparse(self.path).path.rsplit('/', 1)[-1]
+        body = self.bodies.get(table, b'[]')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def legacy_voice_minutes_check(supabase_request, user_id):
+    """The previous check: two unbounded call_logs downloads summed in Python"""
+    today = datetime.now(timezone.utc).date().isoformat()
+    logs = supabase_request('GET', 'call_logs', params={
+        'user_id': f'eq.{user_id}',
+        'created_at': f'gte.{today}T00:00:00Z'
+    })
+    daily_minutes = sum(log.get('duration_minutes', 0) for log in logs) if logs else 0
+    all_logs = supabase_request('GET', 'call_logs', params={'user_id': f'eq.{user_id}'})
+    total_minutes = sum(log.get('duration_minutes', 0) for log in all_logs) if all_logs else 0
+    return daily_minutes, total_minutes
+
+
+def run(label, fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<34} p50={percentile(samples, 50):9.3f} ms  p99={percentile(samples, 99):9.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--call-logs', type=int, default=100000, help='call_logs rows for the user')
+    parser.add_argument('--iterations', type=int, default=5, help='iterations of the row-scan check')
+    args = parser.parse_args()
+
+    user_id = '00000000-0000-0000-0000-000000000001'
+    now = datetime.now(timezone.utc).isoformat()
+    rows = [{
+        'id': f'call-{i}', 'user_id': user_id, 'status': 'completed', 'duration': 90,
+        'duration_minutes': 1.5, 'phone_number': '+919876543210', 'created_at': now,
+        'metadata': {'bolna_call_id': f'bolna-{i}', 'campaign_name': 'Benchmark'}
+    } for i in range(args.call_logs)]
+    PostgRESTStandIn.bodies = {
+        'call_logs': json.dumps(rows).encode(),
+        'user_usage_counters': json.dumps([
+            {'period': 'total', 'voice_seconds': 90 * args.call_logs, 'api_calls': 10},
+            {'period': datetime.now(timezone.utc).date().isoformat(), 'voice_seconds': 900, 'api_calls': 10}
+        ]).encode()
+    }
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PostgRESTStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['SUPABASE_URL'] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ['SUPABASE_SERVICE_KEY'] = 'bench-key'
+    os.environ['CAMPAIGN_WORKER_ENABLED'] = 'false'
+    os.environ['CALL_RECONCILER_ENABLED'] = 'false'
+
+    import main as app_main
+    from trial_middleware import check_usage_limits
+    from usage_counters import usage_counters
+
+    print(f"🔍 voice-minute limit check for a user with {args.call_logs} call_logs rows "
+          f"({len(PostgRESTStandIn.bodies['call_logs']) / 1e6:.1f} MB per download)")
+    print("=" * 72)
+
+    run('row scan (2 downloads + sum)', lambda: legacy_voice_minutes_check(app_main.supabase_request, user_id),
+        args.iterations)
+
+    def cold():
+        usage_counters.invalidate(user_id)
+        check_usage_limits(user_id, 'voice_minutes', {})
+    run('counters, cold (1 two-row GET)', cold, 200)
+    run('counters, cached', lambda: check_usage_limits(user_id, 'voice_minutes', {}), 10000)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Bolna Dispatch Engine
+Places campaign calls concurrently with a bounded thread pool, a per-sender
+number rate limit and jittered exponential backoff when Bolna refused the call
+before placing it (connect failures, 429, 503)
+"""
+
+import os
+import time
+import random
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional
+
+# POST /call is not idempotent: only retry statuses that mean the call was not
+# placed (rate limited / unavailable). A 500/502/504 or a read timeout may come
+# after Bolna already started dialling, and a retry would ring the contact twice.
+RETRYABLE_STATUS_CODES = (429, 503)
+
+
+class SenderRateLimiter:
+    """Token bucket per sender number (calls per second with a small burst)"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._buckets = {}  # sender -> (tokens, last_refill)
+        self._lock = threading.Lock()
+
+    def acquire(self, sender: str) -> float:
+        """Block until the sender may place another call; returns seconds waited"""
+        if not self.rate or self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(sender, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            # Reserve a token now (possibly going negative) so waiters queue fairly
+            tokens -= 1
+            self._buckets[sender] = (tokens, now)
+            wait = 0.0 if tokens >= 0 else -tokens / self.rate
+
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+# Per-worker limiter shared by every campaign dispatched from this process
+sender_rate_limiter = SenderRateLimiter(
+    rate=float(os.getenv('BOLNA_SENDER_RATE', '5')),
+    burst=int(os.getenv('BOLNA_SENDER_BURST', '5'))
+)
+
+
+class BolnaDispatcher:
+    """Concurrent, rate-limited, retrying dispatcher for BolnaAPI.start_outbound_call"""
+
+    def __init__(self,
+                 bolna_api,
+                 max_concurrency: int = None,
+                 rate_limiter: SenderRateLimiter = None,
+                 max_retries: int = None,
+                 backoff_base: float = None,
+                 backoff_cap: float = None):
+        self.bolna_api = bolna_api
+        self.max_concurrency = max_concurrency or int(os.getenv('BOLNA_MAX_CONCURRENCY', '10'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('BOLNA_MAX_RETRIES', '3'))
+        self.backoff_base = backoff_base or float(os.getenv('BOLNA_BACKOFF_BASE', '0.5'))
+        self.backoff_cap = backoff_cap or float(os.getenv('BOLNA_BACKOFF_CAP', '8'))
+
+        # Shared by default so concurrent campaigns on one sender number share its limit
+        self.rate_limiter = rate_limiter or sender_rate_limiter
+
+        self._lock = threading.Lock()
+        self.stats = {'dispatched': 0, 'succeeded': 0, 'failed': 0, 'retries': 0, 'throttled_seconds': 0.0}
+
+    def _count(self, key: str, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _backoff(self, attempt: int, response=None) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After on 429"""
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                try:
+                    return min(self.backoff_cap, float(retry_after)) + random.uniform(0, self.backoff_base)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        # ConnectTimeout is a ConnectionError; ReadTimeout (request already sent) is not
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return True
+        response = getattr(error, 'response', None)
+        return response is not None and response.status_code in RETRYABLE_STATUS_CODES
+
+    def start_call(self, call_config: Dict) -> Dict:
+        """Place one call with rate limiting and retries; never raises"""
+        sender = call_config.get('sender_phone') or self.bolna_api.default_sender_phone
+        attempt = 0
+
+        while True:
+            waited = self.rate_limiter.acquire(sender)
+            if waited:
+                self._count('throttled_seconds', waited)
+            try:
+                result = self.bolna_api.start_outbound_call(
+                    agent_id=call_config['agent_id'],
+                    recipient_phone=call_config['recipient_phone'],
+                    sender_phone=call_config.get('sender_phone'),
+                    variables=call_config.get('variables', {}),
+                    metadata=call_config.get('metadata', {})
+                )
+                result = dict(result) if isinstance(result, dict) else {'response': result}
+                result['success'] = True
+                result['attempts'] = attempt + 1
+                result['original_config'] = call_config
+                self._count('succeeded')
+                return result
+
+            except Exception as e:
+                if attempt < self.max_retries and self._is_retryable(e):
+                    delay = self._backoff(attempt, getattr(e, 'response', None))
+                    print(f"⚠️ Retrying call to {call_config.get('recipient_phone')} in {delay:.2f}s: {e}")
+                    self._count('retries')
+                    attempt += 1
+                    time.sleep(delay)
+                    continue
+
+                self._count('failed')
+                print(f"Failed to start call to {call_config.get('recipient_phone')}: {e}")
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'attempts': attempt + 1,
+                    'original_config': call_config
+                }
+
+    def iter_dispatch(self, calls: List[Dict]) -> Iterator[Dict]:
+        """Dispatch calls concurrently, yielding each result as soon as it completes"""
+        if not calls:
+            return
+
+        self._count('dispatched', len(calls))
+        workers = max(1, min(self.max_concurrency, len(calls)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bolna-dispatch') as executor:
+            futures = [executor.submit(self.start_call, call_config) for call_config in calls]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def dispatch(self, calls: List[Dict], on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """
+        Dispatch calls concurrently and return results in the order of calls
+
+        Args:
+            calls: Call configurations as accepted by BolnaAPI.bulk_start_calls
+            on_result: Optional callback invoked with each result as it completes
+        """
+        results = {}
+        for result in self.iter_dispatch(calls):
+            results[id(result['original_config'])] = result
+            if on_result:
+                on_result(result)
+        return [results[id(call_config)] for call_config in calls]
@@ -8,8 +8,11 @@ import requests
 import json
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterator, List, Optional, Any
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from bolna_dispatcher import BolnaDispatcher
+from phone_normalizer import phone_normalizer
 
 load_dotenv()
 
@@ -21,6 +24,16 @@ class BolnaAPI:
         
         if not self.api_key:
             raise ValueError("BOLNA_API_KEY environment variable is required")
+        
+        self.timeout = (float(os.getenv('BOLNA_CONNECT_TIMEOUT', '3.05')),
+                        float(os.getenv('BOLNA_READ_TIMEOUT', '30')))
+        
+        # Keep-alive pool sized for concurrent campaign dispatch
+        pool_size = int(os.getenv('BOLNA_MAX_CONCURRENCY', '10'))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
     def _make_request(self, method: str, endpoint: str, data: Dict = None) -> Dict:
         """Make HTTP request to Bolna API"""
@@ -34,13 +47,13 @@ class BolnaAPI:
         
         try:
             if method.upper() == 'GET':
-                response = requests.get(url, headers=headers, params=data)
+                response = self.session.get(url, headers=headers, params=data, timeout=self.timeout)
             elif method.upper() == 'POST':
-                response = requests.post(url, headers=headers, json=data)
+                response = self.session.post(url, headers=headers, json=data, timeout=self.timeout)
             elif method.upper() == 'PUT':
-                response = requests.put(url, headers=headers, json=data)
+                response = self.session.put(url, headers=headers, json=data, timeout=self.timeout)
             elif method.upper() == 'DELETE':
-                response = requests.delete(url, headers=headers)
+                response = self.session.delete(url, headers=headers, timeout=self.timeout)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
@@ -75,11 +88,9 @@ class BolnaAPI:
         if not sender_phone:
             sender_phone = self.default_sender_phone
         
-        # Ensure phone numbers are in E.164 format
-        if not recipient_phone.startswith('+'):
-            recipient_phone = f'+{recipient_phone}'
-        if not sender_phone.startswith('+'):
-            sender_phone = f'+{sender_phone}'
+        # Ensure phone numbers are in E.164 format (numbers the normaliser can't read are passed through with a '+')
+        recipient_phone = phone_normalizer.normalize(recipient_phone) or f"+{recipient_phone.lstrip('+')}"
+        sender_phone = phone_normalizer.normalize(sender_phone) or f"+{sender_phone.lstrip('+')}"
         
         call_data = {
             'agent_id': agent_id,
@@ -128,9 +139,9 @@ class BolnaAPI:
             print(f"Failed to get agent details: {e}")
             raise
     
-    def bulk_start_calls(self, calls: List[Dict]) -> List[Dict]:
+    def bulk_start_calls(self, calls: List[Dict], on_result: Callable[[Dict], None] = None) -> List[Dict]:
         """
-        Start multiple outbound calls
+        Start multiple outbound calls concurrently
         
         Args:
             calls: List of call configurations, each containing:
@@ -139,38 +150,17 @@ class BolnaAPI:
                 - sender_phone: str (optional)
                 - variables: Dict (optional)
                 - metadata: Dict (optional)
+            on_result: Optional callback invoked with each result as it completes
         
         Returns:
-            List of call responses
+            List of call responses, in the same order as calls
         """
-        results = []
-        
-        for i, call_config in enumerate(calls):
-            try:
-                print(f"Starting call {i+1}/{len(calls)} to {call_config.get('recipient_phone')}")
-                
-                result = self.start_outbound_call(
-                    agent_id=call_config['agent_id'],
-                    recipient_phone=call_config['recipient_phone'],
-                    sender_phone=call_config.get('sender_phone'),
-                    variables=call_config.get('variables', {}),
-                    metadata=call_config.get('metadata', {})
-                )
-                
-                result['success'] = True
-                result['original_config'] = call_config
-                results.append(result)
-                
-            except Exception as e:
-                error_result = {
-                    'success': False,
-                    'error': str(e),
-                    'original_config': call_config
-                }
-                results.append(error_result)
-                print(f"Failed to start call to {call_config.get('recipient_phone')}: {e}")
-        
-        return results
+        print(f"Dispatching {len(calls)} calls")
+        return BolnaDispatcher(self).dispatch(calls, on_result=on_result)
+    
+    def iter_bulk_start_calls(self, calls: List[Dict]) -> Iterator[Dict]:
+        """Start multiple outbound calls concurrently, yielding results as they complete"""
+        return BolnaDispatcher(self).iter_dispatch(calls)
 
 # Default agent configurations based on your voice agents
 DEFAULT_AGENT_CONFIGS = {
@@ -0,0 +1,272 @@
+"""
+Bulk Writer
+Chunked PostgREST inserts/upserts with `Prefer: return=minimal`, plus a
+coalescing buffer that turns many small writes from concurrent requests
+(activity logs, status updates) into a few periodic bulk requests.
+"""
+
+import os
+import json
+import atexit
+import threading
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from supabase_client import SupabaseClient, supabase_client
+
+DEFAULT_MAX_ROWS = int(os.getenv('BULK_WRITE_MAX_ROWS', '500'))
+DEFAULT_MAX_BYTES = int(os.getenv('BULK_WRITE_MAX_BYTES', '1000000'))
+
+
+def chunk_rows(rows: List[Dict], max_rows: int = None, max_bytes: int = None) -> Iterator[List[Dict]]:
+    """
+    Split rows into request-sized chunks
+
+    A chunk holds at most max_rows rows and roughly max_bytes of JSON, and only
+    rows with the same keys, since PostgREST bulk inserts require matching keys.
+    A single row larger than max_bytes is sent on its own.
+    """
+    max_rows = max_rows or DEFAULT_MAX_ROWS
+    max_bytes = max_bytes or DEFAULT_MAX_BYTES
+
+    chunk, chunk_bytes, chunk_keys = [], 2, None
+    for row in rows:
+        row_bytes = len(json.dumps(row, default=str)) + 1
+        keys = frozenset(row)
+        if chunk and (keys != chunk_keys or len(chunk) >= max_rows or chunk_bytes + row_bytes > max_bytes):
+            yield chunk
+            chunk, chunk_bytes = [], 2
+        chunk.append(row)
+        chunk_bytes += row_bytes
+        chunk_keys = keys
+    if chunk:
+        yield chunk
+
+
+def bulk_write(table: str,
+               rows: List[Dict],
+               on_conflict: str = None,
+               client: SupabaseClient = None,
+               max_rows: int = None,
+               max_bytes: int = None) -> int:
+    """
+    Insert rows in chunks, or upsert them when on_conflict names the key columns
+
+    Chunks are sent in order and writing stops at the first failure, so the
+    return value is the length of the prefix of rows that was written.
+    """
+    return _write_chunks(table, rows, on_conflict, client or supabase_client, max_rows, max_bytes)[0]
+
+
+def bulk_write_status(table: str,
+                      rows: List[Dict],
+                      on_conflict: str = None,
+                      client: SupabaseClient = None,
+                      max_rows: int = None,
+                      max_bytes: int = None) -> Tuple[int, Optional[int]]:
+    """
+    bulk_write, also returning why it stopped
+
+    Returns (rows written, status): status is the HTTP status of the chunk that
+    failed, or None when every row was written or the failure had no response
+    (connection error, timeout, Supabase unavailable).
+    """
+    written, _, status = _write_chunks(table, rows, on_conflict, client or supabase_client, max_rows, max_bytes)
+    return written, status
+
+
+def write_isolating(table: str,
+                    rows: List[Dict],
+                    on_conflict: str = None,
+                    client: SupabaseClient = None,
+                    max_rows: int = None,
+                    max_bytes: int = None) -> Tuple[int, int, List[int], List[Tuple[int, Optional[int]]]]:
+    """
+    bulk_write that keeps one bad row from holding up the rest
+
+    A chunk rejected with a non-retryable status (a 4xx other than 408/429) is
+    halved until the rejected rows are on their own; the others are written.
+    After a retryable failure nothing more is sent.
+
+    Returns:
+        (rows written, requests sent, indexes of rows to retry later,
+         [(index, HTTP status)] of rows Supabase rejected)
+    """
+    retry, rejected = [], []
+    written, requests_sent = _write_isolating(table, rows, list(range(len(rows))), on_conflict,
+                                              client or supabase_client, max_rows, max_bytes, retry, rejected)
+    return written, requests_sent, retry, rejected
+
+
+def _write_isolating(table, rows, indexes, on_conflict, client, max_rows, max_bytes, retry, rejected) -> Tuple[int, int]:
+    written, requests_sent, status = _write_chunks(table, [rows[index] for index in indexes], on_conflict,
+                                                   client, max_rows, max_bytes)
+    rest = indexes[written:]
+    if not rest:
+        return written, requests_sent
+    if retryable_status(status):
+        retry += rest
+    elif len(rest) == 1:
+        rejected.append((rest[0], status))
+    else:
+        middle = len(rest) // 2
+        for half in (rest[:middle], rest[middle:]):
+            if retry:
+                retry += half
+                continue
+            half_written, half_requests = _write_isolating(table, rows, half, on_conflict, client,
+                                                           max_rows, max_bytes, retry, rejected)
+            written += half_written
+            requests_sent += half_requests
+    return written, requests_sent
+
+
+def retryable_status(status: Optional[int]) -> bool:
+    """Whether a failed write may succeed if sent again: no response, 408, 429 or 5xx"""
+    return status is None or status in (408, 429) or status >= 500
+
+
+def _write_chunks(table, rows, on_conflict, client, max_rows, max_bytes) -> Tuple[int, int, Optional[int]]:
+    """bulk_write returning (rows written, requests sent, status of the failed chunk)"""
+    if not rows:
+        return 0, 0, None
+    if not client.available:
+        print(f"⚠️  Supabase not available - bulk write of {len(rows)} {table} rows skipped")
+        return 0, 0, None
+
+    prefer = 'return=minimal'
+    endpoint = table
+    if on_conflict:
+        prefer = 'resolution=merge-duplicates,return=minimal'
+        endpoint = f'{table}?on_conflict={on_conflict}'
+    headers = {**client.headers, 'Prefer': prefer}
+
+    written = requests_sent = 0
+    status = None
+    for chunk in chunk_rows(rows, max_rows, max_bytes):
+        requests_sent += 1
+        try:
+            response = client.post(endpoint, data=chunk, headers=headers)
+            response.raise_for_status()
+        except Exception as e:
+            status = getattr(getattr(e, 'response', None), 'status_code', None)
+            print(f"⚠️  Bulk write to {table} failed after {written}/{len(rows)} rows: {e}")
+            break
+        written += len(chunk)
+    return written, requests_sent, status
+
+
+class BulkWriter:
+    """Per-table write buffers flushed in the background as chunked bulk requests"""
+
+    def __init__(self,
+                 client: SupabaseClient = None,
+                 flush_interval: float = None,
+                 max_pending: int = None,
+                 max_rows: int = None,
+                 max_bytes: int = None):
+        self.client = client or supabase_client
+        self.flush_interval = flush_interval or float(os.getenv('BULK_FLUSH_INTERVAL', '1'))
+        self.max_pending = max_pending or int(os.getenv('BULK_MAX_PENDING', '50000'))
+        self.max_rows = max_rows or DEFAULT_MAX_ROWS
+        self.max_bytes = max_bytes or DEFAULT_MAX_BYTES
+
+        self._buffers: Dict[Tuple[str, Optional[str]], deque] = {}  # (table, on_conflict) -> rows
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+        self.stats = {'rows_added': 0, 'rows_written': 0, 'requests': 0, 'dropped': 0, 'rejected': 0, 'errors': 0}
+
+    def start(self):
+        """Start the flusher thread for this process (idempotent, fork-aware)"""
+        pid = os.getpid()
+        if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='bulk-writer', daemon=True)
+            self._thread_pid = pid
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def add(self, table: str, row: Dict, on_conflict: str = None):
+        """Queue one row for the next bulk write to table"""
+        if not self.client.available:
+            print(f"⚠️  Supabase not available - {table} write skipped")
+            return
+        self.start()
+        with self._lock:
+            buffer = self._buffers.setdefault((table, on_conflict), deque())
+            buffer.append(row)
+            self._pending += 1
+            self.stats['rows_added'] += 1
+            if self._pending > self.max_pending:
+                # Supabase has been failing for a while; shed the oldest rows of this table
+                buffer.popleft()
+                self._pending -= 1
+                self.stats['dropped'] += 1
+            full = len(buffer) >= self.max_rows
+
+        if full:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        return self._pending
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️  Bulk writer flush error: {e}")
+
+    def flush(self) -> int:
+        """
+        Write everything buffered
+
+        Rows that fail with a retryable status stay queued for the next flush;
+        rows Supabase rejects are dropped with a log line.
+        """
+        written_total = 0
+        with self._flush_lock:
+            with self._lock:
+                batches = [(key, list(buffer)) for key, buffer in self._buffers.items() if buffer]
+                for key, rows in batches:
+                    self._buffers[key].clear()
+                    self._pending -= len(rows)
+
+            for (table, on_conflict), rows in batches:
+                written, requests_sent, retry, rejected = write_isolating(table, rows, on_conflict, self.client,
+                                                                          self.max_rows, self.max_bytes)
+                written_total += written
+                for index, status in rejected:
+                    print(f"⚠️  Supabase rejected a {table} row (HTTP {status}), dropped: {rows[index]}")
+                with self._lock:
+                    self.stats['rows_written'] += written
+                    self.stats['requests'] += requests_sent
+                    self.stats['rejected'] += len(rejected)
+                    if retry:
+                        self.stats['errors'] += 1
+                        # Put the unwritten rows back ahead of anything added meanwhile
+                        self._buffers[(table, on_conflict)].extendleft(rows[index] for index in reversed(retry))
+                        self._pending += len(retry)
+        return written_total
+
+
+# Global buffer for small writes (activity logs); main starts it, add() starts it lazily
+bulk_writer = BulkWriter()
+atexit.register(bulk_writer.flush)
@@ -0,0 +1,272 @@
+"""
+Call Status Reconciler
+Periodically gathers call_logs rows that are still in a non-terminal status,
+asks Bolna for their status with bounded parallelism and hands changes to the
+call status writer, which upserts each batch in one request. Young calls are
+polled often and older ones progressively less, so a call that has been
+ringing for an hour does not cost as much as one placed a minute ago.
+
+Before polling, a worker claims each due call by moving its
+metadata.last_status_check forward with a compare-and-set PATCH, so when
+several workers run the reconciler only the one whose claim lands asks Bolna.
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from call_status_writer import CallStatusWriter, call_status_writer, parse_bolna_event, is_terminal_status
+from campaign_scheduler import LIVE_CALL_STATUSES, campaign_scheduler
+from supabase_client import supabase_request
+
+# (max call age in seconds, polling interval as a multiple of the base interval)
+POLL_SCHEDULE = ((120, 1), (600, 3), (3600, 12))
+OLD_CALL_MULTIPLIER = 60
+
+# _fetch result when another worker claimed the call first
+_CLAIMED_ELSEWHERE = object()
+
+
+def _parse_timestamp(value) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class CallStatusReconciler:
+    """Background poller for in-flight calls that the status webhook has not settled"""
+
+    def __init__(self,
+                 writer: CallStatusWriter = None,
+                 base_interval: float = None,
+                 max_workers: int = None,
+                 max_age: float = None,
+                 max_rows: int = None):
+        self.writer = writer or call_status_writer
+        self.base_interval = base_interval or float(os.getenv('CALL_RECONCILE_INTERVAL', '10'))
+        self.max_workers = max_workers or int(os.getenv('CALL_RECONCILE_CONCURRENCY', '8'))
+        self.max_age = max_age or float(os.getenv('CALL_RECONCILE_MAX_AGE', '21600'))
+        self.max_rows = max_rows or int(os.getenv('CALL_RECONCILE_MAX_ROWS', '1000'))
+
+        self._last_polled: Dict[str, float] = {}  # bolna_call_id -> epoch of last Bolna answer
+        self._executor = None
+        self._executor_pid = None
+        self._bolna_api = None
+        self._thread = None
+        self._thread_pid = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.stats = {
+            'ticks': 0, 'in_flight_seen': 0, 'api_calls': 0, 'status_changes': 0,
+            'skipped_not_due': 0, 'skipped_pending': 0, 'skipped_claimed': 0, 'errors': 0,
+            'fixed_rate_polls': 0, 'dashboard_reads': 0, 'dashboard_live_reads': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the reconciler thread for this process (idempotent, fork-aware)"""
+        pid = os.getpid()
+        with self._lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='call-status-reconciler', daemon=True)
+            self._thread_pid = pid
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.reconcile()
+            except Exception as e:
+                print(f"⚠️ Call status reconciler error: {e}")
+            self._wakeup.wait(self.base_interval)
+            self._wakeup.clear()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='call-status-poll')
+            self._executor_pid = pid
+        return self._executor
+
+    def _bolna(self):
+        if self._bolna_api is None:
+            from bolna_integration import BolnaAPI
+            self._bolna_api = BolnaAPI()
+        return self._bolna_api
+
+    # ------------------------------------------------------------------
+    # Polling
+    # ------------------------------------------------------------------
+
+    def poll_interval(self, age_seconds: float) -> float:
+        """Seconds between status checks for a call of this age"""
+        for max_age, multiplier in POLL_SCHEDULE:
+            if age_seconds < max_age:
+                return self.base_interval * multiplier
+        return self.base_interval * OLD_CALL_MULTIPLIER
+
+    def seconds_since_poll(self, bolna_call_id: str) -> float:
+        """Seconds since the reconciler last heard from Bolna about a call"""
+        polled_at = self._last_polled.get(bolna_call_id)
+        return time.time() - polled_at if polled_at else float('inf')
+
+    def _in_flight_rows(self) -> List[Dict]:
+        since = datetime.now(timezone.utc) - timedelta(seconds=self.max_age)
+        return supabase_request('GET', 'call_logs', params={
+            'status': f'in.({",".join(LIVE_CALL_STATUSES)})',
+            'created_at': f'gte.{since.isoformat()}',
+            'select': '*',
+            'order': 'created_at.desc',
+            'limit': str(self.max_rows)
+        }) or []
+
+    def _due_rows(self, rows: List[Dict], now: float) -> List[Dict]:
+        due = []
+        skipped_not_due = skipped_pending = 0
+        for row in rows:
+            metadata = row.get('metadata') or {}
+            call_id = metadata.get('bolna_call_id')
+            if not call_id:
+                continue
+            if self.writer.pending_event(call_id):
+                # A webhook or live check already has a newer answer
+                skipped_pending += 1
+                continue
+
+            created_at = _parse_timestamp(row.get('created_at')) or now
+            last_checked = max(self._last_polled.get(call_id, 0),
+                               _parse_timestamp(metadata.get('last_status_check')) or created_at)
+            if now - last_checked >= self.poll_interval(now - created_at):
+                due.append(row)
+            else:
+                skipped_not_due += 1
+
+        with self._lock:
+            self.stats['skipped_not_due'] += skipped_not_due
+            self.stats['skipped_pending'] += skipped_pending
+        return due
+
+    def _claim(self, row: Dict) -> Optional[Dict]:
+        """Stamp last_status_check if no other worker moved it since we read the row"""
+        metadata = row.get('metadata') or {}
+        previous = metadata.get('last_status_check')
+        claimed = supabase_request('PATCH', 'call_logs', data={
+            'metadata': {**metadata, 'last_status_check': datetime.now(timezone.utc).isoformat()}
+        }, params={
+            'id': f'eq.{row["id"]}',
+            'metadata->>last_status_check': f'eq.{previous}' if previous else 'is.null'
+        })
+        return claimed[0] if claimed else None
+
+    def _fetch(self, row: Dict):
+        claimed = self._claim(row)
+        if claimed is None:
+            return row, _CLAIMED_ELSEWHERE
+        row = claimed
+        call_id = row['metadata']['bolna_call_id']
+        try:
+            return row, self._bolna_api.get_call_status(call_id)
+        except Exception as e:
+            return row, e
+
+    def reconcile(self) -> int:
+        """One pass over in-flight calls; returns the number of status changes queued"""
+        now = time.time()
+        rows = self._in_flight_rows()
+        live_ids = {(row.get('metadata') or {}).get('bolna_call_id') for row in rows}
+        due = self._due_rows(rows, now)
+
+        with self._lock:
+            self.stats['ticks'] += 1
+            self.stats['in_flight_seen'] += len(rows)
+            # A fixed-rate poller would check every in-flight call on every tick
+            self.stats['fixed_rate_polls'] += len(rows)
+            for call_id in [c for c in self._last_polled if c not in live_ids]:
+                del self._last_polled[call_id]
+
+        changes = 0
+        if due:
+            self._bolna()
+        for offset in range(0, len(due), self.writer.batch_size):
+            batch = due[offset:offset + self.writer.batch_size]
+            for row, response in self.executor.map(self._fetch, batch):
+                call_id = row['metadata']['bolna_call_id']
+                if response is _CLAIMED_ELSEWHERE:
+                    with self._lock:
+                        self.stats['skipped_claimed'] += 1
+                    continue
+                with self._lock:
+                    self.stats['api_calls'] += 1
+                if isinstance(response, Exception) or not isinstance(response, dict):
+                    with self._lock:
+                        self.stats['errors'] += 1
+                    continue
+
+                self._last_polled[call_id] = time.time()
+                status = (response.get('status') or '').lower()
+                if not status or status == (row.get('status') or '').lower():
+                    continue
+
+                event = parse_bolna_event({**response, 'call_id': call_id, 'status': status})
+                event['source'] = 'reconciler'
+                event['call_log'] = row
+                self.writer.submit(event)
+                changes += 1
+                if is_terminal_status(status):
+                    campaign_scheduler.release_call(call_id)
+
+            # One bulk upsert per batch
+            self.writer.flush()
+
+        with self._lock:
+            self.stats['status_changes'] += changes
+        return changes
+
+    # ------------------------------------------------------------------
+    # Accounting
+    # ------------------------------------------------------------------
+
+    def record_dashboard_read(self, live: bool):
+        """Count a status route request; before stored reads, each one called Bolna"""
+        with self._lock:
+            self.stats['dashboard_reads'] += 1
+            if live:
+                self.stats['dashboard_live_reads'] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        # Dashboard-driven polling made one Bolna call per status request
+        stats['api_calls_saved_vs_dashboard'] = (
+            stats['dashboard_reads'] - stats['dashboard_live_reads'] - stats['api_calls']
+        )
+        stats['api_calls_saved_vs_fixed_rate'] = stats['fixed_rate_polls'] - stats['api_calls']
+        stats['tracked_calls'] = len(self._last_polled)
+        return stats
+
+
+# Global reconciler; main starts it alongside the call status writer
+call_status_reconciler = CallStatusReconciler()
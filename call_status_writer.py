@@ -0,0 +1,230 @@
+"""
+Call Status Writer
+Write-behind queue for Bolna call status events. Events are coalesced per
+call (latest wins) and flushed to call_logs in batches: one lookup of the
+affected rows by metadata->>bolna_call_id and one chunked merge-duplicates upsert.
+An event whose call_logs row doesn't exist yet (campaign rows are written in
+batches) stays queued for up to CALL_STATUS_UNMATCHED_TTL seconds.
+"""
+
+import os
+import time
+import atexit
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from bulk_writer import write_isolating
+from usage_counters import usage_counters
+from supabase_client import SupabaseClient, supabase_client, supabase_request
+
+# Bolna statuses after which a call no longer changes or holds a line
+TERMINAL_CALL_STATUSES = {
+    'completed', 'call-disconnected', 'busy', 'no-answer', 'failed',
+    'canceled', 'cancelled', 'stopped', 'error', 'balance-low'
+}
+
+
+def is_terminal_status(status: Optional[str]) -> bool:
+    return (status or '').lower() in TERMINAL_CALL_STATUSES
+
+
+def parse_bolna_event(payload: Dict) -> Optional[Dict]:
+    """Normalise a Bolna execution/status callback into a status event"""
+    if not isinstance(payload, dict):
+        return None
+
+    call_id = payload.get('call_id') or payload.get('execution_id') or payload.get('id')
+    status = payload.get('status') or payload.get('call_status')
+    if not call_id or not status:
+        return None
+
+    telephony = payload.get('telephony_data') or {}
+    duration = (payload.get('duration') or payload.get('conversation_duration')
+                or telephony.get('duration'))
+
+    return {
+        'bolna_call_id': str(call_id),
+        'status': str(status).lower(),
+        'duration': duration,
+        'recording_url': telephony.get('recording_url') or payload.get('recording_url'),
+        'received_at': datetime.now(timezone.utc).isoformat(),
+        'payload': payload
+    }
+
+
+class CallStatusWriter:
+    """Coalescing write-behind buffer of call status events, flushed to call_logs in batches"""
+
+    def __init__(self, batch_size: int = None, flush_interval: float = None, max_pending: int = None,
+                 unmatched_ttl: float = None, client: SupabaseClient = None):
+        self.client = client or supabase_client
+        self.batch_size = batch_size or int(os.getenv('CALL_STATUS_BATCH_SIZE', '100'))
+        self.flush_interval = flush_interval or float(os.getenv('CALL_STATUS_FLUSH_INTERVAL', '1'))
+        self.max_pending = max_pending or int(os.getenv('CALL_STATUS_MAX_PENDING', '10000'))
+        # How long an event waits for its call_logs row to be written before it is dropped
+        self.unmatched_ttl = unmatched_ttl or float(os.getenv('CALL_STATUS_UNMATCHED_TTL', '300'))
+
+        self._pending: Dict[str, Dict] = {}  # bolna_call_id -> latest event
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+        self.stats = {'events': 0, 'coalesced': 0, 'flushes': 0, 'rows_written': 0, 'unmatched': 0,
+                      'unmatched_dropped': 0, 'rejected': 0, 'errors': 0}
+
+    def start(self):
+        """Start the flusher thread for this process (idempotent, fork-aware)"""
+        pid = os.getpid()
+        with self._lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='call-status-writer', daemon=True)
+            self._thread_pid = pid
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def submit(self, event: Dict):
+        """Queue a status event; a newer event for the same call replaces an unflushed one"""
+        with self._lock:
+            self.stats['events'] += 1
+            if event['bolna_call_id'] in self._pending:
+                self.stats['coalesced'] += 1
+            self._pending[event['bolna_call_id']] = event
+            backlog = len(self._pending)
+
+        if backlog >= self.batch_size:
+            self._wakeup.set()
+        if backlog >= self.max_pending:
+            # Flusher is falling behind: write from the caller rather than grow without bound
+            self.flush()
+
+    def pending_event(self, bolna_call_id: str) -> Optional[Dict]:
+        """Latest event for a call that has not been written yet"""
+        with self._lock:
+            return self._pending.get(bolna_call_id)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Call status flush error: {e}")
+
+    def flush(self) -> int:
+        """Write the events pending now; returns call_logs rows updated
+
+        Events requeued by this flush (unmatched, or a retryable write failure)
+        wait for the next one.
+        """
+        written = 0
+        with self._flush_lock:
+            with self._lock:
+                queued = list(self._pending)
+            for start in range(0, len(queued), self.batch_size):
+                with self._lock:
+                    events = [self._pending.pop(call_id) for call_id in queued[start:start + self.batch_size]
+                              if call_id in self._pending]
+                if events:
+                    written += self._write_batch(events)
+        return written
+
+    def _requeue(self, events: List[Dict]):
+        with self._lock:
+            for event in events:
+                # Keep any newer event that arrived meanwhile
+                self._pending.setdefault(event['bolna_call_id'], event)
+
+    def _write_batch(self, events: List[Dict]) -> int:
+        by_call_id = {event['bolna_call_id']: event for event in events}
+        # Events from the reconciler carry the row they were read from; look up the rest
+        rows = [event['call_log'] for event in events if event.get('call_log')]
+        missing = [call_id for call_id, event in by_call_id.items() if not event.get('call_log')]
+        if missing:
+            id_filter = ','.join(f'"{call_id}"' for call_id in missing)
+            rows += supabase_request('GET', 'call_logs', params={
+                'metadata->>bolna_call_id': f'in.({id_filter})',
+                'select': '*'
+            }) or []
+
+        updates, previous_statuses = [], []
+        for row in rows:
+            metadata = row.get('metadata') or {}
+            event = by_call_id.get(metadata.get('bolna_call_id'))
+            if not event:
+                continue
+            updates.append({
+                **row,
+                'status': event['status'],
+                'duration': event['duration'] if event['duration'] is not None else row.get('duration'),
+                'metadata': {
+                    **metadata,
+                    'bolna_status_response': event['payload'],
+                    'recording_url': event['recording_url'] or metadata.get('recording_url'),
+                    'last_status_check': event['received_at'],
+                    'status_source': event.get('source', 'webhook')
+                }
+            })
+            previous_statuses.append(row.get('status'))
+
+        matched = {update['metadata']['bolna_call_id'] for update in updates}
+        unmatched = [event for call_id, event in by_call_id.items() if call_id not in matched]
+        now = time.time()
+        waiting = []
+        for event in unmatched:
+            # The call_logs row may not be written yet (campaign rows go out in batches)
+            event.setdefault('unmatched_since', now)
+            if now - event['unmatched_since'] < self.unmatched_ttl:
+                waiting.append(event)
+        with self._lock:
+            self.stats['flushes'] += 1
+            self.stats['unmatched'] += len(unmatched)
+            self.stats['unmatched_dropped'] += len(unmatched) - len(waiting)
+        self._requeue(waiting)
+        if not updates:
+            return 0
+
+        written, _, retry, rejected = write_isolating('call_logs', updates, on_conflict='id', client=self.client)
+        if retry:
+            print(f"⚠️ Failed to write {len(retry)} call status updates, requeueing")
+            self._requeue([by_call_id[updates[index]['metadata']['bolna_call_id']] for index in retry])
+        for index, status in rejected:
+            print(f"⚠️ Supabase rejected the status update for call {updates[index]['metadata']['bolna_call_id']} "
+                  f"(HTTP {status}), dropped")
+        failed = set(retry) | {index for index, _ in rejected}
+        with self._lock:
+            if retry:
+                self.stats['errors'] += 1
+            self.stats['rejected'] += len(rejected)
+
+        # Count talk time once, when a call first reaches a terminal status
+        for index, (update, previous) in enumerate(zip(updates, previous_statuses)):
+            if index in failed:
+                continue
+            if is_terminal_status(update['status']) and not is_terminal_status(previous):
+                user_id = update['metadata'].get('initiated_by_user_id') or update.get('user_id')
+                try:
+                    seconds = float(update.get('duration') or 0)
+                except (TypeError, ValueError):
+                    seconds = 0
+                usage_counters.record(user_id, voice_seconds=seconds)
+
+        with self._lock:
+            self.stats['rows_written'] += written
+        return written
+
+
+# Global instance fed by the Bolna status webhook and live status checks
+call_status_writer = CallStatusWriter()
+atexit.register(call_status_writer.flush)
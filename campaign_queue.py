@@ -0,0 +1,429 @@
+"""
+Campaign Job Queue
+Durable SQLite-backed store for bulk-call campaigns. Requests enqueue a
+campaign (optionally scheduled for later and limited to a calling window) and
+return immediately; the campaign scheduler claims due campaigns under a lease,
+records each call result locally as it completes and writes call_logs to
+Supabase in batches. Campaigns left running by a dead worker are picked up
+again once their lease expires, without re-dialing finished calls.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from bulk_writer import bulk_write
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def build_call_log(result: Dict, campaign_id: str = None) -> Dict:
+    """call_logs row for a dispatcher result"""
+    config = result['original_config']
+    metadata = config.get('metadata', {})
+
+    return {
+        'id': str(uuid.uuid4()),
+        'voice_agent_id': metadata.get('voice_agent_id'),
+        'contact_id': metadata.get('contact_id'),
+        'phone_number': config['recipient_phone'],
+        'status': 'initiated' if result.get('success') else 'failed',
+        'organization_id': metadata.get('organization_id'),
+        'enterprise_id': metadata.get('enterprise_id'),
+        'metadata': {
+            'bolna_call_id': result.get('call_id') if result.get('success') else None,
+            'bolna_agent_id': config['agent_id'],
+            'sender_phone': config.get('sender_phone'),
+            'variables': config.get('variables', {}),
+            'campaign_id': campaign_id,
+            'campaign_name': metadata.get('campaign_name'),
+            'initiated_by_user_id': metadata.get('initiated_by_user_id'),
+            'error': result.get('error') if not result.get('success') else None
+        }
+    }
+
+
+class CampaignQueue:
+    """SQLite campaign store: enqueue, lease, per-call results and batched call_logs"""
+
+    # Columns added after the first release of the queue (migrated in place)
+    SCHEDULE_COLUMNS = {
+        'scheduled_at': 'REAL',
+        'window_start': 'TEXT',
+        'window_end': 'TEXT',
+        'window_timezone': 'TEXT'
+    }
+
+    def __init__(self,
+                 db_path: str = None,
+                 batch_size: int = None,
+                 lease_seconds: float = None,
+                 max_log_attempts: int = None):
+        self.db_path = db_path or os.getenv('CAMPAIGN_QUEUE_DB', 'campaign_queue.db')
+        self.batch_size = batch_size or int(os.getenv('CAMPAIGN_LOG_BATCH_SIZE', '50'))
+        self.lease_seconds = lease_seconds or float(os.getenv('CAMPAIGN_LEASE_SECONDS', '120'))
+        self.max_log_attempts = max_log_attempts or int(os.getenv('CAMPAIGN_MAX_LOG_ATTEMPTS', '5'))
+
+        self._instance = uuid.uuid4().hex[:8]
+        # Set by the scheduler so new campaigns are picked up without waiting for a poll
+        self.on_enqueue: Optional[Callable[[], None]] = None
+        # Schema is created on first use, so importing the module never touches the filesystem
+        self._db_ready = False
+        self._db_lock = threading.Lock()
+
+    @property
+    def worker_id(self) -> str:
+        """Lease owner id; differs per forked gunicorn worker"""
+        return f"{os.uname().nodename}:{os.getpid()}:{self._instance}"
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._db_ready:
+            self._init_db()
+        return self._open()
+
+    def _init_db(self):
+        with self._db_lock:
+            if self._db_ready:
+                return
+            conn = self._open()
+            try:
+                self._create_schema(conn)
+            finally:
+                conn.close()
+            self._db_ready = True
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS campaigns (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                agent_id TEXT,
+                enterprise_id TEXT,
+                user_id TEXT,
+                status TEXT NOT NULL DEFAULT 'queued',
+                total INTEGER NOT NULL DEFAULT 0,
+                dispatched INTEGER NOT NULL DEFAULT 0,
+                succeeded INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                logs_written INTEGER NOT NULL DEFAULT 0,
+                log_attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires_at REAL,
+                error TEXT,
+                created_at TEXT,
+                started_at TEXT,
+                completed_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS campaign_calls (
+                campaign_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                call_config TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                result TEXT,
+                log_written INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (campaign_id, seq)
+            );
+            CREATE INDEX IF NOT EXISTS idx_campaigns_status ON campaigns (status, created_at);
+            CREATE INDEX IF NOT EXISTS idx_campaign_calls_pending ON campaign_calls (campaign_id, status, log_written);
+        ''')
+        existing = {row['name'] for row in conn.execute('PRAGMA table_info(campaigns)')}
+        for column, column_type in self.SCHEDULE_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f'ALTER TABLE campaigns ADD COLUMN {column} {column_type}')
+
+    # ------------------------------------------------------------------
+    # Producer side (request threads)
+    # ------------------------------------------------------------------
+
+    def enqueue(self,
+                call_configs: List[Dict],
+                agent_id: str = None,
+                name: str = None,
+                enterprise_id: str = None,
+                user_id: str = None,
+                scheduled_at: float = None,
+                calling_window: Dict = None) -> str:
+        """
+        Persist a campaign and its calls; returns the campaign id
+
+        Args:
+            scheduled_at: Epoch seconds before which no call is placed (default: now)
+            calling_window: Optional {'start': 'HH:MM', 'end': 'HH:MM', 'timezone': 'Area/City'}
+        """
+        campaign_id = str(uuid.uuid4())
+        window = calling_window or {}
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('''
+                INSERT INTO campaigns (id, name, agent_id, enterprise_id, user_id, status, total, created_at,
+                                       scheduled_at, window_start, window_end, window_timezone)
+                VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?, ?, ?)
+            ''', (campaign_id, name, agent_id, enterprise_id, user_id, len(call_configs), _utcnow(),
+                  scheduled_at or time.time(), window.get('start'), window.get('end'), window.get('timezone')))
+            conn.executemany(
+                'INSERT INTO campaign_calls (campaign_id, seq, call_config) VALUES (?, ?, ?)',
+                [(campaign_id, seq, json.dumps(config)) for seq, config in enumerate(call_configs)]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+        if self.on_enqueue:
+            self.on_enqueue()
+        return campaign_id
+
+    def get_campaign(self, campaign_id: str) -> Optional[Dict]:
+        """Progress counters for a campaign, or None if unknown"""
+        conn = self._connect()
+        row = conn.execute('SELECT * FROM campaigns WHERE id = ?', (campaign_id,)).fetchone()
+        conn.close()
+        if not row:
+            return None
+
+        calls_per_minute = None
+        if row['started_at'] and row['dispatched']:
+            end = datetime.fromisoformat(row['completed_at']) if row['completed_at'] else datetime.now(timezone.utc)
+            minutes = (end - datetime.fromisoformat(row['started_at'])).total_seconds() / 60.0
+            if minutes > 0:
+                calls_per_minute = round(row['dispatched'] / minutes, 2)
+
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'agent_id': row['agent_id'],
+            'enterprise_id': row['enterprise_id'],
+            'user_id': row['user_id'],
+            'status': row['status'],
+            'scheduled_at': datetime.fromtimestamp(row['scheduled_at'], timezone.utc).isoformat()
+            if row['scheduled_at'] else None,
+            'calling_window': {
+                'start': row['window_start'],
+                'end': row['window_end'],
+                'timezone': row['window_timezone']
+            } if row['window_start'] and row['window_end'] else None,
+            'progress': {
+                'total': row['total'],
+                'dispatched': row['dispatched'],
+                'pending': row['total'] - row['dispatched'],
+                'successful_calls': row['succeeded'],
+                'failed_calls': row['failed'],
+                'call_logs_written': row['logs_written'],
+                'calls_per_minute': calls_per_minute
+            },
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'completed_at': row['completed_at']
+        }
+
+    # ------------------------------------------------------------------
+    # Worker side (campaign scheduler)
+    # ------------------------------------------------------------------
+
+    def claim_due(self, now: float = None, limit: int = 20) -> List[sqlite3.Row]:
+        """Lease campaigns that are due, or whose previous worker's lease expired"""
+        now = now or time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute('''
+                SELECT * FROM campaigns
+                WHERE (status = 'queued' AND COALESCE(scheduled_at, 0) <= ?)
+                   OR (status = 'running' AND lease_expires_at < ?)
+                ORDER BY COALESCE(scheduled_at, 0), created_at LIMIT ?
+            ''', (now, now, limit)).fetchall()
+            for row in rows:
+                conn.execute('''
+                    UPDATE campaigns
+                    SET status = 'running', lease_owner = ?, lease_expires_at = ?,
+                        started_at = COALESCE(started_at, ?)
+                    WHERE id = ?
+                ''', (self.worker_id, now + self.lease_seconds, _utcnow(), row['id']))
+            conn.execute('COMMIT')
+            return rows
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def campaign_row(self, campaign_id: str) -> Optional[sqlite3.Row]:
+        conn = self._connect()
+        row = conn.execute('SELECT * FROM campaigns WHERE id = ?', (campaign_id,)).fetchone()
+        conn.close()
+        return row
+
+    def next_due_at(self) -> Optional[float]:
+        """Earliest scheduled_at among queued campaigns"""
+        conn = self._connect()
+        row = conn.execute("SELECT MIN(COALESCE(scheduled_at, 0)) FROM campaigns WHERE status = 'queued'").fetchone()
+        conn.close()
+        return row[0]
+
+    def renew_lease(self, campaign_id: str):
+        conn = self._connect()
+        self._renew_lease(conn, campaign_id)
+        conn.close()
+
+    def _renew_lease(self, conn: sqlite3.Connection, campaign_id: str):
+        conn.execute('UPDATE campaigns SET lease_expires_at = ? WHERE id = ? AND lease_owner = ?',
+                     (time.time() + self.lease_seconds, campaign_id, self.worker_id))
+
+    def release(self, campaign_id: str, run_at: float):
+        """Give a campaign back to the queue until run_at (e.g. calling window closed)"""
+        conn = self._connect()
+        conn.execute('''
+            UPDATE campaigns
+            SET status = 'queued', scheduled_at = ?, lease_owner = NULL, lease_expires_at = NULL
+            WHERE id = ? AND lease_owner = ?
+        ''', (run_at, campaign_id, self.worker_id))
+        conn.close()
+
+    def pending_calls(self, campaign_id: str, limit: int) -> List[Dict]:
+        """Next undialed calls of a campaign as call configs tagged with '_seq'"""
+        conn = self._connect()
+        rows = conn.execute('''
+            SELECT seq, call_config FROM campaign_calls
+            WHERE campaign_id = ? AND status = 'pending' ORDER BY seq LIMIT ?
+        ''', (campaign_id, limit)).fetchall()
+        conn.close()
+        return [{**json.loads(row['call_config']), '_seq': row['seq']} for row in rows]
+
+    def record_result(self, campaign_id: str, seq: int, result: Dict):
+        """Persist one call result immediately so a restart never re-dials it"""
+        success = bool(result.get('success'))
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('''
+                UPDATE campaign_calls SET status = 'done', result = ?
+                WHERE campaign_id = ? AND seq = ?
+            ''', (json.dumps(result, default=str), campaign_id, seq))
+            conn.execute('''
+                UPDATE campaigns
+                SET dispatched = dispatched + 1, succeeded = succeeded + ?, failed = failed + ?
+                WHERE id = ?
+            ''', (1 if success else 0, 0 if success else 1, campaign_id))
+            self._renew_lease(conn, campaign_id)
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+    def unflushed_count(self, campaign_id: str) -> int:
+        conn = self._connect()
+        count = conn.execute('''
+            SELECT COUNT(*) FROM campaign_calls WHERE campaign_id = ? AND status = 'done' AND log_written = 0
+        ''', (campaign_id,)).fetchone()[0]
+        conn.close()
+        return count
+
+    def flush_call_logs(self, campaign_id: str) -> int:
+        """Write recorded results to call_logs in batches; returns rows written"""
+        written = 0
+        conn = self._connect()
+        try:
+            while True:
+                rows = conn.execute('''
+                    SELECT seq, result FROM campaign_calls
+                    WHERE campaign_id = ? AND status = 'done' AND log_written = 0
+                    ORDER BY seq LIMIT ?
+                ''', (campaign_id, self.batch_size)).fetchall()
+                if not rows:
+                    return written
+
+                call_logs = [build_call_log(json.loads(row['result']), campaign_id) for row in rows]
+                inserted = bulk_write('call_logs', call_logs)
+                failed = inserted < len(call_logs)
+                if failed:
+                    print(f"⚠️ Campaign {campaign_id}: failed to write {len(call_logs) - inserted} call logs, will retry")
+                    # Mark the prefix that did get written so it is not inserted twice
+                    rows = rows[:inserted]
+                    if not rows:
+                        return written
+
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany('UPDATE campaign_calls SET log_written = 1 WHERE campaign_id = ? AND seq = ?',
+                                 [(campaign_id, row['seq']) for row in rows])
+                conn.execute('UPDATE campaigns SET logs_written = logs_written + ? WHERE id = ?',
+                             (len(rows), campaign_id))
+                self._renew_lease(conn, campaign_id)
+                conn.execute('COMMIT')
+                written += len(rows)
+                if failed:
+                    return written
+        finally:
+            conn.close()
+
+    def complete_or_retry(self, campaign_id: str) -> bool:
+        """
+        Finish a campaign whose calls have all been placed
+
+        Returns:
+            True if the campaign finished, False if call logs are still
+            unwritten and it was left for a later retry
+        """
+        conn = self._connect()
+        try:
+            campaign = conn.execute('SELECT * FROM campaigns WHERE id = ?', (campaign_id,)).fetchone()
+            unwritten = conn.execute('''
+                SELECT COUNT(*) FROM campaign_calls WHERE campaign_id = ? AND log_written = 0
+            ''', (campaign_id,)).fetchone()[0]
+
+            if unwritten == 0:
+                self._finish(conn, campaign_id, 'completed')
+            elif campaign['log_attempts'] + 1 >= self.max_log_attempts:
+                self._finish(conn, campaign_id, 'completed', f'{unwritten} call logs could not be written')
+            else:
+                # Keep it running; another pass picks it up when the lease lapses
+                conn.execute('UPDATE campaigns SET log_attempts = log_attempts + 1 WHERE id = ?', (campaign_id,))
+                return False
+        finally:
+            conn.close()
+
+        if campaign['user_id']:
+            from trial_middleware import log_trial_activity
+
+            progress = self.get_campaign(campaign_id)['progress']
+            log_trial_activity(campaign['user_id'], 'bulk_calls_initiated', {
+                'campaign_id': campaign_id,
+                'voice_agent_id': campaign['agent_id'],
+                'total_calls': progress['total'],
+                'successful_calls': progress['successful_calls'],
+                'failed_calls': progress['failed_calls'],
+                'campaign_name': campaign['name']
+            })
+        return True
+
+    def fail(self, campaign_id: str, error: str):
+        conn = self._connect()
+        self._finish(conn, campaign_id, 'failed', error)
+        conn.close()
+
+    def _finish(self, conn: sqlite3.Connection, campaign_id: str, status: str, error: str = None):
+        conn.execute('''
+            UPDATE campaigns
+            SET status = ?, error = ?, completed_at = ?, lease_owner = NULL, lease_expires_at = NULL
+            WHERE id = ?
+        ''', (status, error, _utcnow(), campaign_id))
+        print(f"📞 Campaign {campaign_id} {status}" + (f": {error}" if error else ""))
+
+
+# Global instance used by the bulk-call routes, the scheduler and the status endpoint
+campaign_queue = CampaignQueue()
@@ -0,0 +1,443 @@
+"""
+Campaign Scheduler
+Paces queued campaigns from a time-ordered priority queue so outbound calls
+stay inside each campaign's local calling window and never exceed the live
+call quota per sender number (voice_agents.calling_number) or per enterprise.
+
+A dispatched call holds its sender and enterprise slots until its status
+becomes terminal (release_call) or CAMPAIGN_CALL_SLOT_SECONDS pass; calls that
+fail to start release them immediately. Live calls already in call_logs are
+counted when an enterprise is first seen, so a restart does not overshoot.
+
+Bolna requests run on a bounded dispatch pool (CAMPAIGN_DISPATCH_WORKERS);
+the scheduler thread hands calls over and goes straight back to the heap, and
+each completion records its result and puts its campaign back on the heap.
+"""
+
+import os
+import time
+import heapq
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from bolna_dispatcher import BolnaDispatcher
+from campaign_queue import CampaignQueue, campaign_queue
+from supabase_client import supabase_request
+
+# call_logs statuses that still occupy a provider line
+LIVE_CALL_STATUSES = ('initiated', 'queued', 'ringing', 'in-progress')
+
+
+class CallingWindow:
+    """Daily local-time window ('09:00'-'21:00' in a timezone) in which calls may be placed"""
+
+    def __init__(self, start: str, end: str, tz: str = None):
+        self.start = datetime.strptime(start, '%H:%M').time()
+        self.end = datetime.strptime(end, '%H:%M').time()
+        self.tz = ZoneInfo(tz or os.getenv('CAMPAIGN_DEFAULT_TIMEZONE', 'Asia/Kolkata'))
+
+    def is_open(self, now: float) -> bool:
+        local = datetime.fromtimestamp(now, self.tz).time()
+        if self.start <= self.end:
+            return self.start <= local < self.end
+        # Window spanning midnight, e.g. 20:00-02:00
+        return local >= self.start or local < self.end
+
+    def next_open(self, now: float) -> float:
+        """Epoch seconds at which the window next opens (now if already open)"""
+        if self.is_open(now):
+            return now
+        local = datetime.fromtimestamp(now, self.tz)
+        candidate = local.replace(hour=self.start.hour, minute=self.start.minute, second=0, microsecond=0)
+        if candidate <= local:
+            candidate += timedelta(days=1)
+        return candidate.timestamp()
+
+    @classmethod
+    def from_campaign(cls, campaign) -> Optional['CallingWindow']:
+        if not campaign['window_start'] or not campaign['window_end']:
+            return None
+        return cls(campaign['window_start'], campaign['window_end'], campaign['window_timezone'])
+
+
+class LiveCallTracker:
+    """
+    Counts live calls per sender number and per enterprise against concurrency quotas.
+
+    Counts live in this process only, so quotas hold for a single gunicorn
+    worker; gunicorn.conf.py refuses to start more while the campaign worker is on.
+    """
+
+    def __init__(self, sender_limit: int, enterprise_limit: int, slot_seconds: float):
+        self.sender_limit = sender_limit
+        self.enterprise_limit = enterprise_limit
+        self.slot_seconds = slot_seconds
+        self._senders: Dict[str, int] = {}
+        self._enterprises: Dict[str, int] = {}
+        self._slots: Dict[int, Tuple[str, str, float]] = {}  # slot -> (sender, enterprise, expires_at)
+        self._by_call_id: Dict[str, int] = {}
+        self._expiry: List[Tuple[float, int]] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.peak_sender = 0
+        self.peak_enterprise = 0
+
+    def _expire(self, now: float):
+        while self._expiry and self._expiry[0][0] <= now:
+            _, slot = heapq.heappop(self._expiry)
+            self._drop(slot)
+
+    def _drop(self, slot: int):
+        entry = self._slots.pop(slot, None)
+        if entry:
+            sender, enterprise, _ = entry
+            self._senders[sender] -= 1
+            self._enterprises[enterprise] -= 1
+
+    def try_acquire(self, sender: str, enterprise: str, now: float = None) -> Optional[int]:
+        """Reserve a slot for a call, or None if either quota is full"""
+        now = now or time.time()
+        with self._lock:
+            self._expire(now)
+            if self._senders.get(sender, 0) >= self.sender_limit:
+                return None
+            if self._enterprises.get(enterprise, 0) >= self.enterprise_limit:
+                return None
+            return self._hold(sender, enterprise, now + self.slot_seconds)
+
+    def _hold(self, sender: str, enterprise: str, expires_at: float) -> int:
+        slot = next(self._ids)
+        self._slots[slot] = (sender, enterprise, expires_at)
+        self._senders[sender] = self._senders.get(sender, 0) + 1
+        self._enterprises[enterprise] = self._enterprises.get(enterprise, 0) + 1
+        heapq.heappush(self._expiry, (expires_at, slot))
+        self.peak_sender = max(self.peak_sender, self._senders[sender])
+        self.peak_enterprise = max(self.peak_enterprise, self._enterprises[enterprise])
+        return slot
+
+    def bind(self, slot: int, call_id: str):
+        """Associate a started call with its slot so its status callback can free it"""
+        if call_id:
+            with self._lock:
+                if slot in self._slots:
+                    self._by_call_id[call_id] = slot
+
+    def release(self, slot: int):
+        with self._lock:
+            self._drop(slot)
+
+    def release_call(self, call_id: str) -> bool:
+        """Free the slot of a call that reached a terminal status"""
+        with self._lock:
+            slot = self._by_call_id.pop(call_id, None)
+            if slot is None:
+                return False
+            self._drop(slot)
+            return True
+
+    def seed(self, sender: str, enterprise: str, started_at: float, call_id: str = None):
+        """Count a call that was already live before this process started"""
+        expires_at = started_at + self.slot_seconds
+        if expires_at <= time.time():
+            return
+        with self._lock:
+            slot = self._hold(sender, enterprise, expires_at)
+            if call_id:
+                self._by_call_id[call_id] = slot
+
+    def next_release_at(self) -> Optional[float]:
+        with self._lock:
+            return self._expiry[0][0] if self._expiry else None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._expire(time.time())
+            return {
+                'live_calls': len(self._slots),
+                'by_sender': {k: v for k, v in self._senders.items() if v},
+                'by_enterprise': {k: v for k, v in self._enterprises.items() if v},
+                'sender_limit': self.sender_limit,
+                'enterprise_limit': self.enterprise_limit,
+                'peak_sender': self.peak_sender,
+                'peak_enterprise': self.peak_enterprise
+            }
+
+
+class CampaignScheduler:
+    """Background worker that paces due campaigns from a time-ordered heap"""
+
+    def __init__(self,
+                 queue: CampaignQueue = None,
+                 sender_limit: int = None,
+                 enterprise_limit: int = None,
+                 slot_seconds: float = None,
+                 poll_interval: float = None,
+                 dispatch_workers: int = None):
+        self.queue = queue or campaign_queue
+        self.poll_interval = poll_interval or float(os.getenv('CAMPAIGN_POLL_INTERVAL', '2'))
+        self.dispatch_workers = dispatch_workers or int(os.getenv('CAMPAIGN_DISPATCH_WORKERS', '32'))
+        self.tracker = LiveCallTracker(
+            sender_limit=sender_limit or int(os.getenv('CAMPAIGN_SENDER_CONCURRENCY', '5')),
+            enterprise_limit=enterprise_limit or int(os.getenv('CAMPAIGN_ENTERPRISE_CONCURRENCY', '20')),
+            slot_seconds=slot_seconds or float(os.getenv('CAMPAIGN_CALL_SLOT_SECONDS', '180'))
+        )
+
+        self._heap: List[Tuple[float, int, str]] = []  # (ready_at, tiebreak, campaign_id)
+        self._scheduled = set()
+        self._order = itertools.count()
+        self._seeded_enterprises = set()
+        self._dispatch_times = deque(maxlen=10000)
+        self._dispatched_total = 0
+        self._started_at = None
+
+        # Calls handed to the dispatch pool: one permit per call being placed
+        self._dispatch_slots = threading.BoundedSemaphore(self.dispatch_workers)
+        self._dispatch_pool = None
+        self._dispatcher = None
+        self._in_flight: Dict[str, set] = {}  # campaign_id -> seqs being placed
+        self._ready = deque()  # campaigns whose calls completed, re-queued by the scheduler thread
+
+        self._thread = None
+        self._thread_pid = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.queue.on_enqueue = self.wake
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the scheduler thread for this process (idempotent, fork-aware)"""
+        pid = os.getpid()
+        with self._lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._started_at = time.time()
+            self._dispatch_pool = ThreadPoolExecutor(max_workers=self.dispatch_workers,
+                                                     thread_name_prefix='campaign-dispatch')
+            self._thread = threading.Thread(target=self._run, name='campaign-scheduler', daemon=True)
+            self._thread_pid = pid
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._dispatch_pool is not None:
+            self._dispatch_pool.shutdown(wait=False)
+
+    def wake(self):
+        self._wakeup.set()
+
+    def _push(self, ready_at: float, campaign_id: str):
+        heapq.heappush(self._heap, (ready_at, next(self._order), campaign_id))
+        self._scheduled.add(campaign_id)
+
+    def _run(self):
+        print(f"📞 Campaign scheduler {self.queue.worker_id} started")
+        while not self._stop.is_set():
+            try:
+                now = time.time()
+                while self._ready:
+                    campaign_id = self._ready.popleft()
+                    if campaign_id not in self._scheduled:
+                        self._push(now, campaign_id)
+                for campaign in self.queue.claim_due(now):
+                    if campaign['id'] not in self._scheduled:
+                        self._push(now, campaign['id'])
+
+                if self._heap and self._heap[0][0] <= now:
+                    _, _, campaign_id = heapq.heappop(self._heap)
+                    self._scheduled.discard(campaign_id)
+                    self._step(campaign_id)
+                    continue
+
+                timeout = self._next_wakeup(now)
+            except Exception as e:
+                print(f"⚠️ Campaign scheduler error: {e}")
+                timeout = self.poll_interval
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def _next_wakeup(self, now: float) -> float:
+        candidates = [now + self.poll_interval]
+        if self._heap:
+            candidates.append(self._heap[0][0])
+        next_due = self.queue.next_due_at()
+        if next_due is not None:
+            candidates.append(next_due)
+        return max(0.0, min(candidates) - now)
+
+    # ------------------------------------------------------------------
+    # Pacing
+    # ------------------------------------------------------------------
+
+    def _seed_enterprise(self, enterprise_id: str):
+        """Count calls from call_logs that are still live for this enterprise"""
+        if enterprise_id in self._seeded_enterprises:
+            return
+        self._seeded_enterprises.add(enterprise_id)
+
+        since = datetime.now(timezone.utc) - timedelta(seconds=self.tracker.slot_seconds)
+        rows = supabase_request('GET', 'call_logs', params={
+            'enterprise_id': f'eq.{enterprise_id}',
+            'status': f'in.({",".join(LIVE_CALL_STATUSES)})',
+            'created_at': f'gte.{since.isoformat()}',
+            'select': 'created_at,metadata'
+        }) or []
+        for row in rows:
+            metadata = row.get('metadata') or {}
+            try:
+                started_at = datetime.fromisoformat(row['created_at'].replace('Z', '+00:00')).timestamp()
+            except (KeyError, AttributeError, ValueError):
+                continue
+            self.tracker.seed(metadata.get('sender_phone') or '', enterprise_id, started_at,
+                              metadata.get('bolna_call_id'))
+
+    def _bolna(self):
+        if getattr(self, '_bolna_api', None) is None:
+            from bolna_integration import BolnaAPI
+            self._bolna_api = BolnaAPI()
+        return self._bolna_api
+
+    def _in_flight_count(self, campaign_id: str) -> int:
+        with self._lock:
+            return len(self._in_flight.get(campaign_id, ()))
+
+    def _step(self, campaign_id: str):
+        """Place as many calls of one campaign as its window and the quotas allow right now"""
+        campaign = self.queue.campaign_row(campaign_id)
+        if not campaign or campaign['status'] != 'running' or campaign['lease_owner'] != self.queue.worker_id:
+            return
+
+        now = time.time()
+        in_flight = self._in_flight_count(campaign_id)
+        if self.queue.unflushed_count(campaign_id) >= self.queue.batch_size:
+            self.queue.flush_call_logs(campaign_id)
+
+        window = CallingWindow.from_campaign(campaign)
+        if window and not window.is_open(now):
+            if in_flight:
+                # The last completion puts the campaign back; release it then
+                return
+            run_at = window.next_open(now)
+            self.queue.flush_call_logs(campaign_id)
+            self.queue.release(campaign_id, run_at)
+            print(f"📞 Campaign {campaign_id} outside calling window, resuming at "
+                  f"{datetime.fromtimestamp(run_at, window.tz).isoformat()}")
+            return
+
+        enterprise_id = campaign['enterprise_id'] or ''
+        if campaign['enterprise_id']:
+            self._seed_enterprise(enterprise_id)
+
+        # Calls still being placed are 'pending' in the queue until their result lands
+        with self._lock:
+            placing = set(self._in_flight.get(campaign_id, ()))
+        pending = [call_config for call_config in
+                   self.queue.pending_calls(campaign_id, limit=self.tracker.enterprise_limit + len(placing))
+                   if call_config['_seq'] not in placing]
+        if not pending:
+            if not placing:
+                self.queue.flush_call_logs(campaign_id)
+                self.queue.complete_or_retry(campaign_id)
+            return
+
+        try:
+            bolna_api = self._bolna()
+        except ValueError as e:
+            self.queue.fail(campaign_id, f'Bolna API configuration error: {e}')
+            return
+        if self._dispatcher is None:
+            # One dispatcher for every campaign: retries/backoff, shared per-sender rate limit
+            self._dispatcher = BolnaDispatcher(bolna_api, max_concurrency=self.dispatch_workers)
+
+        # Admit calls in order while both quotas and the dispatch pool have room
+        admitted = 0
+        for call_config in pending:
+            if not self._dispatch_slots.acquire(blocking=False):
+                break
+            sender = call_config.get('sender_phone') or bolna_api.default_sender_phone
+            slot = self.tracker.try_acquire(sender, enterprise_id, now)
+            if slot is None:
+                self._dispatch_slots.release()
+                continue
+            with self._lock:
+                self._in_flight.setdefault(campaign_id, set()).add(call_config['_seq'])
+            future = self._dispatch_pool.submit(self._dispatcher.start_call, call_config)
+            future.add_done_callback(
+                lambda done, call_config=call_config, slot=slot: self._on_dispatched(campaign_id, call_config, slot, done))
+            admitted += 1
+
+        if not admitted and not placing:
+            # Every line (or the dispatch pool) is busy: come back when the first slot frees up
+            self.queue.renew_lease(campaign_id)
+            self._push(min(self.tracker.next_release_at() or now + self.poll_interval,
+                           now + self.poll_interval), campaign_id)
+
+    def _on_dispatched(self, campaign_id: str, call_config: Dict, slot: int, future):
+        """Dispatch pool callback: bind or free the quota slot, record the result, re-queue the campaign"""
+        try:
+            result = future.result()
+            if result.get('success'):
+                self.tracker.bind(slot, result.get('call_id'))
+            else:
+                # The call never went live
+                self.tracker.release(slot)
+            self.queue.record_result(campaign_id, call_config['_seq'], result)
+            self._note_dispatch()
+        except Exception as e:
+            self.tracker.release(slot)
+            print(f"⚠️ Campaign {campaign_id} call {call_config['_seq']} result not recorded: {e}")
+        finally:
+            with self._lock:
+                placing = self._in_flight.get(campaign_id)
+                if placing is not None:
+                    placing.discard(call_config['_seq'])
+                    if not placing:
+                        del self._in_flight[campaign_id]
+            self._dispatch_slots.release()
+            self._ready.append(campaign_id)
+            self.wake()
+
+    def _note_dispatch(self):
+        with self._lock:
+            self._dispatch_times.append(time.time())
+            self._dispatched_total += 1
+
+    def release_call(self, call_id: str) -> bool:
+        """Free the quota slot of a call that reached a terminal status"""
+        released = self.tracker.release_call(call_id)
+        if released:
+            self.wake()
+        return released
+
+    def stats(self) -> Dict:
+        """Achieved calls/minute (last minute and since start) plus live-call quota usage"""
+        now = time.time()
+        with self._lock:
+            last_minute = sum(1 for t in self._dispatch_times if t >= now - 60)
+            total = self._dispatched_total
+            in_flight = sum(len(seqs) for seqs in self._in_flight.values())
+        elapsed_minutes = (now - self._started_at) / 60.0 if self._started_at else 0
+        return {
+            'calls_last_minute': last_minute,
+            'calls_per_minute': round(total / elapsed_minutes, 2) if elapsed_minutes else 0.0,
+            'calls_dispatched': total,
+            'campaigns_in_queue': len(self._heap),
+            'calls_in_flight': in_flight,
+            'quotas': self.tracker.stats()
+        }
+
+
+# Global scheduler; main starts it and status callbacks release slots through it
+campaign_scheduler = CampaignScheduler()
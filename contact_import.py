@@ -0,0 +1,354 @@
+"""
+Contact Import
+Bulk CSV/XLSX contact import for a voice agent. The upload is parsed as a
+stream (csv reader / XLSX sheet iterparse), phones are normalised to E.164 a
+chunk at a time, each chunk is deduplicated against existing contacts with a
+single `phone=in.(...)` query and written with one batched upsert. Jobs run in
+the background; their progress lives in SQLite so any gunicorn worker can
+report it by job id.
+"""
+
+import io
+import os
+import re
+import csv
+import json
+import time
+import uuid
+import sqlite3
+import zipfile
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bulk_writer import bulk_write
+from phone_normalizer import phone_normalizer
+from supabase_client import supabase_client
+
+IMPORT_CHUNK_SIZE = int(os.getenv('CONTACT_IMPORT_CHUNK_SIZE', '250'))
+IMPORT_FORMATS = ('csv', 'xlsx')
+
+# Header spellings accepted for each contact field
+HEADER_ALIASES = {
+    'name': ('name', 'full name', 'contact name', 'contact'),
+    'phone': ('phone', 'phone number', 'mobile', 'mobile number', 'number', 'phone_number'),
+    'status': ('status',)
+}
+CONTACT_STATUSES = ('active', 'inactive')
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _header_map(headers: List[str]) -> Dict[int, str]:
+    """column index -> contact field for the recognised headers"""
+    mapping = {}
+    for index, header in enumerate(headers):
+        label = str(header or '').strip().lower()
+        for field, aliases in HEADER_ALIASES.items():
+            if label in aliases and field not in mapping.values():
+                mapping[index] = field
+    return mapping
+
+
+def _records(rows: Iterator[Tuple[int, List]]) -> Iterator[Tuple[int, Dict]]:
+    """(source line, dict of contact fields) from a header row followed by data rows"""
+    mapping = None
+    for line, row in rows:
+        if mapping is None:
+            mapping = _header_map(row)
+            if 'phone' not in mapping.values():
+                raise ValueError('File must have a phone column')
+            continue
+        if not any(str(cell or '').strip() for cell in row):
+            continue
+        yield line, {field: row[index] if index < len(row) else None for index, field in mapping.items()}
+
+
+def _numbered_csv_rows(reader) -> Iterator[Tuple[int, List]]:
+    # A quoted field may span lines: a row starts on the line after the previous row ended
+    previous_end = 0
+    for row in reader:
+        yield previous_end + 1, row
+        previous_end = reader.line_num
+
+
+def iter_csv(stream) -> Iterator[Tuple[int, Dict]]:
+    """(line, record) pairs from a binary CSV stream (BOM tolerated)"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+    return _records(_numbered_csv_rows(csv.reader(text)))
+
+
+_CELL_REF = re.compile(r'([A-Z]+)')
+_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+
+def _column_index(ref: str) -> int:
+    index = 0
+    for letter in _CELL_REF.match(ref).group(1):
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def _cell_text(value: str) -> str:
+    # Phone columns typed as numbers come back as 919876543210 or 9.1987654321E11
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        return value
+    return str(int(number)) if number == number.to_integral_value() else value
+
+
+def iter_xlsx(path: str) -> Iterator[Tuple[int, Dict]]:
+    """(row number, record) pairs from the first worksheet of an XLSX file, parsed row by row"""
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        shared = []
+        if 'xl/sharedStrings.xml' in names:
+            with archive.open('xl/sharedStrings.xml') as handle:
+                for _, element in ET.iterparse(handle):
+                    if element.tag == f'{_NS}si':
+                        shared.append(''.join(node.text or '' for node in element.iter(f'{_NS}t')))
+                        element.clear()
+
+        sheets = sorted(name for name in names if re.match(r'xl/worksheets/sheet\d+\.xml$', name))
+        if not sheets:
+            raise ValueError('Workbook has no worksheets')
+
+        def rows():
+            number = 0
+            with archive.open(sheets[0]) as handle:
+                for _, element in ET.iterparse(handle):
+                    if element.tag != f'{_NS}row':
+                        continue
+                    # Rows with no cells are left out of the XML; r keeps the sheet's numbering
+                    number = int(element.get('r') or number + 1)
+                    cells = []
+                    for cell in element.iter(f'{_NS}c'):
+                        kind = cell.get('t')
+                        if kind == 'inlineStr':
+                            text = ''.join(node.text or '' for node in cell.iter(f'{_NS}t'))
+                        else:
+                            value = cell.find(f'{_NS}v')
+                            text = value.text if value is not None and value.text is not None else ''
+                            if kind == 's' and text:
+                                text = shared[int(text)]
+                            elif kind is None and text:
+                                text = _cell_text(text)
+                        index = _column_index(cell.get('r')) if cell.get('r') else len(cells)
+                        cells.extend([''] * (index - len(cells)))
+                        cells.append(text)
+                    element.clear()
+                    yield number, cells
+
+        yield from _records(rows())
+
+
+def iter_contacts(path: str, file_format: str) -> Iterator[Tuple[int, Dict]]:
+    if file_format == 'xlsx':
+        return iter_xlsx(path)
+
+    def from_csv():
+        with open(path, 'rb') as stream:
+            yield from iter_csv(stream)
+    return from_csv()
+
+
+class ImportJobStore:
+    """SQLite progress records for import jobs, shared by every worker on the host"""
+
+    COUNTERS = ('processed', 'inserted', 'updated', 'duplicates', 'invalid')
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.getenv('CONTACT_IMPORT_DB', 'contact_imports.db')
+        # Schema is created on first use, so importing the module never touches the filesystem
+        self._db_ready = False
+        self._db_lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._db_ready:
+            self._init_db()
+        return self._open()
+
+    def _init_db(self):
+        with self._db_lock:
+            if self._db_ready:
+                return
+            conn = self._open()
+            try:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS import_jobs (
+                        id TEXT PRIMARY KEY,
+                        enterprise_id TEXT,
+                        voice_agent_id TEXT,
+                        filename TEXT,
+                        status TEXT NOT NULL,
+                        processed INTEGER DEFAULT 0,
+                        inserted INTEGER DEFAULT 0,
+                        updated INTEGER DEFAULT 0,
+                        duplicates INTEGER DEFAULT 0,
+                        invalid INTEGER DEFAULT 0,
+                        errors TEXT DEFAULT '[]',
+                        error TEXT,
+                        created_at TEXT,
+                        updated_at TEXT
+                    )
+                ''')
+            finally:
+                conn.close()
+            self._db_ready = True
+
+    def create(self, enterprise_id: str, voice_agent_id: str, filename: str) -> str:
+        job_id = str(uuid.uuid4())
+        conn = self._connect()
+        try:
+            conn.execute('''
+                INSERT INTO import_jobs (id, enterprise_id, voice_agent_id, filename, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, 'queued', ?, ?)
+            ''', (job_id, enterprise_id, voice_agent_id, filename, _utcnow(), _utcnow()))
+        finally:
+            conn.close()
+        return job_id
+
+    def update(self, job_id: str, status: str = None, error: str = None, errors: List[Dict] = None, **counts):
+        """Add counts to the job's counters and optionally set its status/errors"""
+        assignments = [f'{name} = {name} + ?' for name in self.COUNTERS if name in counts]
+        values = [counts[name] for name in self.COUNTERS if name in counts]
+        for column, value in (('status', status), ('error', error),
+                              ('errors', json.dumps(errors) if errors is not None else None)):
+            if value is not None:
+                assignments.append(f'{column} = ?')
+                values.append(value)
+        conn = self._connect()
+        try:
+            conn.execute(f"UPDATE import_jobs SET {', '.join(assignments + ['updated_at = ?'])} WHERE id = ?",
+                         values + [_utcnow(), job_id])
+        finally:
+            conn.close()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT * FROM import_jobs WHERE id = ?', (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return None
+        job = dict(row)
+        job['errors'] = json.loads(job['errors'] or '[]')
+        return job
+
+
+class ContactImporter:
+    """Runs import jobs in a small background pool, one chunk of contacts at a time"""
+
+    MAX_REPORTED_ERRORS = 100
+
+    def __init__(self, store: ImportJobStore = None, chunk_size: int = None, max_workers: int = None, client=None):
+        self.store = store or ImportJobStore()
+        self.chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+        self.max_workers = max_workers or int(os.getenv('CONTACT_IMPORT_WORKERS', '2'))
+        self.client = client or supabase_client
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def submit(self, path: str, file_format: str, voice_agent_id: str, enterprise_id: str,
+               filename: str = None, update_existing: bool = False) -> str:
+        """Queue an import of the file at path (deleted when the job ends); returns the job id"""
+        job_id = self.store.create(enterprise_id, voice_agent_id, filename)
+        with self._lock:
+            # Created lazily so each forked worker gets its own pool
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='contact-import')
+                self._pid = os.getpid()
+            self._executor.submit(self.run, job_id, path, file_format, voice_agent_id, enterprise_id, update_existing)
+        return job_id
+
+    def run(self, job_id: str, path: str, file_format: str, voice_agent_id: str, enterprise_id: str,
+            update_existing: bool = False):
+        started = time.time()
+        errors = []
+        self.store.update(job_id, status='running')
+        try:
+            seen = set()
+            chunk = []
+            for line, record in iter_contacts(path, file_format):
+                chunk.append((line, record))
+                if len(chunk) >= self.chunk_size:
+                    self.import_chunk(job_id, chunk, voice_agent_id, enterprise_id, update_existing, seen, errors)
+                    chunk = []
+            if chunk:
+                self.import_chunk(job_id, chunk, voice_agent_id, enterprise_id, update_existing, seen, errors)
+            self.store.update(job_id, status='completed', errors=errors)
+            print(f"✅ Contact import {job_id} completed in {time.time() - started:.1f}s")
+        except Exception as e:
+            print(f"❌ Contact import {job_id} failed: {e}")
+            self.store.update(job_id, status='failed', error=str(e), errors=errors)
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def import_chunk(self, job_id: str, chunk: List, voice_agent_id: str, enterprise_id: str,
+                     update_existing: bool, seen: set, errors: List[Dict]):
+        """Normalise, dedupe and upsert one chunk of (line, record) pairs"""
+        phones = phone_normalizer.normalize_many([record.get('phone') for _, record in chunk])
+        contacts = {}
+        invalid = duplicates = 0
+        for (line, record), phone in zip(chunk, phones):
+            name = str(record.get('name') or '').strip()
+            status = str(record.get('status') or 'active').strip().lower()
+            problem = ('invalid phone number' if not phone else 'name is required' if not name
+                       else 'invalid status' if status not in CONTACT_STATUSES else None)
+            if problem:
+                invalid += 1
+                if len(errors) < self.MAX_REPORTED_ERRORS:
+                    errors.append({'line': line, 'phone': record.get('phone'), 'error': problem})
+                continue
+            if phone in seen or phone in contacts:
+                duplicates += 1
+                continue
+            contacts[phone] = {
+                'name': name[:255],
+                'phone': phone,
+                'status': status,
+                'voice_agent_id': voice_agent_id,
+                'enterprise_id': enterprise_id
+            }
+
+        existing = set()
+        if contacts:
+            response = self.client.get('contacts', params={
+                'select': 'phone',
+                'voice_agent_id': f'eq.{voice_agent_id}',
+                'phone': f"in.({','.join(contacts)})"
+            })
+            response.raise_for_status()
+            existing = {row['phone'] for row in response.json()}
+
+        rows = [row for phone, row in contacts.items() if update_existing or phone not in existing]
+        written = bulk_write('contacts', rows, on_conflict='phone,voice_agent_id', client=self.client)
+        if written < len(rows):
+            raise RuntimeError(f'wrote {written} of {len(rows)} contacts in chunk ending at line {chunk[-1][0]}')
+
+        seen.update(contacts)
+        updated = len(existing) if update_existing else 0
+        self.store.update(job_id, processed=len(chunk), inserted=len(contacts) - len(existing),
+                          updated=updated, duplicates=duplicates + (len(existing) - updated), invalid=invalid,
+                          errors=errors)
+
+
+# Global importer for /api/voice-agents/<agent_id>/contacts/import
+contact_importer = ContactImporter()
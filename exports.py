@@ -0,0 +1,89 @@
+"""
+Streaming Exports
+CSV / NDJSON exports that page through Supabase with keyset cursors and yield
+each page as soon as it is read, so an export of 200k call logs holds no more
+than one page (EXPORT_PAGE_SIZE rows) in memory at a time.
+"""
+
+import io
+import os
+import csv
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from pagination import fetch_page
+
+EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', '1000'))
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson'
+}
+
+CALL_LOG_SELECT = '*,contacts(name,phone),voice_agents(title)'
+CALL_LOG_COLUMNS = [
+    'id', 'created_at', 'status', 'duration', 'phone_number', 'contact_name', 'contact_phone',
+    'voice_agent_id', 'voice_agent_title', 'contact_id', 'enterprise_id', 'bolna_call_id',
+    'campaign_name', 'recording_url'
+]
+CONTACT_COLUMNS = ['id', 'created_at', 'name', 'phone', 'email', 'status', 'voice_agent_id', 'enterprise_id']
+
+
+def iter_table(table: str, params: Dict, page_size: int = None) -> Iterator[List[Dict]]:
+    """Yield successive keyset pages of table until the last one"""
+    cursor = None
+    while True:
+        rows, cursor = fetch_page(table, params, cursor, page_size or EXPORT_PAGE_SIZE)
+        if rows:
+            yield rows
+        if not cursor:
+            return
+
+
+def flatten_call_log(row: Dict) -> Dict:
+    """call_logs row with its embeds and common metadata pulled up into flat columns"""
+    contact = row.get('contacts') or {}
+    agent = row.get('voice_agents') or {}
+    metadata = row.get('metadata') or {}
+    return {
+        **{key: value for key, value in row.items() if key not in ('contacts', 'voice_agents')},
+        'contact_name': contact.get('name'),
+        'contact_phone': contact.get('phone'),
+        'voice_agent_title': agent.get('title'),
+        'bolna_call_id': metadata.get('bolna_call_id'),
+        'campaign_name': metadata.get('campaign_name'),
+        'recording_url': metadata.get('recording_url')
+    }
+
+
+def csv_chunks(pages: Iterable[List[Dict]], columns: List[str],
+               transform: Optional[Callable[[Dict], Dict]] = None) -> Iterator[str]:
+    """Header line, then one CSV chunk per page (unknown keys dropped, nested values as JSON)"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    for rows in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            row = transform(row) if transform else row
+            writer.writerow({
+                key: json.dumps(value) if isinstance(value, (dict, list)) else value
+                for key, value in row.items()
+            })
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(pages: Iterable[List[Dict]],
+                  transform: Optional[Callable[[Dict], Dict]] = None) -> Iterator[str]:
+    """One JSON document per line, one chunk per page"""
+    for rows in pages:
+        yield ''.join(json.dumps(transform(row) if transform else row, default=str) + '\n' for row in rows)
+
+
+def export_chunks(fmt: str, pages: Iterable[List[Dict]], columns: List[str],
+                  transform: Optional[Callable[[Dict], Dict]] = None) -> Iterator[str]:
+    if fmt == 'csv':
+        return csv_chunks(pages, columns, transform)
+    return ndjson_chunks(pages, transform)
@@ -0,0 +1,26 @@
+"""
+Gunicorn settings, loaded automatically from the working directory
+(Procfile, start.sh and `gunicorn main:app` all run from the repo root)
+"""
+import os
+
+# The campaign scheduler's LiveCallTracker keeps the per-sender and
+# per-enterprise concurrency quotas in process memory, so a second worker
+# would grant each enterprise its quota again. Keep one worker while the
+# campaign worker runs in the web process.
+workers = 1
+
+
+def on_starting(server):
+    """Refuse to boot several workers that would each enforce their own call quotas"""
+    if server.cfg.workers > 1 and os.getenv('CAMPAIGN_WORKER_ENABLED', 'true').lower() == 'true':
+        raise RuntimeError(
+            f"Campaign call quotas are per-process: run with --workers 1 "
+            f"(got {server.cfg.workers}) or set CAMPAIGN_WORKER_ENABLED=false"
+        )
+
+
+def post_worker_init(worker):
+    """Start the background flushers/schedulers once the worker has loaded main:app"""
+    from main import start_background_workers
+    start_background_workers()
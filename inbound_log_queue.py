@@ -0,0 +1,296 @@
+"""
+Inbound Log Queue
+Bounded write-behind queue for the call_logs/sms_logs rows written by the
+voice and SMS webhooks, so answering the carrier never waits on Supabase.
+Rows are flushed in batches as idempotent upserts keyed by id. When the
+in-memory queue is full, or a flush fails, rows spill to a local SQLite file
+instead of being dropped; spilled rows are replayed once Supabase accepts
+writes again, including after a restart. Rows still in memory at exit are
+spilled too. Only failures that may pass on a retry (no response, 429, 5xx)
+are spilled; rows Supabase rejects (other 4xx) are isolated and moved to a
+dead-letter table in the same file so they don't block the rows behind them.
+"""
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from bulk_writer import write_isolating
+from supabase_client import SupabaseClient, supabase_client
+
+
+class InboundLogQueue:
+    """Memory queue of (table, row) with a SQLite spill file, flushed in the background"""
+
+    def __init__(self,
+                 db_path: str = None,
+                 client: SupabaseClient = None,
+                 batch_size: int = None,
+                 flush_interval: float = None,
+                 max_pending: int = None):
+        self.db_path = db_path or os.getenv('INBOUND_LOG_SPILL_DB', 'inbound_log_spill.db')
+        self.client = client or supabase_client
+        self.batch_size = batch_size or int(os.getenv('INBOUND_LOG_BATCH_SIZE', '200'))
+        self.flush_interval = flush_interval or float(os.getenv('INBOUND_LOG_FLUSH_INTERVAL', '0.5'))
+        # Rows held in memory before submit() spills straight to disk
+        self.max_pending = max_pending or int(os.getenv('INBOUND_LOG_MAX_PENDING', '2000'))
+
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+        self.stats = {'submitted': 0, 'rows_written': 0, 'flushes': 0, 'spilled': 0, 'replayed': 0,
+                      'dead_lettered': 0, 'errors': 0}
+        # Spill file is created on first use, so importing the module never touches the filesystem
+        self._db_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._db_ready:
+            self._init_db()
+        return self._open()
+
+    def _init_db(self):
+        with self._schema_lock:
+            if self._db_ready:
+                return
+            conn = self._open()
+            try:
+                self._create_schema(conn)
+            finally:
+                conn.close()
+            self._db_ready = True
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS spilled_rows (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                row TEXT NOT NULL,
+                spilled_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS dead_letter_rows (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                row TEXT NOT NULL,
+                status INTEGER,
+                failed_at REAL NOT NULL
+            )
+        ''')
+
+    def start(self):
+        """Start the flusher thread for this process (idempotent, fork-aware)"""
+        pid = os.getpid()
+        with self._lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='inbound-log-queue', daemon=True)
+            self._thread_pid = pid
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.spill_pending()
+
+    def submit(self, table: str, row: Dict):
+        """Queue one row for table; never touches the network"""
+        if not self.client.available:
+            print(f"⚠️  Supabase not available - {table} write skipped")
+            return
+        with self._lock:
+            self.stats['submitted'] += 1
+            queued = len(self._queue) < self.max_pending
+            if queued:
+                self._queue.append((table, row))
+            backlog = len(self._queue)
+
+        if not queued:
+            # Backpressure: the flusher can't keep up (or Supabase is down), keep the row on disk
+            self._spill([(table, row)])
+        if not queued or backlog >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self) -> Dict:
+        return {'memory': len(self._queue), 'disk': self.spilled_count()}
+
+    def spilled_count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM spilled_rows').fetchone()[0]
+        finally:
+            conn.close()
+
+    def dead_letter_count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM dead_letter_rows').fetchone()[0]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _dead_letter_rows(conn: sqlite3.Connection, rejected: List[Tuple[str, Dict, Optional[int]]]):
+        now = time.time()
+        conn.executemany('INSERT INTO dead_letter_rows (table_name, row, status, failed_at) VALUES (?, ?, ?, ?)',
+                         [(table, json.dumps(row, default=str), status, now) for table, row, status in rejected])
+
+    def _dead_letter(self, rejected: List[Tuple[str, Dict, Optional[int]]]):
+        with self._db_lock:
+            conn = self._connect()
+            try:
+                conn.execute('BEGIN')
+                self._dead_letter_rows(conn, rejected)
+                conn.execute('COMMIT')
+            finally:
+                conn.close()
+        self._note_rejected(rejected)
+
+    def _note_rejected(self, rejected: List[Tuple[str, Dict, Optional[int]]]):
+        with self._lock:
+            self.stats['dead_lettered'] += len(rejected)
+        for table, row, status in rejected:
+            print(f"⚠️  Supabase rejected {table} row {row.get('id')} (HTTP {status}); moved to dead_letter_rows")
+
+    def _spill(self, items: List[Tuple[str, Dict]]):
+        now = time.time()
+        with self._db_lock:
+            conn = self._connect()
+            try:
+                conn.execute('BEGIN')
+                conn.executemany('INSERT INTO spilled_rows (table_name, row, spilled_at) VALUES (?, ?, ?)',
+                                 [(table, json.dumps(row, default=str), now) for table, row in items])
+                conn.execute('COMMIT')
+            finally:
+                conn.close()
+        with self._lock:
+            self.stats['spilled'] += len(items)
+
+    def spill_pending(self) -> int:
+        """Move everything still in memory to the spill file (shutdown path, no network)"""
+        with self._lock:
+            items = list(self._queue)
+            self._queue.clear()
+        if items:
+            self._spill(items)
+        return len(items)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️  Inbound log flush error: {e}")
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+    def _write(self, items: List[Tuple[str, Dict]]) -> Tuple[List[int], List[Tuple[int, Optional[int]]]]:
+        """
+        Upsert items grouped by table
+
+        Returns (retry, rejected): indexes of rows to try again later, and
+        (index, HTTP status) of rows Supabase refused.
+        """
+        by_table = {}
+        for index, (table, row) in enumerate(items):
+            by_table.setdefault(table, []).append(index)
+        retry, rejected = [], []
+        for table, indexes in by_table.items():
+            if retry:
+                # Supabase is failing; don't spend requests on the other tables
+                retry += indexes
+                continue
+            # Upsert on id so a batch retried after a partial write doesn't duplicate rows
+            written, _, table_retry, table_rejected = write_isolating(
+                table, [items[index][1] for index in indexes], on_conflict='id', client=self.client)
+            with self._lock:
+                self.stats['rows_written'] += written
+            retry += [indexes[index] for index in table_retry]
+            rejected += [(indexes[index], status) for index, status in table_rejected]
+        return retry, rejected
+
+    def flush(self) -> int:
+        """Write queued rows, then replay spilled ones; returns rows written"""
+        with self._flush_lock:
+            before = self.stats['rows_written']
+            while True:
+                with self._lock:
+                    batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                if not batch:
+                    break
+                retry, rejected = self._write(batch)
+                with self._lock:
+                    self.stats['flushes'] += 1
+                if rejected:
+                    self._dead_letter([(*batch[index], status) for index, status in rejected])
+                if retry:
+                    # Keep memory free for new webhooks; the rows wait on disk instead
+                    with self._lock:
+                        self.stats['errors'] += 1
+                    self._spill([batch[index] for index in retry])
+                    return self.stats['rows_written'] - before
+            self._replay()
+            return self.stats['rows_written'] - before
+
+    def _replay(self):
+        """Write spilled rows back in order, deleting each batch once Supabase has it or has rejected it"""
+        # Live rows go first: replay only while nothing new is waiting in memory
+        while not self._queue:
+            conn = self._connect()
+            try:
+                rows = conn.execute('SELECT seq, table_name, row FROM spilled_rows ORDER BY seq LIMIT ?',
+                                    (self.batch_size,)).fetchall()
+            finally:
+                conn.close()
+            if not rows:
+                return
+            items = [(table, json.loads(row)) for _, table, row in rows]
+            retry, rejected = self._write(items)
+            retry = set(retry)
+            done = [seq for index, (seq, _, _) in enumerate(rows) if index not in retry]
+            rejected = [(*items[index], status) for index, status in rejected]
+            if done:
+                with self._db_lock:
+                    conn = self._connect()
+                    try:
+                        # Dead-lettering and removal from the spill table happen together
+                        conn.execute('BEGIN')
+                        if rejected:
+                            self._dead_letter_rows(conn, rejected)
+                        conn.execute(f'DELETE FROM spilled_rows WHERE seq IN ({",".join("?" * len(done))})', done)
+                        conn.execute('COMMIT')
+                    finally:
+                        conn.close()
+                with self._lock:
+                    self.stats['replayed'] += len(done) - len(rejected)
+                if rejected:
+                    self._note_rejected(rejected)
+            if retry:
+                with self._lock:
+                    self.stats['errors'] += 1
+                return
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'pending': self.pending(), 'dead_letter': self.dead_letter_count()}
+
+
+# Global queue for the voice/SMS webhooks (flusher started by main, replays spilled rows on start)
+inbound_log_queue = InboundLogQueue()
+atexit.register(inbound_log_queue.spill_pending)
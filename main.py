@@ -3,18 +3,36 @@ from flask import Flask
 app = Flask(__name__)
 import os
 import sys
+import hmac
 import requests
 import json
 import uuid
+import tempfile
 from datetime import datetime, timezone, timedelta
-from flask import Flask, request, jsonify, send_from_directory, g, redirect
+from flask import Flask, request, jsonify, send_from_directory, g, redirect, Response, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
-from auth import auth_manager, login_required
+from auth import auth_manager, login_required, role_required
 from trial_middleware import check_trial_limits, log_trial_activity, get_trial_usage_summary
 from bolna_integration import BolnaAPI, get_agent_config_for_voice_agent
 from razorpay_integration import RazorpayIntegration, calculate_credits_from_amount, get_predefined_recharge_options
 from phone_provider_integration import phone_provider_manager
+from number_inventory import number_inventory
+from number_routing import number_routing
+from inbound_log_queue import inbound_log_queue
+from supabase_client import supabase_client, supabase_request
+from bulk_writer import bulk_writer
+from admin_stats import admin_stats
+from pagination import parse_page_args, fetch_page
+from phone_normalizer import phone_normalizer
+from contact_import import contact_importer, IMPORT_FORMATS
+from exports import (EXPORT_FORMATS, CALL_LOG_SELECT, CALL_LOG_COLUMNS, CONTACT_COLUMNS,
+                     iter_table, flatten_call_log, export_chunks)
+from user_context import get_user_context, invalidate_user_context
+from campaign_queue import campaign_queue
+from campaign_scheduler import campaign_scheduler, CallingWindow
+from call_status_writer import call_status_writer, parse_bolna_event, is_terminal_status
+from call_status_reconciler import call_status_reconciler
 from auth_routes import auth_bp
 from functools import wraps
 
@@ -62,42 +80,6 @@ except Exception as e:
     print(f"⚠️  WARNING: Supabase initialization failed: {e}")
     print("   App will run in limited mode.")
 
-def supabase_request(method, endpoint, data=None, params=None):
-    """Make a request to Supabase REST API with graceful error handling"""
-    # Check if Supabase is available
-    if not SUPABASE_AVAILABLE:
-        print(f"⚠️  Supabase not available - {method} request to {endpoint} skipped")
-        return [] if method == 'GET' else None
-    
-    url = f"{SUPABASE_URL}/rest/v1/{endpoint}"
-    
-    try:
-        if method == 'GET':
-            response = requests.get(url, headers=SUPABASE_HEADERS, params=params)
-        elif method == 'POST':
-            response = requests.post(url, headers=SUPABASE_HEADERS, json=data)
-        elif method == 'PUT':
-            response = requests.put(url, headers=SUPABASE_HEADERS, json=data)
-        elif method == 'PATCH':
-            response = requests.patch(url, headers=SUPABASE_HEADERS, json=data)
-        elif method == 'DELETE':
-            response = requests.delete(url, headers=SUPABASE_HEADERS)
-        else:
-            raise ValueError(f"Unsupported HTTP method: {method}")
-        
-        response.raise_for_status()
-        return response.json() if response.content else None
-    
-    except requests.exceptions.RequestException as e:
-        print(f"⚠️  Supabase API error ({method} {endpoint}): {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"   Response content: {e.response.text}")
-        # Return empty data instead of raising exception
-        return [] if method == 'GET' else None
-    except Exception as e:
-        print(f"⚠️  Unexpected error in supabase_request: {e}")
-        return [] if method == 'GET' else None
-
 def load_enterprise_context():
     """Load enterprise context for the authenticated user"""
     if not hasattr(g, 'user_id') or not g.user_id:
@@ -109,12 +91,11 @@ def load_enterprise_context():
             print("⚠️  Enterprise context loading skipped - Supabase not available")
             return None
             
-        # Get user's enterprise_id
-        user = supabase_request('GET', f'users?id=eq.{g.user_id}&select=enterprise_id,role')
-        if not user or len(user) == 0:
+        # Get user's enterprise_id (memoized per request, TTL-cached per worker)
+        user_data = get_user_context(g.user_id)
+        if not user_data:
             return None
         
-        user_data = user[0]
         enterprise_id = user_data.get('enterprise_id')
         
         if not enterprise_id:
@@ -314,11 +295,10 @@ def get_trial_status():
     try:
         user_id = g.user_id
 
-        # Get user from Supabase
-        users = supabase_request('GET', 'users', params={'id': f'eq.{user_id}'})
+        # Get user context (cached)
+        user = get_user_context(user_id)
 
-        if users and len(users) > 0:
-            user = users[0]
+        if user:
             trial_status = check_trial_status(user)
 
             return jsonify(trial_status)
@@ -466,12 +446,10 @@ def update_enterprise(enterprise_id):
         data = request.json
 
         # Check if user has permission to update enterprises
-        user = supabase_request('GET', f'users?id=eq.{user_id}&select=role,enterprise_id')
-        if not user or len(user) == 0:
+        user_data = get_user_context(user_id)
+        if not user_data:
             return jsonify({'message': 'User not found'}), 404
 
-        user_data = user[0]
-
         # Check permissions: super_admin/admin can update any, users can only update their own
         if user_data.get('role') not in ['super_admin', 'admin']:
             if user_data.get('enterprise_id') != enterprise_id:
@@ -487,6 +465,7 @@ def update_enterprise(enterprise_id):
             update_data['status'] = data['status']
 
         updated_enterprise = supabase_request('PATCH', f'enterprises?id=eq.{enterprise_id}', data=update_data)
+        invalidate_user_context(enterprise_id=enterprise_id)
 
         return jsonify({'enterprise': updated_enterprise[0] if updated_enterprise else None}), 200
 
@@ -524,15 +503,56 @@ def get_agent_contacts(agent_id):
         if not agent or len(agent) == 0:
             return jsonify({'message': 'Voice agent not found or access denied'}), 404
 
-        # Get contacts for the agent (with enterprise filtering for extra security)
-        contacts = supabase_request('GET', f'contacts?voice_agent_id=eq.{agent_id}&enterprise_id=eq.{enterprise_id}&order=created_at.desc')
+        try:
+            cursor, limit = parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
 
-        return jsonify({'contacts': contacts}), 200
+        # Get one page of contacts for the agent (with enterprise filtering for extra security)
+        contacts, next_cursor = fetch_page('contacts', {
+            'voice_agent_id': f'eq.{agent_id}',
+            'enterprise_id': f'eq.{enterprise_id}'
+        }, cursor, limit)
+
+        return jsonify({'contacts': contacts, 'next_cursor': next_cursor}), 200
 
     except Exception as e:
         print(f"Get agent contacts error: {e}")
         return jsonify({'message': 'Failed to get contacts'}), 500
 
+def _export_response(fmt, filename, chunks):
+    """Chunked attachment response; rows are read from Supabase page by page as the client downloads"""
+    response = Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the whole export
+    return response
+
+@app.route('/api/voice-agents/<agent_id>/contacts/export', methods=['GET'])
+@login_required
+@require_enterprise_context
+def export_agent_contacts(agent_id):
+    """Stream every contact of a voice agent as CSV (default) or NDJSON"""
+    try:
+        enterprise_id = g.enterprise_id
+        fmt = request.args.get('format', 'csv').lower()
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'message': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+        agent = supabase_request('GET', f'voice_agents?id=eq.{agent_id}&enterprise_id=eq.{enterprise_id}')
+        if not agent or len(agent) == 0:
+            return jsonify({'message': 'Voice agent not found or access denied'}), 404
+
+        pages = iter_table('contacts', {
+            'voice_agent_id': f'eq.{agent_id}',
+            'enterprise_id': f'eq.{enterprise_id}'
+        })
+        return _export_response(fmt, f'contacts-{agent_id}', export_chunks(fmt, pages, CONTACT_COLUMNS))
+
+    except Exception as e:
+        print(f"Export contacts error: {e}")
+        return jsonify({'message': 'Failed to export contacts'}), 500
+
 @app.route('/api/voice-agents/<agent_id>/contacts', methods=['POST'])
 @login_required
 @require_enterprise_context
@@ -551,15 +571,23 @@ def create_contact(agent_id):
         if not agent or len(agent) == 0:
             return jsonify({'message': 'Voice agent not found or access denied'}), 404
 
+        phone = phone_normalizer.normalize(data['phone'])
+        if not phone:
+            return jsonify({'message': 'Invalid phone number'}), 400
+
         # Check for duplicate phone number for this agent (with enterprise filtering)
-        existing_contact = supabase_request('GET', f'contacts?voice_agent_id=eq.{agent_id}&phone=eq.{data["phone"]}&enterprise_id=eq.{enterprise_id}')
+        existing_contact = supabase_request('GET', 'contacts', params={
+            'voice_agent_id': f'eq.{agent_id}',
+            'phone': f'eq.{phone}',
+            'enterprise_id': f'eq.{enterprise_id}'
+        })
         if existing_contact and len(existing_contact) > 0:
             return jsonify({'message': 'A contact with this phone number already exists for this agent'}), 400
 
         # Create contact
         contact_data = {
             'name': data['name'],
-            'phone': data['phone'],
+            'phone': phone,
             'status': data.get('status', 'active'),
             'voice_agent_id': agent_id,
             'enterprise_id': enterprise_id
@@ -573,6 +601,54 @@ def create_contact(agent_id):
         print(f"Create contact error: {e}")
         return jsonify({'message': 'Failed to create contact'}), 500
 
+@app.route('/api/voice-agents/<agent_id>/contacts/import', methods=['POST'])
+@login_required
+@require_enterprise_context
+def import_contacts(agent_id):
+    """Queue a bulk CSV/XLSX contact import for a voice agent; returns a job id to poll"""
+    try:
+        enterprise_id = g.enterprise_id
+
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            return jsonify({'message': 'A CSV or XLSX file is required'}), 400
+        file_format = upload.filename.rsplit('.', 1)[-1].lower()
+        if file_format not in IMPORT_FORMATS:
+            return jsonify({'message': f"File must be one of: {', '.join(IMPORT_FORMATS)}"}), 400
+
+        agent = supabase_request('GET', f'voice_agents?id=eq.{agent_id}&enterprise_id=eq.{enterprise_id}')
+        if not agent or len(agent) == 0:
+            return jsonify({'message': 'Voice agent not found or access denied'}), 404
+
+        # The request body is gone once we return, so the job reads its own copy
+        handle, path = tempfile.mkstemp(prefix='contact-import-', suffix=f'.{file_format}')
+        with os.fdopen(handle, 'wb') as target:
+            upload.save(target)
+
+        update_existing = request.args.get('update_existing', 'false').lower() == 'true'
+        job_id = contact_importer.submit(path, file_format, agent_id, enterprise_id,
+                                         filename=upload.filename, update_existing=update_existing)
+
+        return jsonify({
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': f'/api/contact-imports/{job_id}'
+        }), 202
+
+    except Exception as e:
+        print(f"Import contacts error: {e}")
+        return jsonify({'message': 'Failed to start contact import'}), 500
+
+@app.route('/api/contact-imports/<job_id>', methods=['GET'])
+@login_required
+@require_enterprise_context
+def get_contact_import(job_id):
+    """Progress of a contact import job"""
+    job = contact_importer.store.get(job_id)
+    if not job or job['enterprise_id'] != g.enterprise_id:
+        return jsonify({'message': 'Import job not found'}), 404
+    return jsonify({'job': job}), 200
+
 @app.route('/api/contacts/<contact_id>', methods=['PUT'])
 @login_required
 @require_enterprise_context
@@ -592,7 +668,9 @@ def update_contact(contact_id):
         if 'name' in data:
             update_data['name'] = data['name']
         if 'phone' in data:
-            update_data['phone'] = data['phone']
+            update_data['phone'] = phone_normalizer.normalize(data['phone'])
+            if not update_data['phone']:
+                return jsonify({'message': 'Invalid phone number'}), 400
         if 'status' in data:
             update_data['status'] = data['status']
 
@@ -628,6 +706,36 @@ def delete_contact(contact_id):
 
 # Bolna AI Voice Agent Integration Endpoints
 
+def parse_campaign_schedule(data):
+    """
+    Read optional 'scheduled_at' (ISO 8601) and 'calling_window'
+    ({'start': 'HH:MM', 'end': 'HH:MM', 'timezone': 'Asia/Kolkata'}) from a bulk-call body
+
+    Returns:
+        (scheduled_at epoch seconds or None, calling_window dict or None)
+
+    Raises:
+        ValueError with a message suitable for a 400 response
+    """
+    scheduled_at = None
+    if data.get('scheduled_at'):
+        try:
+            when = datetime.fromisoformat(str(data['scheduled_at']).replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError('scheduled_at must be an ISO 8601 timestamp')
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        scheduled_at = when.timestamp()
+    
+    calling_window = data.get('calling_window')
+    if calling_window:
+        try:
+            CallingWindow(calling_window['start'], calling_window['end'], calling_window.get('timezone'))
+        except Exception:
+            raise ValueError("calling_window needs 'start' and 'end' as HH:MM and a valid 'timezone'")
+    
+    return scheduled_at, calling_window
+
 @app.route('/api/voice-agents/<agent_id>/contacts/bulk-call', methods=['POST'])
 @login_required
 @check_trial_limits(feature='voice_calls', usage_type='outbound_calls')
@@ -642,6 +750,11 @@ def start_bulk_calls(agent_id):
         if not contact_ids:
             return jsonify({'message': 'No contacts selected for calling'}), 400
         
+        try:
+            scheduled_at, calling_window = parse_campaign_schedule(data)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
         # Log API call for trial users
         if hasattr(g, 'trial_status') and g.trial_status.get('is_trial'):
             log_trial_activity(user_id, 'api_call', {
@@ -673,9 +786,10 @@ def start_bulk_calls(agent_id):
         # Get agent configuration for this voice agent
         agent_config = get_agent_config_for_voice_agent(agent_data)
         
-        # Prepare call configurations
+        # Prepare call configurations (recipients normalised to E.164 in one pass)
         call_configs = []
-        for contact in contacts:
+        recipient_phones = phone_normalizer.normalize_many([contact['phone'] for contact in contacts])
+        for contact, recipient_phone in zip(contacts, recipient_phones):
             # Custom variables for this contact/agent
             variables = {
                 **agent_config.get('default_variables', {}),
@@ -688,7 +802,7 @@ def start_bulk_calls(agent_id):
             
             call_config = {
                 'agent_id': agent_config['agent_id'],
-                'recipient_phone': contact['phone'],
+                'recipient_phone': recipient_phone or contact['phone'],
                 'sender_phone': agent_config['sender_phone'],
                 'variables': variables,
                 'metadata': {
@@ -702,82 +816,91 @@ def start_bulk_calls(agent_id):
             }
             call_configs.append(call_config)
         
-        # Start bulk calls
-        print(f"Starting {len(call_configs)} calls for voice agent {agent_data['title']}")
-        call_results = bolna_api.bulk_start_calls(call_configs)
-        
-        # Log call attempts in database
-        call_logs = []
-        successful_calls = 0
-        failed_calls = 0
-        
-        for result in call_results:
-            config = result['original_config']
-            
-            if result['success']:
-                successful_calls += 1
-                status = 'initiated'
-                bolna_call_id = result.get('call_id')
-            else:
-                failed_calls += 1
-                status = 'failed'
-                bolna_call_id = None
-            
-            # Create call log entry
-            call_log = {
-                'id': str(uuid.uuid4()),
-                'voice_agent_id': agent_id,
-                'contact_id': config['metadata']['contact_id'],
-                'phone_number': config['recipient_phone'],
-                'status': status,
-                'organization_id': config['metadata']['organization_id'],
-                'enterprise_id': config['metadata']['enterprise_id'],
-                'metadata': {
-                    'bolna_call_id': bolna_call_id,
-                    'bolna_agent_id': config['agent_id'],
-                    'sender_phone': config['sender_phone'],
-                    'variables': config['variables'],
-                    'campaign_name': config['metadata']['campaign_name'],
-                    'error': result.get('error') if not result['success'] else None
-                }
-            }
-            call_logs.append(call_log)
-        
-        # Insert call logs into database
-        if call_logs:
-            supabase_request('POST', 'call_logs', data=call_logs)
-        
-        # Log activity
-        log_trial_activity(user_id, 'bulk_calls_initiated', {
-            'voice_agent_id': agent_id,
-            'total_calls': len(call_configs),
-            'successful_calls': successful_calls,
-            'failed_calls': failed_calls,
-            'campaign_name': data.get('campaign_name', f'Bulk call - {agent_data["title"]}')
-        })
+        # Queue the campaign; the campaign worker dials and writes call_logs in batches
+        campaign_name = data.get('campaign_name', f'Bulk call - {agent_data["title"]}')
+        campaign_id = campaign_queue.enqueue(
+            call_configs,
+            agent_id=agent_id,
+            name=campaign_name,
+            enterprise_id=agent_data['enterprise_id'],
+            user_id=user_id,
+            scheduled_at=scheduled_at,
+            calling_window=calling_window
+        )
+        print(f"Queued campaign {campaign_id} with {len(call_configs)} calls for voice agent {agent_data['title']}")
         
         response = {
-            'message': f'Bulk call campaign initiated',
+            'message': 'Bulk call campaign queued',
+            'campaign_id': campaign_id,
+            'status_url': f'/api/campaigns/{campaign_id}',
             'summary': {
                 'total_contacts': len(contacts),
-                'total_calls_attempted': len(call_configs),
-                'successful_calls': successful_calls,
-                'failed_calls': failed_calls,
-                'campaign_name': data.get('campaign_name', f'Bulk call - {agent_data["title"]}')
+                'total_calls_queued': len(call_configs),
+                'campaign_name': campaign_name,
+                'scheduled_at': data.get('scheduled_at'),
+                'calling_window': calling_window
             },
-            'call_results': call_results,
             'agent_config': {
                 'bolna_agent_id': agent_config['agent_id'],
                 'sender_phone': agent_config['sender_phone']
             }
         }
         
-        return jsonify(response), 200
+        return jsonify(response), 202
         
     except Exception as e:
         print(f"Bulk call error: {e}")
         return jsonify({'message': f'Failed to initiate bulk calls: {str(e)}'}), 500
 
+@app.route('/api/campaigns/<campaign_id>', methods=['GET'])
+@login_required
+def get_campaign_status(campaign_id):
+    """Get progress counters for a queued bulk call campaign"""
+    try:
+        campaign = campaign_queue.get_campaign(campaign_id)
+        if not campaign:
+            return jsonify({'message': 'Campaign not found'}), 404
+        
+        # Only the enterprise that owns the campaign can see it
+        user_data = get_user_context(g.user_id)
+        if not user_data or user_data.get('enterprise_id') != campaign['enterprise_id']:
+            return jsonify({'message': 'Campaign not found'}), 404
+        
+        return jsonify({'campaign': campaign}), 200
+        
+    except Exception as e:
+        print(f"Campaign status error: {e}")
+        return jsonify({'message': 'Failed to get campaign status'}), 500
+
+@app.route('/api/campaigns/scheduler/stats', methods=['GET'])
+@role_required('admin', 'superadmin')
+def get_campaign_scheduler_stats():
+    """Achieved calls/minute and live-call quota usage of this worker's campaign scheduler"""
+    return jsonify({'scheduler': campaign_scheduler.stats()}), 200
+
+@app.route('/api/call-logs/reconciler/stats', methods=['GET'])
+@role_required('admin', 'superadmin')
+def get_call_reconciler_stats():
+    """Bolna status polls made by the reconciler and the calls saved versus dashboard polling"""
+    return jsonify({
+        'reconciler': call_status_reconciler.get_stats(),
+        'writer': dict(call_status_writer.stats)
+    }), 200
+
+@app.route('/api/call-logs/inbound-queue/stats', methods=['GET'])
+@role_required('admin', 'superadmin')
+def get_inbound_log_queue_stats():
+    """Webhook call/SMS log rows queued in memory, spilled to disk and written by this worker"""
+    return jsonify({'queue': inbound_log_queue.get_stats()}), 200
+
+@app.route('/api/dev/campaigns/<campaign_id>', methods=['GET'])
+def dev_get_campaign_status(campaign_id):
+    """Development endpoint for campaign progress without authentication"""
+    campaign = campaign_queue.get_campaign(campaign_id)
+    if not campaign:
+        return jsonify({'message': 'Campaign not found'}), 404
+    return jsonify({'campaign': campaign}), 200
+
 @app.route('/api/call-logs', methods=['GET'])
 @login_required
 def get_call_logs():
@@ -786,40 +909,90 @@ def get_call_logs():
         user_id = g.user_id
         
         # Get user's enterprise
-        user = supabase_request('GET', f'users?id=eq.{user_id}&select=enterprise_id,role')
-        if not user or len(user) == 0:
+        user_data = get_user_context(user_id)
+        if not user_data:
             return jsonify({'message': 'User not found'}), 404
         
-        user_data = user[0]
         enterprise_id = user_data['enterprise_id']
         
-        # Get query parameters
-        limit = request.args.get('limit', 50)
-        offset = request.args.get('offset', 0)
+        # Get query parameters (keyset cursor instead of offset)
+        try:
+            cursor, limit = parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
         voice_agent_id = request.args.get('voice_agent_id')
         status = request.args.get('status')
         
         # Build query
-        query_params = f'enterprise_id=eq.{enterprise_id}&order=created_at.desc&limit={limit}&offset={offset}'
+        query_params = {
+            'enterprise_id': f'eq.{enterprise_id}',
+            'select': '*,contacts(name,phone),voice_agents(title)'
+        }
         
         if voice_agent_id:
-            query_params += f'&voice_agent_id=eq.{voice_agent_id}'
+            query_params['voice_agent_id'] = f'eq.{voice_agent_id}'
         if status:
-            query_params += f'&status=eq.{status}'
+            query_params['status'] = f'eq.{status}'
         
-        # Get call logs
-        call_logs = supabase_request('GET', f'call_logs?{query_params}&select=*,contacts(name,phone),voice_agents(title)')
+        # Get one page of call logs
+        call_logs, next_cursor = fetch_page('call_logs', query_params, cursor, limit)
         
-        return jsonify({'call_logs': call_logs or []}), 200
+        return jsonify({'call_logs': call_logs, 'next_cursor': next_cursor}), 200
         
     except Exception as e:
         print(f"Get call logs error: {e}")
         return jsonify({'message': 'Failed to get call logs'}), 500
 
+@app.route('/api/call-logs/export', methods=['GET'])
+@login_required
+def export_call_logs():
+    """Stream the enterprise's call logs as CSV (default) or NDJSON, with contact and agent names"""
+    try:
+        user_data = get_user_context(g.user_id)
+        if not user_data:
+            return jsonify({'message': 'User not found'}), 404
+
+        fmt = request.args.get('format', 'csv').lower()
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'message': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+        query_params = {
+            'enterprise_id': f"eq.{user_data['enterprise_id']}",
+            'select': CALL_LOG_SELECT
+        }
+        if request.args.get('voice_agent_id'):
+            query_params['voice_agent_id'] = f"eq.{request.args['voice_agent_id']}"
+        if request.args.get('status'):
+            query_params['status'] = f"eq.{request.args['status']}"
+
+        pages = iter_table('call_logs', query_params)
+        return _export_response(fmt, 'call-logs', export_chunks(fmt, pages, CALL_LOG_COLUMNS, flatten_call_log))
+
+    except Exception as e:
+        print(f"Export call logs error: {e}")
+        return jsonify({'message': 'Failed to export call logs'}), 500
+
+CALL_STATUS_STALE_SECONDS = int(os.getenv('CALL_STATUS_STALE_SECONDS', '60'))
+
+def _call_status_age_seconds(call_data, pending_event=None):
+    """Seconds since the stored status of a call was last refreshed"""
+    metadata = call_data.get('metadata') or {}
+    checked_at = ((pending_event or {}).get('received_at') or metadata.get('last_status_check')
+                  or call_data.get('created_at'))
+    if not checked_at:
+        return float('inf')
+    try:
+        checked = datetime.fromisoformat(str(checked_at).replace('Z', '+00:00'))
+    except ValueError:
+        return float('inf')
+    if checked.tzinfo is None:
+        checked = checked.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - checked).total_seconds()
+
 @app.route('/api/call-logs/<call_log_id>/status', methods=['GET'])
 @login_required
 def get_call_status(call_log_id):
-    """Get real-time status of a call from Bolna API"""
+    """Get the status of a call, from stored state unless it is stale (or ?live=true)"""
     try:
         user_id = g.user_id
         
@@ -829,35 +1002,51 @@ def get_call_status(call_log_id):
             return jsonify({'message': 'Call log not found'}), 404
         
         call_data = call_log[0]
-        bolna_call_id = call_data.get('metadata', {}).get('bolna_call_id')
+        metadata = call_data.get('metadata') or {}
+        bolna_call_id = metadata.get('bolna_call_id')
         
         if not bolna_call_id:
             return jsonify({'message': 'No Bolna call ID found for this call'}), 400
         
-        # Get status from Bolna API
+        # A status event may have arrived but not been written yet
+        pending = call_status_writer.pending_event(bolna_call_id)
+        stored_status = pending['status'] if pending else call_data.get('status')
+        stored_response = pending['payload'] if pending else metadata.get('bolna_status_response')
+        age = min(_call_status_age_seconds(call_data, pending),
+                  call_status_reconciler.seconds_since_poll(bolna_call_id))
+        
+        force_live = request.args.get('live', '').lower() == 'true'
+        serve_stored = not force_live and (is_terminal_status(stored_status) or age < CALL_STATUS_STALE_SECONDS)
+        call_status_reconciler.record_dashboard_read(live=not serve_stored)
+        if serve_stored:
+            return jsonify({
+                'call_log_id': call_log_id,
+                'bolna_call_id': bolna_call_id,
+                'status': stored_status,
+                'bolna_response': stored_response,
+                'source': 'stored',
+                'age_seconds': round(age, 1)
+            }), 200
+        
+        # Stored state is stale: ask Bolna and hand the answer to the batched writer
         try:
             bolna_api = BolnaAPI()
             status_response = bolna_api.get_call_status(bolna_call_id)
             
-            # Update call log status if different
             current_status = status_response.get('status', 'unknown')
-            if current_status != call_data['status']:
-                update_data = {
-                    'status': current_status,
-                    'duration': status_response.get('duration'),
-                    'metadata': {
-                        **call_data.get('metadata', {}),
-                        'bolna_status_response': status_response,
-                        'last_status_check': datetime.utcnow().isoformat()
-                    }
-                }
-                supabase_request('PATCH', f'call_logs?id=eq.{call_log_id}', data=update_data)
+            event = parse_bolna_event({**status_response, 'call_id': bolna_call_id, 'status': current_status})
+            event['source'] = 'live'
+            call_status_writer.submit(event)
+            if is_terminal_status(current_status):
+                campaign_scheduler.release_call(bolna_call_id)
             
             return jsonify({
                 'call_log_id': call_log_id,
                 'bolna_call_id': bolna_call_id,
                 'status': current_status,
-                'bolna_response': status_response
+                'bolna_response': status_response,
+                'source': 'live',
+                'age_seconds': 0
             }), 200
             
         except Exception as e:
@@ -1090,6 +1279,11 @@ def dev_bulk_calls(agent_id):
         if not contact_ids:
             return jsonify({'message': 'No contacts selected for calling'}), 400
         
+        try:
+            scheduled_at, calling_window = parse_campaign_schedule(data)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
         # Get voice agent details
         voice_agent = supabase_request('GET', f'voice_agents?id=eq.{agent_id}&select=*')
         if not voice_agent or len(voice_agent) == 0:
@@ -1122,9 +1316,10 @@ def dev_bulk_calls(agent_id):
         # Get agent configuration with custom prompts
         agent_config = get_agent_config_for_voice_agent(agent_data, custom_config)
         
-        # Prepare call configurations
+        # Prepare call configurations (recipients normalised to E.164 in one pass)
         call_configs = []
-        for contact in contacts:
+        recipient_phones = phone_normalizer.normalize_many([contact['phone'] for contact in contacts])
+        for contact, recipient_phone in zip(contacts, recipient_phones):
             from bolna_integration import create_personalized_variables
             
             # Create personalized variables with custom prompts
@@ -1144,7 +1339,7 @@ def dev_bulk_calls(agent_id):
             
             call_config = {
                 'agent_id': agent_config['agent_id'],
-                'recipient_phone': contact['phone'],
+                'recipient_phone': recipient_phone or contact['phone'],
                 'sender_phone': agent_config['sender_phone'],
                 'variables': variables,
                 'metadata': {
@@ -1157,31 +1352,36 @@ def dev_bulk_calls(agent_id):
             }
             call_configs.append(call_config)
         
-        # Start bulk calls
-        print(f"Starting {len(call_configs)} calls for voice agent {agent_data['title']}")
-        call_results = bolna_api.bulk_start_calls(call_configs)
-        
-        # Count successes and failures
-        successful_calls = sum(1 for result in call_results if result.get('success'))
-        failed_calls = len(call_results) - successful_calls
+        # Queue the campaign; the campaign worker dials and writes call_logs in batches
+        campaign_name = data.get('campaign_name', f'Dev test - {agent_data["title"]}')
+        campaign_id = campaign_queue.enqueue(
+            call_configs,
+            agent_id=agent_id,
+            name=campaign_name,
+            enterprise_id=agent_data['enterprise_id'],
+            scheduled_at=scheduled_at,
+            calling_window=calling_window
+        )
+        print(f"Queued campaign {campaign_id} with {len(call_configs)} calls for voice agent {agent_data['title']}")
         
         response = {
-            'message': f'Development bulk call campaign initiated',
+            'message': 'Development bulk call campaign queued',
+            'campaign_id': campaign_id,
+            'status_url': f'/api/dev/campaigns/{campaign_id}',
             'summary': {
                 'total_contacts': len(contacts),
-                'total_calls_attempted': len(call_configs),
-                'successful_calls': successful_calls,
-                'failed_calls': failed_calls,
-                'campaign_name': data.get('campaign_name', f'Dev test - {agent_data["title"]}')
+                'total_calls_queued': len(call_configs),
+                'campaign_name': campaign_name,
+                'scheduled_at': data.get('scheduled_at'),
+                'calling_window': calling_window
             },
-            'call_results': call_results,
             'agent_config': {
                 'bolna_agent_id': agent_config['agent_id'],
                 'sender_phone': agent_config['sender_phone']
             }
         }
         
-        return jsonify(response), 200
+        return jsonify(response), 202
         
     except Exception as e:
         print(f"Dev bulk call error: {e}")
@@ -1663,6 +1863,34 @@ def dev_get_payment_history():
         print(f"Get payment history error: {e}")
         return jsonify({'message': 'Failed to get payment history'}), 500
 
+@app.route('/api/webhooks/bolna/call-status', methods=['POST'])
+def bolna_call_status_webhook():
+    """Bolna status callback: queue the event for a batched call_logs write"""
+    try:
+        secret = os.getenv('BOLNA_WEBHOOK_SECRET')
+        if not secret:
+            # Without a secret anyone could mark calls finished and credit talk time
+            print("⚠️  BOLNA_WEBHOOK_SECRET is not set - rejecting Bolna status callback")
+            return jsonify({'message': 'Webhook not configured'}), 503
+        token = request.args.get('token') or request.headers.get('X-Webhook-Token') or ''
+        if not hmac.compare_digest(token.encode(), secret.encode()):
+            return jsonify({'message': 'Invalid webhook token'}), 401
+        
+        event = parse_bolna_event(request.get_json(silent=True))
+        if not event:
+            return jsonify({'message': 'Missing call id or status'}), 400
+        
+        call_status_writer.submit(event)
+        if is_terminal_status(event['status']):
+            # Frees the live-call slot held by the campaign scheduler
+            campaign_scheduler.release_call(event['bolna_call_id'])
+        
+        return jsonify({'message': 'Accepted', 'bolna_call_id': event['bolna_call_id']}), 202
+        
+    except Exception as e:
+        print(f"Bolna call status webhook error: {e}")
+        return jsonify({'message': 'Webhook processing failed'}), 500
+
 @app.route('/api/webhooks/razorpay', methods=['POST'])
 def razorpay_webhook():
     """Razorpay webhook endpoint for payment notifications"""
@@ -1815,7 +2043,8 @@ def search_phone_numbers():
         data = request.get_json()
         country_code = data.get('country_code', 'US')
         pattern = data.get('pattern', '')
-        provider_name = data.get('provider', 'plivo')
+        # Without an explicit provider, search whichever one is currently healthiest
+        provider_name = data.get('provider') or phone_provider_manager.healthiest_provider() or 'plivo'
         region = data.get('region')
         limit = data.get('limit', 20)
         
@@ -1863,29 +2092,32 @@ def purchase_phone_number():
             sms_url=os.getenv('SMS_WEBHOOK_URL')
         )
         
+        # The purchase is where availability is re-verified: sold either way, drop it from the search index
+        if not purchase_result.get('circuit_open'):
+            number_inventory.discard(phone_number)
         if not purchase_result['success']:
             return jsonify({
                 'success': False,
                 'error': f'Failed to purchase from provider: {purchase_result.get("error", "Unknown error")}'
-            }), 500
+            }), 503 if purchase_result.get('circuit_open') else 500
         
         # Get provider ID from database
-        provider_response = supabase_request('GET', 'phone_number_providers', 
-                                           params={'name': f'eq.{provider_name}'})
+        providers = supabase_request('GET', 'phone_number_providers', 
+                                     params={'name': f'eq.{provider_name}'})
         
-        if provider_response.status_code != 200 or not provider_response.json():
+        if not providers:
             return jsonify({
                 'success': False,
                 'error': 'Provider not found in database'
             }), 400
         
-        provider_id = provider_response.json()[0]['id']
+        provider_id = providers[0]['id']
         
         # Create purchased phone number record in database
         phone_record = {
             'id': str(uuid.uuid4()),
             'enterprise_id': enterprise_id,
-            'phone_number': phone_number,
+            'phone_number': phone_normalizer.normalize(phone_number) or phone_number,  # E.164 key for webhook lookups
             'country_code': data.get('country_code', 'US'),
             'country_name': data.get('country_name', 'United States'),
             'provider_id': provider_id,
@@ -1900,12 +2132,14 @@ def purchase_phone_number():
             'updated_at': datetime.now(timezone.utc).isoformat()
         }
         
-        db_response = supabase_request('POST', 'purchased_phone_numbers', data=phone_record)
+        db_result = supabase_request('POST', 'purchased_phone_numbers', data=phone_record)
         
-        if db_response.status_code == 201:
+        if db_result:
+            saved_record = db_result[0] if isinstance(db_result, list) else phone_record
+            number_routing.add(saved_record)
             return jsonify({
                 'success': True,
-                'phone_number': db_response.json()[0],
+                'phone_number': saved_record,
                 'provider_response': purchase_result,
                 'message': f'Phone number {phone_number} purchased successfully from {provider_name}'
             })
@@ -1971,45 +2205,41 @@ def search_phone_numbers_production():
         limit = int(request.args.get('limit', 20))
 
         providers = [p.strip() for p in providers_param.split(',') if p.strip()]
+        capability_list = capabilities.split(',') if capabilities else None
 
-        all_results = []
-        for provider_name in providers:
-            try:
-                search_params = {
-                    'country_code': country_code,
-                    'limit': limit // len(providers)  # Distribute limit across providers
-                }
-
-                if area_code:
-                    search_params['area_code'] = area_code
-                if pattern:
-                    search_params['pattern'] = pattern
-                if capabilities:
-                    search_params['capabilities'] = capabilities.split(',')
-
-                results = phone_provider_manager.search_phone_numbers(
-                    provider_name=provider_name,
-                    **search_params
-                )
-
-                if results['success']:
-                    # Add provider info to each result
-                    for number in results['available_numbers']:
-                        number['provider'] = provider_name
-                    all_results.extend(results['available_numbers'])
-
-            except Exception as e:
-                print(f"Error searching {provider_name}: {e}")
-                continue
+        # Popular countries/area codes are answered from the background-refreshed inventory
+        cached = number_inventory.search(country_code, area_code=area_code, pattern=pattern,
+                                         capabilities=capability_list, providers=providers, limit=limit)
+        if cached is not None:
+            return jsonify({
+                'success': True,
+                'data': cached['available_numbers'],
+                'total_found': cached['total_found'],
+                'providers_searched': providers,
+                'providers_failed': {},
+                'cached': True,
+                'source': 'inventory',
+                'inventory_age_seconds': cached['age_seconds']
+            })
 
-        # Sort by monthly cost (lowest first)
-        all_results.sort(key=lambda x: x.get('monthly_cost', 999))
+        # Providers are searched concurrently, each under its own deadline; merged cheapest first
+        results = phone_provider_manager.search_all_providers(
+            providers,
+            country_code=country_code,
+            area_code=area_code,
+            pattern=pattern,
+            capabilities=capability_list,
+            limit=limit
+        )
 
         return jsonify({
             'success': True,
-            'data': all_results[:limit],
-            'total_found': len(all_results),
-            'providers_searched': providers
+            'data': results['available_numbers'],
+            'total_found': results['total_found'],
+            'providers_searched': providers,
+            'providers_failed': results['providers_failed'],
+            'cached': results['cached'],
+            'source': 'providers'
         })
 
     except Exception as e:
@@ -2019,6 +2249,18 @@ def search_phone_numbers_production():
             'error': str(e)
         }), 500
 
+@app.route('/api/phone-providers/status', methods=['GET'])
+@role_required('admin', 'superadmin')
+def get_phone_provider_status():
+    """Credentials, circuit state and latency/error health of each phone provider"""
+    return jsonify({'providers': phone_provider_manager.get_provider_status()}), 200
+
+@app.route('/api/phone-numbers/inventory/stats', methods=['GET'])
+@role_required('admin', 'superadmin')
+def get_number_inventory_stats():
+    """Size, age and hit rate of the in-memory number search inventory"""
+    return jsonify({'inventory': number_inventory.get_stats()}), 200
+
 @app.route('/api/phone-numbers/purchase', methods=['POST'])
 @login_required
 @require_enterprise_context
@@ -2077,17 +2319,20 @@ def purchase_phone_number_production():
             sms_url=sms_url
         )
 
+        # The purchase is where availability is re-verified: sold either way, drop it from the search index
+        if not purchase_result.get('circuit_open'):
+            number_inventory.discard(phone_number)
         if not purchase_result['success']:
             return jsonify({
                 'success': False,
                 'error': f'Failed to purchase from provider: {purchase_result.get("error", "Unknown error")}'
-            }), 500
+            }), 503 if purchase_result.get('circuit_open') else 500
 
         # Save to database
         phone_record = {
             'id': str(uuid.uuid4()),
             'enterprise_id': enterprise_id,
-            'phone_number': phone_number,
+            'phone_number': phone_normalizer.normalize(phone_number) or phone_number,  # E.164 key for webhook lookups
             'friendly_name': friendly_name,
             'provider_id': provider_id,
             'provider_phone_id': purchase_result.get('provider_phone_id'),
@@ -2107,6 +2352,8 @@ def purchase_phone_number_production():
         db_result = supabase_request('POST', 'purchased_phone_numbers', data=phone_record)
 
         if db_result:
+            number_routing.add(phone_record)
+
             # Deduct setup cost from account balance if applicable
             if setup_cost > 0:
                 try:
@@ -2162,6 +2409,11 @@ def get_owned_phone_numbers():
         # Get enterprise context from middleware
         enterprise_id = g.enterprise_id
 
+        try:
+            cursor, limit = parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
         # Fetch owned phone numbers with provider information
         # Using a more complex query to join with providers table
         query_params = {
@@ -2170,7 +2422,7 @@ def get_owned_phone_numbers():
             'status': 'neq.released'
         }
 
-        phone_numbers_raw = supabase_request('GET', 'purchased_phone_numbers', params=query_params)
+        phone_numbers_raw, next_cursor = fetch_page('purchased_phone_numbers', query_params, cursor, limit)
 
         # Transform the data to include provider name
         phone_numbers = []
@@ -2187,7 +2439,8 @@ def get_owned_phone_numbers():
 
         return jsonify({
             'success': True,
-            'data': phone_numbers
+            'data': phone_numbers,
+            'next_cursor': next_cursor
         })
 
     except Exception as e:
@@ -2242,7 +2495,14 @@ def release_phone_number(phone_id):
             'updated_at': datetime.now(timezone.utc).isoformat()
         }
 
-        supabase_request('PATCH', f'purchased_phone_numbers?id=eq.{phone_id}', data=update_data)
+        updated = supabase_request('PATCH', f'purchased_phone_numbers?id=eq.{phone_id}', data=update_data)
+        if not updated:
+            return jsonify({
+                'success': False,
+                'error': 'Number released from provider but failed to update database'
+            }), 500
+
+        number_routing.remove(phone_id)
 
         return jsonify({
             'success': True,
@@ -2307,6 +2567,7 @@ def assign_phone_to_agent(phone_id):
                                             'updated_at': datetime.now(timezone.utc).isoformat()})
 
         if update_result:
+            number_routing.assign_agent(phone_id, agent_id)
             return jsonify({
                 'success': True,
                 'message': f'Phone number {phone_record[0]["phone_number"]} assigned to agent {agent_record[0]["title"]}'
@@ -2344,12 +2605,10 @@ def handle_voice_webhook():
         to_number = request.form.get('To') or request.form.get('to')
         call_sid = request.form.get('CallSid') or request.form.get('call_id')
 
-        # Find the purchased phone number
-        phone_record = supabase_request('GET', 'purchased_phone_numbers',
-                                      params={'phone_number': f'eq.{to_number}',
-                                             'status': 'eq.active'})
+        # Owning enterprise and agent come from the in-memory routing table, not the database
+        route = number_routing.lookup(to_number)
 
-        if not phone_record or len(phone_record) == 0:
+        if not route:
             # Return error response
             return '''<?xml version="1.0" encoding="UTF-8"?>
             <Response>
@@ -2360,8 +2619,9 @@ def handle_voice_webhook():
         # Log the call
         call_log = {
             'id': str(uuid.uuid4()),
-            'enterprise_id': phone_record[0]['enterprise_id'],
-            'phone_number_id': phone_record[0]['id'],
+            'enterprise_id': route['enterprise_id'],
+            'phone_number_id': route['phone_number_id'],
+            'voice_agent_id': route['voice_agent_id'],
             'from_number': from_number,
             'to_number': to_number,
             'call_sid': call_sid,
@@ -2371,7 +2631,8 @@ def handle_voice_webhook():
             'created_at': datetime.now(timezone.utc).isoformat()
         }
 
-        supabase_request('POST', 'call_logs', data=call_log)
+        # Written behind the response so a slow Supabase doesn't delay pickup
+        inbound_log_queue.submit('call_logs', call_log)
 
         # Return TwiML response to connect to Bolna AI
         bolna_webhook_url = f"{os.getenv('BOLNA_API_URL')}/webhook/voice"
@@ -2407,17 +2668,15 @@ def handle_sms_webhook():
         message_body = request.form.get('Body') or request.form.get('text')
         message_sid = request.form.get('MessageSid') or request.form.get('message_id')
 
-        # Find the purchased phone number
-        phone_record = supabase_request('GET', 'purchased_phone_numbers',
-                                      params={'phone_number': f'eq.{to_number}',
-                                             'status': 'eq.active'})
+        # Owning enterprise comes from the in-memory routing table, not the database
+        route = number_routing.lookup(to_number)
 
-        if phone_record and len(phone_record) > 0:
+        if route:
             # Log the SMS
             sms_log = {
                 'id': str(uuid.uuid4()),
-                'enterprise_id': phone_record[0]['enterprise_id'],
-                'phone_number_id': phone_record[0]['id'],
+                'enterprise_id': route['enterprise_id'],
+                'phone_number_id': route['phone_number_id'],
                 'from_number': from_number,
                 'to_number': to_number,
                 'message_body': message_body,
@@ -2428,7 +2687,7 @@ def handle_sms_webhook():
                 'created_at': datetime.now(timezone.utc).isoformat()
             }
 
-            supabase_request('POST', 'sms_logs', data=sms_log)
+            inbound_log_queue.submit('sms_logs', sms_log)
 
         # Return success response (provider-specific format)
         return jsonify({'success': True, 'message': 'SMS received'})
@@ -2712,36 +2971,17 @@ def get_voice_sample(language_code):
 # ============================================================================
 
 @app.route('/api/admin/stats', methods=['GET'])
-@login_required
+@role_required('admin', 'superadmin')
 def get_admin_stats():
     """Get system statistics for superadmin dashboard"""
     try:
-        # Check if user is admin
-        current_user = get_current_user()
-        if not current_user or current_user.get('role') != 'admin':
-            return jsonify({'message': 'Admin access required'}), 403
-        
-        # Get total enterprises
-        enterprises = supabase_request('GET', 'enterprises') or []
-        total_enterprises = len(enterprises)
-        
-        # Get trial enterprises
-        trial_enterprises = len([e for e in enterprises if e.get('status') == 'trial'])
-        
-        # Get total users
-        users = supabase_request('GET', 'users') or []
-        total_users = len(users)
-        
-        # Get total voice agents
-        voice_agents = supabase_request('GET', 'voice_agents') or []
-        total_agents = len(voice_agents)
+        # Count-only queries, cached for ADMIN_STATS_TTL seconds
+        stats, age = admin_stats.get()
         
-        return jsonify({
-            'total_enterprises': total_enterprises,
-            'trial_enterprises': trial_enterprises,
-            'total_users': total_users,
-            'total_agents': total_agents
-        })
+        response = jsonify(stats)
+        response.headers['Age'] = str(int(age))
+        response.headers['Cache-Control'] = f'private, max-age={max(0, int(admin_stats.ttl - age))}'
+        return response
         
     except Exception as e:
         print(f"Error getting admin stats: {e}")
@@ -2757,12 +2997,19 @@ def get_admin_enterprises():
         if not current_user or current_user.get('role') != 'admin':
             return jsonify({'message': 'Admin access required'}), 403
         
-        # Get all enterprises
-        enterprises = supabase_request('GET', 'enterprises') or []
+        try:
+            cursor, limit = parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        # Get one page of enterprises; the total comes from the cached stats rollup
+        enterprises, next_cursor = fetch_page('enterprises', {}, cursor, limit)
+        stats, _ = admin_stats.get()
         
         return jsonify({
             'enterprises': enterprises,
-            'total_count': len(enterprises)
+            'total_count': stats['total_enterprises'],
+            'next_cursor': next_cursor
         })
         
     except Exception as e:
@@ -2898,6 +3145,7 @@ def update_admin_enterprise(enterprise_id):
         
         # Update enterprise
         result = supabase_request('PATCH', f'enterprises?id=eq.{enterprise_id}', data=update_data)
+        invalidate_user_context(enterprise_id=enterprise_id)
         
         if result:
             return jsonify({
@@ -2921,12 +3169,19 @@ def get_admin_users():
         if not current_user or current_user.get('role') != 'admin':
             return jsonify({'message': 'Admin access required'}), 403
         
-        # Get all users
-        users = supabase_request('GET', 'users') or []
+        try:
+            cursor, limit = parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        # Get one page of users; the total comes from the cached stats rollup
+        users, next_cursor = fetch_page('users', {}, cursor, limit)
+        stats, _ = admin_stats.get()
         
         return jsonify({
             'users': users,
-            'total_count': len(users)
+            'total_count': stats['total_users'],
+            'next_cursor': next_cursor
         })
         
     except Exception as e:
@@ -3022,6 +3277,43 @@ def handler(request):
     """Vercel serverless function handler"""
     return app(request.environ, lambda status, headers: None)
 
+_background_workers_pid = None
+
+
+def start_background_workers():
+    """
+    Resume campaigns left queued or running by a previous worker and start the
+    bulk/call status/inbound log flushers, the reconciler, the number inventory
+    refresher and the number routing table for this process
+
+    Called once per worker by gunicorn.conf.py (post_worker_init) and by
+    `python main.py`, never at import time, so multiprocessing children and
+    modules that import main do not start a second set. Safe to call again.
+    """
+    global _background_workers_pid
+    if _background_workers_pid == os.getpid():
+        return
+    _background_workers_pid = os.getpid()
+
+    bulk_writer.start()
+    call_status_writer.start()
+    inbound_log_queue.start()
+    if os.getenv('CALL_RECONCILER_ENABLED', 'true').lower() == 'true':
+        call_status_reconciler.start()
+    if os.getenv('CAMPAIGN_WORKER_ENABLED', 'true').lower() == 'true':
+        campaign_scheduler.start()
+    if os.getenv('NUMBER_INVENTORY_ENABLED', 'true').lower() == 'true':
+        number_inventory.start()
+    if os.getenv('NUMBER_ROUTING_ENABLED', 'true').lower() == 'true':
+        number_routing.start()
+
+
+@app.before_request
+def ensure_background_workers():
+    """Servers without the gunicorn hook (e.g. Vercel) start the workers on their first request"""
+    if _background_workers_pid != os.getpid():
+        start_background_workers()
+
 # For Railway/production deployment
 if __name__ == "__main__":
     import os
@@ -3034,4 +3326,5 @@ if __name__ == "__main__":
     print(f"- http://0.0.0.0:{port}/dashboard.html (User Dashboard)")
     print(f"- http://0.0.0.0:{port}/admin/dashboard (Superadmin Dashboard)")
     print(f"- http://0.0.0.0:{port}/api/dev/voice-agents (API Test)")
+    start_background_workers()
     app.run(host="0.0.0.0", port=port, debug=False)
\ No newline at end of file
@@ -0,0 +1,261 @@
+"""
+Number Inventory
+In-memory index of numbers the phone providers have available, refreshed in
+the background for popular countries and area codes so number search is
+answered from memory instead of a round of provider API calls per tenant.
+Each country is a digit trie over national numbers whose nodes keep their
+subtree's numbers sorted by monthly cost, so "cheapest numbers in area code
+415" is a walk of three nodes and a slice. Availability is only re-checked by
+the provider when a number is purchased; purchased or vanished numbers are
+dropped from the index then.
+"""
+
+import os
+import time
+import random
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from phone_normalizer import phone_normalizer
+from phone_provider_integration import phone_provider_manager
+
+# country:area_code pairs kept warm (empty area code = country-wide)
+DEFAULT_TARGETS = 'US:,US:212,US:310,US:415,US:646,CA:,GB:,AU:,IN:'
+
+
+def parse_targets(spec: str) -> List[Tuple[str, str]]:
+    targets = []
+    for item in (spec or '').split(','):
+        country, _, area_code = item.strip().partition(':')
+        if country:
+            targets.append((country.strip().upper(), area_code.strip()))
+    return targets
+
+
+def _cost(number: Dict) -> Tuple[float, str]:
+    return (number.get('monthly_cost', 999), number.get('phone_number', ''))
+
+
+def national_digits(phone_number: str) -> str:
+    """National significant number of a provider-formatted number ('' when unrecognisable)"""
+    digits = ''.join(char for char in str(phone_number or '') if char.isdigit())
+    parts = phone_normalizer.split(digits)
+    return parts[1] if parts else digits
+
+
+class DigitTrie:
+    """Prefix trie over national-number digits; each node lists its subtree's numbers cheapest first"""
+
+    __slots__ = ('children', 'numbers')
+
+    def __init__(self):
+        self.children = {}
+        self.numbers = []
+
+    @classmethod
+    def build(cls, numbers: List[Dict]) -> 'DigitTrie':
+        root = cls()
+        # Inserting in cost order keeps every node's list sorted without re-sorting
+        for number in sorted(numbers, key=_cost):
+            node = root
+            node.numbers.append(number)
+            for digit in national_digits(number.get('phone_number')):
+                node = node.children.setdefault(digit, cls())
+                node.numbers.append(number)
+        return root
+
+    def prefix(self, digits: str) -> List[Dict]:
+        node = self
+        for digit in digits:
+            node = node.children.get(digit)
+            if node is None:
+                return []
+        return node.numbers
+
+    def remove(self, phone_number: str) -> bool:
+        node = self
+        path = [node]
+        for digit in national_digits(phone_number):
+            node = node.children.get(digit)
+            if node is None:
+                return False
+            path.append(node)
+        removed = False
+        for node in path:
+            before = len(node.numbers)
+            node.numbers = [number for number in node.numbers if number.get('phone_number') != phone_number]
+            removed = removed or len(node.numbers) != before
+        return removed
+
+
+class NumberInventory:
+    """Background-refreshed, per-country number index used by /api/phone-numbers/search"""
+
+    def __init__(self, manager=None, targets: str = None, interval: float = None,
+                 fetch_limit: int = None, max_age: float = None):
+        self._manager = manager
+        self.targets = parse_targets(targets or os.getenv('NUMBER_INVENTORY_TARGETS', DEFAULT_TARGETS))
+        self.interval = interval or float(os.getenv('NUMBER_INVENTORY_REFRESH_INTERVAL', '300'))
+        self.fetch_limit = fetch_limit or int(os.getenv('NUMBER_INVENTORY_FETCH_LIMIT', '100'))
+        # An index older than this (e.g. providers down for a while) is not served
+        self.max_age = max_age or float(os.getenv('NUMBER_INVENTORY_MAX_AGE', str(self.interval * 4)))
+
+        self._index = {}  # country -> DigitTrie, swapped whole on refresh
+        self._refreshed_at = {}  # country -> epoch seconds
+        # (country, area_code) -> epoch seconds of the last fetch every provider answered
+        self._fetched_at = {}
+        self._thread = None
+        self._thread_pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.stats = {'refreshes': 0, 'last_refresh_seconds': 0.0, 'hits': 0, 'misses': 0, 'discarded': 0}
+
+    @property
+    def manager(self):
+        return self._manager or phone_provider_manager
+
+    def start(self):
+        """Start the refresh thread for this process (idempotent, fork-aware)"""
+        pid = os.getpid()
+        with self._lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='number-inventory', daemon=True)
+            self._thread_pid = pid
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️  Number inventory refresh failed: {e}")
+            # Jitter keeps gunicorn workers from refreshing in lockstep
+            self._stop.wait(self.interval * random.uniform(0.9, 1.1))
+
+    def refresh(self):
+        """Pull every target from all providers and swap in the rebuilt country indexes"""
+        started = time.time()
+        providers = list(self.manager.providers)
+        by_country = {}
+        answered = set()
+        fetched = set()
+        for country, area_code in self.targets:
+            result = self.manager.search_all_providers(providers, country, area_code=area_code or None,
+                                                       limit=self.fetch_limit, use_cache=False)
+            if result.get('available_numbers'):
+                answered.add(country)
+            if result.get('success') and not result.get('providers_failed'):
+                fetched.add((country, area_code))
+            numbers = by_country.setdefault(country, {})
+            for number in result.get('available_numbers', []):
+                numbers.setdefault(number.get('phone_number'), number)
+
+        index = dict(self._index)
+        refreshed_at = dict(self._refreshed_at)
+        for country in answered:
+            # Countries no provider answered for keep their previous index until it ages out
+            index[country] = DigitTrie.build(list(by_country[country].values()))
+            refreshed_at[country] = time.time()
+        fetched_at = dict(self._fetched_at)
+        for target in fetched:
+            if target[0] in answered:
+                fetched_at[target] = refreshed_at[target[0]]
+        with self._lock:
+            self._index = index
+            self._refreshed_at = refreshed_at
+            self._fetched_at = fetched_at
+        self.stats['refreshes'] += 1
+        self.stats['last_refresh_seconds'] = round(time.time() - started, 3)
+
+    def search(self,
+               country_code: str,
+               area_code: str = None,
+               pattern: str = None,
+               capabilities: List[str] = None,
+               providers: List[str] = None,
+               limit: int = 20) -> Optional[Dict]:
+        """
+        Cheapest matching numbers from memory, or None when a live search is needed
+
+        The index only answers for a (country, area code) that was itself fetched
+        in the last max_age seconds, or when it holds at least limit matches.
+        Otherwise (other area codes inside a country-wide sample, a pattern the
+        providers would have searched for, too few matches) it returns None.
+        total_found is exact for fetched targets and None when the answer comes
+        from a sample.
+        """
+        country = (country_code or '').upper()
+        trie = self._index.get(country)
+        age = time.time() - self._refreshed_at.get(country, 0)
+        if trie is None or age > self.max_age:
+            self.stats['misses'] += 1
+            return None
+
+        # Same reading of pattern as the live search: three digits on their own are an area code
+        if area_code:
+            prefix, contains = area_code, pattern
+        elif pattern and pattern.isdigit() and len(pattern) == 3:
+            prefix, contains = pattern, None
+        else:
+            prefix, contains = '', pattern
+        wanted = {c.strip().lower() for c in capabilities or [] if c.strip()}
+        allowed = {p.lower() for p in providers} if providers else None
+
+        matches = []
+        for number in trie.prefix(prefix):
+            if allowed is not None and number.get('provider') not in allowed:
+                continue
+            number_capabilities = number.get('capabilities') or {}
+            if any(not number_capabilities.get(capability) for capability in wanted):
+                continue
+            if contains and contains not in number.get('phone_number', ''):
+                continue
+            matches.append(number)
+
+        # A free-text pattern without an area code is searched by the providers, not filtered locally
+        fetched = (time.time() - self._fetched_at.get((country, prefix), 0) <= self.max_age
+                   and not (contains and not area_code))
+        if not matches or (not fetched and len(matches) < limit):
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return {
+            'available_numbers': matches[:limit],
+            'total_found': len(matches) if fetched else None,
+            'age_seconds': round(age, 1)
+        }
+
+    def discard(self, phone_number: str) -> bool:
+        """Drop a number that was purchased or turned out to be gone"""
+        removed = False
+        for trie in list(self._index.values()):
+            removed = trie.remove(phone_number) or removed
+        if removed:
+            self.stats['discarded'] += 1
+        return removed
+
+    def get_stats(self) -> Dict:
+        now = time.time()
+        return {
+            **self.stats,
+            'countries': {
+                country: {'numbers': len(trie.numbers), 'age_seconds': round(now - self._refreshed_at.get(country, 0), 1)}
+                for country, trie in self._index.items()
+            },
+            'targets': {
+                f'{country}:{area_code}': round(now - self._fetched_at[(country, area_code)], 1)
+                if (country, area_code) in self._fetched_at else None
+                for country, area_code in self.targets
+            }
+        }
+
+
+# Global inventory (refresh thread started by main)
+number_inventory = NumberInventory()
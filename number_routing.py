@@ -0,0 +1,230 @@
+"""
+Inbound Number Routing
+In-memory table from a purchased number (normalised E.164) to the enterprise,
+purchased_phone_numbers row and assigned voice agent that own it, so the
+voice and SMS webhooks answer the carrier without a database round trip.
+The table is warmed at startup and rebuilt periodically (picking up changes
+made by other workers); purchase, release and assign-agent update it in
+place. A number that isn't in the table is looked up once and remembered,
+and unknown numbers are negatively cached for a short while.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+from pagination import encode_cursor, keyset_params
+from phone_normalizer import phone_normalizer
+from ttl_cache import TTLCache
+from supabase_client import supabase_client
+
+ROUTING_PAGE_SIZE = 1000
+
+
+def phone_number_filter(number: str) -> str:
+    """PostgREST filter matching a provider-supplied number by its E.164 form or as received"""
+    candidates = sorted({phone_normalizer.normalize(number), (number or '').strip()} - {None, ''})
+    return 'in.(' + ','.join(f'"{candidate}"' for candidate in candidates) + ')'
+
+
+class NumberRoutingTable:
+    """Per-worker routing table for /webhooks/voice and /webhooks/sms"""
+
+    def __init__(self, interval: float = None, negative_ttl: float = None, lookup_timeout: float = None):
+        self.interval = interval or float(os.getenv('NUMBER_ROUTING_REFRESH_INTERVAL', '120'))
+        self.negative_ttl = negative_ttl or float(os.getenv('NUMBER_ROUTING_NEGATIVE_TTL', '30'))
+        # Read timeout for a miss looked up inside a webhook; the carrier is waiting on the answer
+        self.lookup_timeout = lookup_timeout or float(os.getenv('NUMBER_ROUTING_LOOKUP_TIMEOUT', '2'))
+
+        self._routes = {}  # canonical number -> route dict
+        self._keys_by_id = {}  # phone_number_id -> canonical number
+        self._unknown = TTLCache(maxsize=4096, ttl=self.negative_ttl)
+        self._journal = None  # changes made while a rebuild is running, replayed onto it
+        self.warmed = False
+        self.stats = {'hits': 0, 'misses': 0, 'db_lookups': 0, 'db_lookup_errors': 0, 'db_lookup_seconds': 0.0,
+                      'rebuilds': 0, 'rebuild_errors': 0, 'routes': 0}
+
+        self._thread = None
+        self._thread_pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get(table: str, params: Dict, timeout=None) -> List[Dict]:
+        """GET rows from table, raising on any failure (unlike supabase_request, which returns [])"""
+        if not supabase_client.available:
+            raise RuntimeError('Supabase not available')
+        response = supabase_client.get(table, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _read_all(self, table: str, params: Dict) -> List[Dict]:
+        """Every row of table matching params, paged by keyset"""
+        rows, cursor = [], None
+        while True:
+            page = self._get(table, {**params, **keyset_params(cursor, ROUTING_PAGE_SIZE)})
+            rows.extend(page[:ROUTING_PAGE_SIZE])
+            if len(page) <= ROUTING_PAGE_SIZE:
+                return rows
+            cursor = encode_cursor(page[ROUTING_PAGE_SIZE - 1])
+
+    @staticmethod
+    def _route(row: Dict, voice_agent_id: str = None) -> Dict:
+        return {
+            'enterprise_id': row.get('enterprise_id'),
+            'phone_number_id': row.get('id'),
+            'phone_number': row.get('phone_number'),
+            'voice_agent_id': voice_agent_id
+        }
+
+    def start(self):
+        """Start the warm/refresh thread for this process (idempotent, fork-aware)"""
+        pid = os.getpid()
+        with self._lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='number-routing', daemon=True)
+            self._thread_pid = pid
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.rebuild()
+            except Exception as e:
+                print(f"⚠️  Number routing table refresh failed: {e}")
+            # Jitter keeps gunicorn workers from reloading in lockstep
+            self._stop.wait(self.interval * random.uniform(0.9, 1.1))
+
+    def rebuild(self):
+        """Reload every active number and its assigned agent and swap the table in
+
+        A failed read raises and leaves the current table in place; an empty
+        result is a real empty table and replaces it.
+        """
+        with self._lock:
+            self._journal = []
+        try:
+            numbers = self._read_all('purchased_phone_numbers', {
+                'status': 'eq.active', 'select': 'id,enterprise_id,phone_number,created_at'})
+            agents = self._read_all('voice_agents', {
+                'status': 'eq.active', 'configuration->>outbound_phone_number_id': 'not.is.null',
+                'select': 'id,configuration,created_at'})
+        except Exception:
+            with self._lock:
+                self._journal = None
+                self.stats['rebuild_errors'] += 1
+            raise
+
+        # Newest agent wins when several point at the same number
+        agent_by_number = {}
+        for agent in agents:
+            number_id = (agent.get('configuration') or {}).get('outbound_phone_number_id')
+            agent_by_number.setdefault(number_id, agent['id'])
+
+        routes, keys_by_id = {}, {}
+        for row in numbers:
+            self._put(routes, keys_by_id, self._route(row, agent_by_number.get(row.get('id'))))
+
+        with self._lock:
+            journal, self._journal = self._journal, None
+            for change in journal:
+                change(routes, keys_by_id)
+            self._routes, self._keys_by_id = routes, keys_by_id
+            self._unknown.clear()
+            self.warmed = True
+            self.stats['rebuilds'] += 1
+            self.stats['routes'] = len(routes)
+
+    @staticmethod
+    def _put(routes: Dict, keys_by_id: Dict, route: Dict):
+        key = phone_normalizer.canonical_key(route['phone_number'])
+        if key:
+            routes[key] = route
+            keys_by_id[route['phone_number_id']] = key
+
+    def _change(self, change):
+        """Apply a change to the live table and record it for a rebuild in progress"""
+        with self._lock:
+            change(self._routes, self._keys_by_id)
+            if self._journal is not None:
+                self._journal.append(change)
+            self.stats['routes'] = len(self._routes)
+
+    def lookup(self, number: str) -> Optional[Dict]:
+        """Route for an inbound To number, or None when no active purchased number matches"""
+        key = phone_normalizer.canonical_key(number)
+        route = self._routes.get(key)
+        if route is not None:
+            self.stats['hits'] += 1
+            return route
+        self.stats['misses'] += 1
+        if not key or self._unknown.get(key):
+            return None
+
+        # Not seen yet (e.g. bought through another worker since the last rebuild)
+        self.stats['db_lookups'] += 1
+        timeout = (supabase_client.connect_timeout, min(self.lookup_timeout, supabase_client.read_timeout))
+        started = time.monotonic()
+        try:
+            rows = self._get('purchased_phone_numbers', {
+                'phone_number': phone_number_filter(number), 'status': 'eq.active',
+                'select': 'id,enterprise_id,phone_number'}, timeout=timeout)
+            agents = self._get('voice_agents', {
+                'configuration->>outbound_phone_number_id': f"eq.{rows[0]['id']}", 'status': 'eq.active',
+                'select': 'id', 'order': 'created_at.desc', 'limit': '1'}, timeout=timeout) if rows else []
+        except Exception as e:
+            # Not negatively cached: the number may well exist
+            self.stats['db_lookup_errors'] += 1
+            print(f"⚠️  Number routing lookup failed for {key}: {e}")
+            return None
+        finally:
+            self.stats['db_lookup_seconds'] += time.monotonic() - started
+
+        if not rows:
+            self._unknown.set(key, True)
+            return None
+        route = self._route(rows[0], agents[0]['id'] if agents else None)
+        self._change(lambda routes, keys_by_id: self._put(routes, keys_by_id, route))
+        return self._routes.get(key, route)
+
+    def add(self, row: Dict, voice_agent_id: str = None):
+        """Route a newly purchased number (a purchased_phone_numbers row)"""
+        route = self._route(row, voice_agent_id)
+        self._unknown.invalidate(phone_normalizer.canonical_key(route['phone_number']))
+        self._change(lambda routes, keys_by_id: self._put(routes, keys_by_id, route))
+
+    def remove(self, phone_number_id: str):
+        """Stop routing a released number"""
+        def change(routes, keys_by_id):
+            key = keys_by_id.pop(phone_number_id, None)
+            if key is not None:
+                routes.pop(key, None)
+        self._change(change)
+
+    def assign_agent(self, phone_number_id: str, voice_agent_id: str):
+        """Point a number at a voice agent; the agent's previous number is left without one"""
+        def change(routes, keys_by_id):
+            for key, route in list(routes.items()):
+                if route['voice_agent_id'] == voice_agent_id and route['phone_number_id'] != phone_number_id:
+                    routes[key] = {**route, 'voice_agent_id': None}
+            key = keys_by_id.get(phone_number_id)
+            if key is not None:
+                routes[key] = {**routes[key], 'voice_agent_id': voice_agent_id}
+        self._change(change)
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'db_lookup_seconds': round(self.stats['db_lookup_seconds'], 3),
+                'warmed': self.warmed, 'unknown_cached': len(self._unknown)}
+
+
+# Global routing table (warm/refresh thread started by main)
+number_routing = NumberRoutingTable()
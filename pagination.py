@@ -0,0 +1,91 @@
+"""
+Keyset Pagination
+Cursor-based paging over (created_at, id) for PostgREST list endpoints.
+Pages are read with `order=created_at.desc.nullslast,id.desc` and a filter on
+the last row of the previous page, so page 500 costs the same index range scan
+as page 1 and no request holds more than one page of rows. Rows without a
+created_at sort after all dated rows and are paged by id; their cursors carry
+an explicit null.
+"""
+
+import os
+import json
+import base64
+from typing import Dict, List, Optional, Tuple
+from supabase_client import supabase_request
+
+DEFAULT_PAGE_SIZE = int(os.getenv('PAGE_SIZE_DEFAULT', '50'))
+MAX_PAGE_SIZE = int(os.getenv('PAGE_SIZE_MAX', '200'))
+
+
+def encode_cursor(row: Dict) -> str:
+    """Opaque cursor pointing just past row"""
+    raw = json.dumps([row.get('created_at'), row.get('id')], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[str], str]:
+    """(created_at or None, id) from a cursor; raises ValueError for anything malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not (created_at is None or isinstance(created_at, str)) or row_id is None:
+        raise ValueError('Invalid cursor')
+    return created_at, str(row_id)
+
+
+def parse_page_args(args) -> Tuple[Optional[str], int]:
+    """(cursor, limit) from request args; raises ValueError for a bad limit or cursor"""
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+
+    cursor = args.get('cursor') or None
+    if cursor:
+        decode_cursor(cursor)
+    return cursor, min(limit, MAX_PAGE_SIZE)
+
+
+def _quote(value: str) -> str:
+    # Timestamps contain ':' '+' '.' which PostgREST logic trees need quoted
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def keyset_params(cursor: Optional[str], limit: int) -> Dict[str, str]:
+    """PostgREST params selecting the page after cursor (one extra row to detect more)"""
+    params = {'order': 'created_at.desc.nullslast,id.desc', 'limit': str(limit + 1)}
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        if created_at is None:
+            # Already into the undated tail: only undated rows with a smaller id remain
+            params['and'] = f'(created_at.is.null,id.lt.{_quote(row_id)})'
+        else:
+            params['or'] = (f'(created_at.lt.{_quote(created_at)},'
+                            f'and(created_at.eq.{_quote(created_at)},id.lt.{_quote(row_id)}),'
+                            f'created_at.is.null)')
+    return params
+
+
+def fetch_page(endpoint: str, params: Dict, cursor: Optional[str], limit: int) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Read one page of endpoint
+
+    Args:
+        endpoint: table name (filters and select go in params)
+        params: PostgREST filters/select for the listing
+        cursor: cursor from the previous page, or None for the first page
+        limit: page size
+
+    Returns:
+        (rows, next_cursor); next_cursor is None on the last page
+    """
+    rows = supabase_request('GET', endpoint, params={**params, **keyset_params(cursor, limit)}) or []
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
@@ -0,0 +1,203 @@
+"""
+Password Hashing Service
+Runs bcrypt hashing/verification on a bounded process pool so login bursts do
+not tie up Flask worker threads, and rejects work fast when the queue is full
+"""
+
+import os
+import time
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict
+
+import bcrypt
+
+
+class HashingOverloadedError(Exception):
+    """Raised when the hashing queue is full; callers should answer 503"""
+
+
+def _bcrypt_hash(password: bytes, rounds: int):
+    """Worker: hash a password, returning (hash, seconds spent hashing)"""
+    start = time.perf_counter()
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+    return hashed, time.perf_counter() - start
+
+
+def _bcrypt_check(password: bytes, hashed: bytes):
+    """Worker: verify a password, returning (matches, seconds spent hashing)"""
+    start = time.perf_counter()
+    try:
+        matches = bcrypt.checkpw(password, hashed)
+    except ValueError:
+        matches = False
+    return matches, time.perf_counter() - start
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class PasswordHashingService:
+    """Bounded bcrypt process pool with queue-depth admission control and latency metrics"""
+
+    def __init__(self,
+                 max_workers: int = None,
+                 max_queue_depth: int = None,
+                 timeout: float = None,
+                 sample_size: int = 1000):
+        self.max_workers = max_workers or int(os.getenv('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+        self.max_queue_depth = max_queue_depth if max_queue_depth is not None else int(os.getenv('PASSWORD_HASH_QUEUE_DEPTH', '16'))
+        self.timeout = timeout or float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+
+        # Jobs admitted = running on a worker + waiting in the queue
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue_depth)
+        self._executor = None
+        self._executor_pid = None
+        self._broken_pools = 0
+        self._lock = threading.Lock()
+
+        self._hash_seconds = deque(maxlen=sample_size)
+        self._total_seconds = deque(maxlen=sample_size)
+        self._counters = {'hashed': 0, 'verified': 0, 'rejected': 0, 'errors': 0}
+        self._in_flight = 0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """
+        Process pool for the current gunicorn worker
+
+        Processes are spawned rather than forked from the threaded Flask worker.
+        Spawned children re-import a script __main__ as __mp_main__ (not under
+        `python -m gunicorn`), so module-level side effects must check __name__.
+        """
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+                    self._executor_pid = pid
+        return self._executor
+
+    @property
+    def inline(self) -> bool:
+        """True once the pool has failed to start repeatedly in this process"""
+        return self._broken_pools >= 3
+
+    def _reset_executor(self, broken: ProcessPoolExecutor):
+        """Drop a broken pool (once, however many callers saw it break) so the next call builds a new one"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._broken_pools += 1
+            self._executor = None
+            self._executor_pid = None
+        broken.shutdown(wait=False)
+
+    def _release_slot(self, _future=None):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _run(self, kind: str, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._counters['rejected'] += 1
+            raise HashingOverloadedError('Password hashing queue is full, please retry shortly')
+
+        start = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+        future = None
+        executor = None
+        try:
+            if self.inline:
+                result, hash_seconds = fn(*args)
+            else:
+                executor = self.executor
+                future = executor.submit(fn, *args)
+                # The slot stays taken until the process is done, not just until we stop waiting
+                future.add_done_callback(self._release_slot)
+                result, hash_seconds = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Drop it if it never reached a worker; otherwise its slot frees when it finishes
+            future.cancel()
+            with self._lock:
+                self._counters['errors'] += 1
+            raise HashingOverloadedError('Password hashing timed out, please retry shortly')
+        except BrokenProcessPool as e:
+            # A hashing process died: rebuild the pool next time, hash inline now
+            print(f"⚠️ Password hashing pool broken, hashing inline: {e}")
+            with self._lock:
+                self._counters['errors'] += 1
+            self._reset_executor(executor)
+            result, hash_seconds = fn(*args)
+        except Exception:
+            with self._lock:
+                self._counters['errors'] += 1
+            raise
+        finally:
+            if future is None:
+                self._release_slot()
+
+        with self._lock:
+            self._counters[kind] += 1
+            self._hash_seconds.append(hash_seconds)
+            self._total_seconds.append(time.perf_counter() - start)
+        return result
+
+    def hash_password(self, password: str, rounds: int = 12) -> str:
+        """Hash a password with bcrypt on the pool"""
+        return self._run('hashed', _bcrypt_hash, password.encode('utf-8'), rounds).decode('utf-8')
+
+    def verify_password(self, password: str, hashed: str) -> bool:
+        """Verify a password against a bcrypt hash on the pool"""
+        if not password or not hashed:
+            return False
+        return self._run('verified', _bcrypt_check, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def get_metrics(self) -> Dict:
+        """Counters plus hash (CPU) and end-to-end (queue + hash) latency in milliseconds"""
+        with self._lock:
+            hash_ms = [s * 1000 for s in self._hash_seconds]
+            total_ms = [s * 1000 for s in self._total_seconds]
+            counters = dict(self._counters)
+            in_flight = self._in_flight
+
+        return {
+            **counters,
+            'in_flight': in_flight,
+            'inline_fallback': self.inline,
+            'max_workers': self.max_workers,
+            'max_queue_depth': self.max_queue_depth,
+            'hash_latency_ms': {
+                'p50': round(_percentile(hash_ms, 50), 2),
+                'p99': round(_percentile(hash_ms, 99), 2)
+            },
+            'total_latency_ms': {
+                'p50': round(_percentile(total_ms, 50), 2),
+                'p99': round(_percentile(total_ms, 99), 2)
+            }
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            self._executor = None
+            self._executor_pid = None
+
+
+# Global instance shared by the auth managers
+password_hasher = PasswordHashingService()
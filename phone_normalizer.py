@@ -0,0 +1,218 @@
+"""
+Phone Number Normaliser
+One table-driven E.164 normaliser for imports, call dispatch, NLU entity
+extraction and webhook number matching. Country calling codes live in a digit
+trie (longest-prefix match, at most three steps), each with the national
+number lengths and trunk prefix of its numbering plan, so a raw number is
+classified without trying every country. The E.164 string it returns is the
+canonical key for cache lookups and the purchased_phone_numbers index.
+"""
+
+import os
+import re
+import string
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# calling code -> (region, min national length, max national length, trunk prefix)
+NUMBERING_PLANS = {
+    '1': ('US', 10, 10, '1'),
+    '7': ('RU', 10, 10, '8'),
+    '20': ('EG', 8, 10, '0'),
+    '27': ('ZA', 9, 9, '0'),
+    '30': ('GR', 10, 10, ''),
+    '31': ('NL', 9, 9, '0'),
+    '32': ('BE', 8, 9, '0'),
+    '33': ('FR', 9, 9, '0'),
+    '34': ('ES', 9, 9, ''),
+    '36': ('HU', 8, 9, '06'),
+    '39': ('IT', 6, 11, ''),
+    '40': ('RO', 9, 9, '0'),
+    '41': ('CH', 9, 9, '0'),
+    '43': ('AT', 4, 13, '0'),
+    '44': ('GB', 9, 10, '0'),
+    '45': ('DK', 8, 8, ''),
+    '46': ('SE', 7, 9, '0'),
+    '47': ('NO', 8, 8, ''),
+    '48': ('PL', 9, 9, ''),
+    '49': ('DE', 6, 13, '0'),
+    '52': ('MX', 10, 10, ''),
+    '55': ('BR', 10, 11, '0'),
+    '60': ('MY', 8, 10, '0'),
+    '61': ('AU', 9, 9, '0'),
+    '62': ('ID', 8, 12, '0'),
+    '63': ('PH', 10, 10, '0'),
+    '64': ('NZ', 8, 10, '0'),
+    '65': ('SG', 8, 8, ''),
+    '66': ('TH', 8, 9, '0'),
+    '81': ('JP', 9, 10, '0'),
+    '82': ('KR', 8, 10, '0'),
+    '84': ('VN', 9, 10, '0'),
+    '86': ('CN', 10, 11, '0'),
+    '90': ('TR', 10, 10, '0'),
+    '91': ('IN', 10, 10, '0'),
+    '92': ('PK', 9, 10, '0'),
+    '94': ('LK', 9, 9, '0'),
+    '225': ('CI', 10, 10, ''),
+    '234': ('NG', 8, 10, '0'),
+    '254': ('KE', 9, 9, '0'),
+    '351': ('PT', 9, 9, ''),
+    '353': ('IE', 7, 9, '0'),
+    '378': ('SM', 6, 12, ''),
+    '379': ('VA', 6, 11, ''),
+    '852': ('HK', 8, 8, ''),
+    '880': ('BD', 10, 10, '0'),
+    '886': ('TW', 8, 9, '0'),
+    '966': ('SA', 9, 9, '0'),
+    '971': ('AE', 8, 9, '0'),
+    '974': ('QA', 8, 8, ''),
+    '977': ('NP', 8, 10, '0'),
+}
+
+# Plans whose national numbers may begin with 0: the 0 is part of the number,
+# not a trunk prefix (Italian/Vatican fixed lines, San Marino, Cote d'Ivoire)
+NATIONAL_LEADING_ZERO = frozenset({'39', '225', '378', '379'})
+
+# Every other assigned calling code, validated only against the E.164 length limits
+OTHER_CALLING_CODES = (
+    ['51', '53', '54', '56', '57', '58', '93', '95', '98', '211', '212', '213', '216', '218']
+    + [str(code) for code in range(220, 234)] + [str(code) for code in range(235, 254)]
+    + [str(code) for code in range(255, 259)] + [str(code) for code in range(260, 270)]
+    + ['290', '291', '297', '298', '299', '350', '352', '354', '355', '356', '357', '358', '359']
+    + [str(code) for code in range(370, 384)] + ['385', '386', '387', '389', '420', '421', '423']
+    + [str(code) for code in range(500, 510)] + [str(code) for code in range(590, 600)]
+    + ['670'] + [str(code) for code in range(672, 693)]
+    + ['850', '853', '855', '856', '960', '961', '962', '963', '964', '965', '967', '968']
+    + ['970', '972', '973', '975', '976', '992', '993', '994', '995', '996', '998']
+)
+GENERIC_PLAN = (None, 4, 12, '0')
+
+# Prefixes for dialling out of a region (longest first)
+INTERNATIONAL_PREFIXES = {'US': ('011',), 'default': ('00',)}
+
+# Candidate phone numbers in free text: optional +/00, digits with common separators
+PHONE_CANDIDATE_PATTERN = r'(?<![\w+])(?:\+|00)?\d(?:[\s\-.()]{0,2}\d){6,16}(?!\w)'
+
+_EXTENSION = re.compile(r'\s*(?:;ext=|ext\.?|x|#)\s*\d{1,6}\s*$', re.IGNORECASE)
+_CANDIDATE = re.compile(PHONE_CANDIDATE_PATTERN)
+_ASCII_NON_DIGITS = str.maketrans('', '', ''.join(chr(c) for c in range(128) if chr(c) not in string.digits))
+
+
+def _build_trie() -> Dict:
+    trie = {}
+    plans = {code: plan for code, plan in NUMBERING_PLANS.items()}
+    for code in OTHER_CALLING_CODES:
+        plans.setdefault(code, GENERIC_PLAN)
+    for code, plan in plans.items():
+        node = trie
+        for digit in code:
+            node = node.setdefault(digit, {})
+        node[None] = (code, plan)
+    return trie
+
+
+def _digits(raw: str) -> str:
+    digits = raw.translate(_ASCII_NON_DIGITS)
+    if digits.isascii():
+        return digits
+    # Non-ASCII text (e.g. Devanagari digits in a transcript)
+    return ''.join(str(unicodedata.decimal(char)) for char in digits if char.isdecimal())
+
+
+class PhoneNormalizer:
+    """E.164 normalisation, validation and country lookup against the numbering-plan trie"""
+
+    def __init__(self, default_region: str = None):
+        self.trie = _build_trie()
+        self.region_codes = {plan[0]: code for code, plan in NUMBERING_PLANS.items()}
+        self.region_codes['CA'] = '1'
+        self.default_region = (default_region or os.getenv('PHONE_DEFAULT_REGION', 'IN')).upper()
+
+    def split(self, digits: str) -> Optional[Tuple[str, str, Tuple]]:
+        """(calling code, national number, plan) for international digits, by longest calling-code prefix"""
+        node = self.trie
+        match = None
+        for digit in digits[:3]:
+            node = node.get(digit)
+            if node is None:
+                break
+            match = node.get(None, match)
+        if not match:
+            return None
+        code, plan = match
+        return code, digits[len(code):], plan
+
+    def _valid(self, digits: str) -> bool:
+        parts = self.split(digits)
+        if not parts or len(digits) > 15:
+            return False
+        code, national, (_, min_length, max_length, _) = parts
+        if not min_length <= len(national) <= max_length:
+            return False
+        return national[:1] != '0' or code in NATIONAL_LEADING_ZERO
+
+    def normalize(self, raw, region: str = None) -> Optional[str]:
+        """E.164 form of raw (str or int), or None when it isn't a valid number"""
+        if raw is None:
+            return None
+        text = _EXTENSION.sub('', str(raw).strip())
+        if not text:
+            return None
+        digits = _digits(text)
+        if not digits:
+            return None
+        if text.startswith('+'):
+            return f'+{digits}' if self._valid(digits) else None
+
+        region = (region or self.default_region).upper()
+        for prefix in INTERNATIONAL_PREFIXES.get(region, INTERNATIONAL_PREFIXES['default']):
+            if digits.startswith(prefix):
+                international = digits[len(prefix):]
+                return f'+{international}' if self._valid(international) else None
+
+        code = self.region_codes.get(region)
+        if code:
+            min_length, max_length, trunk = NUMBERING_PLANS[code][1:]
+            national = digits[len(trunk):] if trunk and digits.startswith(trunk) else digits
+            if min_length <= len(national) <= max_length and self._valid(code + national):
+                return f'+{code}{national}'
+            if min_length <= len(digits) <= max_length and self._valid(code + digits):
+                return f'+{code}{digits}'
+        # Already international, just missing the '+'
+        return f'+{digits}' if self._valid(digits) else None
+
+    def normalize_many(self, values: Iterable, region: str = None) -> List[Optional[str]]:
+        """normalize() for a batch; repeated raw values are only parsed once"""
+        normalize = self.normalize
+        seen = {}
+        results = []
+        for value in values:
+            if value in seen:
+                results.append(seen[value])
+                continue
+            result = normalize(value, region)
+            if isinstance(value, (str, int)):
+                seen[value] = result
+            results.append(result)
+        return results
+
+    def canonical_key(self, raw, region: str = None) -> str:
+        """Cache/index key: the E.164 form, or the bare digits when raw isn't a valid number"""
+        return self.normalize(raw, region) or _digits(str(raw or ''))
+
+    def region_of(self, e164: str) -> Optional[str]:
+        parts = self.split(e164.lstrip('+')) if e164 else None
+        return parts[2][0] if parts else None
+
+    def find_numbers(self, text: str, region: str = None) -> List[str]:
+        """Valid numbers mentioned in free text, E.164, in order of appearance"""
+        found = []
+        for match in _CANDIDATE.finditer(text or ''):
+            number = self.normalize(match.group(0), region)
+            if number and number not in found:
+                found.append(number)
+        return found
+
+
+# Global normaliser (default region from PHONE_DEFAULT_REGION)
+phone_normalizer = PhoneNormalizer()
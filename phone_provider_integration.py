@@ -4,10 +4,17 @@ Handles phone number operations across multiple providers (Plivo, Twilio, Telnyx
 """
 
 import os
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from itertools import islice
 from typing import Dict, List, Optional
 from plivo_integration import PlivoAPI
 from twilio_integration import TwilioAPI
 from telnyx_integration import TelnyxAPI
+from provider_health import ProviderHealth
+from ttl_cache import TTLCache
 
 
 class PhoneProviderManager:
@@ -24,6 +31,26 @@ class PhoneProviderManager:
         self.available_providers = {}
         for name, provider in self.providers.items():
             self.available_providers[name] = not getattr(provider, 'use_mock', True)
+
+        # Live health (latency/error EWMAs + circuit breaker), fed by each provider's HTTP session
+        self.health = {name: ProviderHealth(name) for name in self.providers}
+        for name, provider in self.providers.items():
+            if getattr(provider, 'http', None) is not None:
+                provider.http.health = self.health[name]
+
+        # Multi-provider search: per-provider deadline (PHONE_SEARCH_TIMEOUT_<PROVIDER> overrides)
+        # and a short-lived cache of merged results
+        self.search_timeout = float(os.getenv('PHONE_SEARCH_TIMEOUT', '4'))
+        self.search_timeouts = {
+            name: float(os.getenv(f'PHONE_SEARCH_TIMEOUT_{name.upper()}', self.search_timeout))
+            for name in self.providers
+        }
+        # A degraded (slow or flaky) provider only gets this long before the merge goes ahead without it
+        self.degraded_search_timeout = float(os.getenv('PHONE_SEARCH_DEGRADED_TIMEOUT', '1'))
+        self.search_cache = TTLCache(maxsize=512, ttl=float(os.getenv('PHONE_SEARCH_CACHE_TTL', '60')))
+        self._search_executor = None
+        self._search_executor_pid = None
+        self._lock = threading.Lock()
     
     def get_provider(self, provider_name: str):
         """Get provider instance by name"""
@@ -31,6 +58,30 @@ class PhoneProviderManager:
         if not provider:
             raise ValueError(f"Unsupported provider: {provider_name}. Supported: plivo, twilio, telnyx")
         return provider
+
+    def _circuit_open(self, provider_name: str) -> Optional[Dict]:
+        """Fail-fast error when the provider's circuit is open, None when the call may go ahead"""
+        health = self.health.get((provider_name or '').lower())
+        if health is None or health.allow():
+            return None
+        return {
+            'success': False,
+            'error': f'{provider_name} is temporarily unavailable (circuit open, last error: {health.last_error})',
+            'circuit_open': True
+        }
+
+    def rank_providers(self, candidates: List[str] = None) -> List[str]:
+        """
+        Providers healthiest first: open circuits dropped, providers with
+        real credentials ahead of mock ones, then by latency/error score
+        """
+        names = [name.lower() for name in candidates] if candidates else list(self.providers)
+        usable = [name for name in names if name in self.health and self.health[name].available()]
+        return sorted(usable, key=lambda name: (not self.available_providers.get(name), self.health[name].score()))
+
+    def healthiest_provider(self, candidates: List[str] = None) -> Optional[str]:
+        ranked = self.rank_providers(candidates)
+        return ranked[0] if ranked else None
     
     def search_phone_numbers(self, 
                            provider_name: str,
@@ -51,6 +102,12 @@ class PhoneProviderManager:
         Returns:
             Dict with available phone numbers
         """
+        blocked = self._circuit_open(provider_name)
+        if blocked:
+            return {**blocked, 'available_numbers': []}
+        return self._search_provider(provider_name, country_code, pattern, region, limit)
+
+    def _search_provider(self, provider_name: str, country_code: str, pattern: str, region: str, limit: int) -> Dict:
         try:
             provider = self.get_provider(provider_name)
             
@@ -105,6 +162,102 @@ class PhoneProviderManager:
                 'available_numbers': []
             }
     
+    def _executor(self) -> ThreadPoolExecutor:
+        # Created lazily so each forked worker gets its own threads
+        with self._lock:
+            if self._search_executor is None or self._search_executor_pid != os.getpid():
+                self._search_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('PHONE_SEARCH_WORKERS', '16')),
+                    thread_name_prefix='phone-search')
+                self._search_executor_pid = os.getpid()
+            return self._search_executor
+
+    def search_all_providers(self,
+                             providers: List[str],
+                             country_code: str = 'US',
+                             area_code: str = None,
+                             pattern: str = None,
+                             capabilities: List[str] = None,
+                             limit: int = 20,
+                             use_cache: bool = True) -> Dict:
+        """
+        Search several providers concurrently and merge their numbers by monthly cost
+
+        Each provider gets its own deadline, cut to degraded_search_timeout
+        while it is slow or flaky; one that misses it is reported in
+        providers_failed instead of holding up the response (its request keeps
+        running in the background until the HTTP timeout). Providers whose
+        circuit is open are skipped without a request.
+
+        Returns:
+            Dict with available_numbers (cheapest first, at most limit),
+            total_found, providers_searched, providers_failed and cached
+        """
+        wanted = tuple(sorted({c.strip().lower() for c in capabilities or [] if c.strip()}))
+        cache_key = (country_code.upper(), area_code or '', pattern or '', wanted, tuple(providers), limit)
+        cached = self.search_cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            return {**cached, 'cached': True}
+
+        started = time.monotonic()
+        futures = {}
+        failed = {}
+        for name in providers:
+            blocked = self._circuit_open(name)
+            if blocked:
+                failed[name] = 'circuit open'
+                continue
+            futures[name] = self._executor().submit(self._search_provider, name, country_code,
+                                                    area_code or pattern, None, limit)
+
+        per_provider = []
+        for name, future in futures.items():
+            deadline = self.search_timeouts.get(name.lower(), self.search_timeout)
+            health = self.health.get(name.lower())
+            if health is not None and health.is_degraded(deadline):
+                deadline = min(deadline, self.degraded_search_timeout)
+            remaining = started + deadline - time.monotonic()
+            try:
+                result = future.result(timeout=max(0.0, remaining))
+            except FutureTimeoutError:
+                failed[name] = 'timeout'
+                if health is not None:
+                    # Push the latency EWMA up now; the outcome is recorded when the request finishes
+                    health.observe_latency(time.monotonic() - started)
+                continue
+            except Exception as e:
+                failed[name] = str(e)
+                continue
+            if not result.get('success'):
+                failed[name] = result.get('error', 'search failed')
+                continue
+
+            numbers = []
+            for number in result.get('available_numbers', []):
+                number['provider'] = name
+                number_capabilities = number.get('capabilities') or {}
+                if any(not number_capabilities.get(capability) for capability in wanted):
+                    continue
+                if area_code and pattern and pattern not in number.get('phone_number', ''):
+                    continue
+                numbers.append(number)
+            numbers.sort(key=lambda number: number.get('monthly_cost', 999))
+            per_provider.append(numbers)
+
+        merged = list(heapq.merge(*per_provider, key=lambda number: number.get('monthly_cost', 999)))
+        response = {
+            'success': bool(per_provider) or not providers,
+            'available_numbers': list(islice(merged, limit)),
+            'total_found': len(merged),
+            'providers_searched': list(providers),
+            'providers_failed': failed
+        }
+        if per_provider:
+            # Partial results are kept briefly so a recovered provider is asked again soon
+            ttl = self.search_cache.ttl if not failed else self.search_cache.ttl / 4
+            self.search_cache.set(cache_key, response, ttl=ttl)
+        return {**response, 'cached': False}
+
     def purchase_phone_number(self, 
                             provider_name: str,
                             phone_number: str,
@@ -120,6 +273,10 @@ class PhoneProviderManager:
         Returns:
             Dict with purchase result
         """
+        blocked = self._circuit_open(provider_name)
+        if blocked:
+            return blocked
+
         try:
             provider = self.get_provider(provider_name)
             
@@ -165,6 +322,10 @@ class PhoneProviderManager:
         Returns:
             Dict with release result
         """
+        blocked = self._circuit_open(provider_name)
+        if blocked:
+            return blocked
+
         try:
             provider = self.get_provider(provider_name)
             
@@ -199,6 +360,10 @@ class PhoneProviderManager:
         Returns:
             Dict with phone number details
         """
+        blocked = self._circuit_open(provider_name)
+        if blocked:
+            return blocked
+
         try:
             provider = self.get_provider(provider_name)
             
@@ -255,17 +420,28 @@ class PhoneProviderManager:
     
     def get_provider_status(self) -> Dict:
         """
-        Get status of all providers (whether they have valid credentials)
+        Get status of all providers: credentials, live health and routing rank
         
         Returns:
             Dict with provider status information
         """
+        ranked = self.rank_providers()
         status = {}
-        for name, available in self.available_providers.items():
+        for name, has_credentials in self.available_providers.items():
+            health = self.health[name]
+            if not health.available():
+                state = 'unavailable'
+            elif health.is_degraded(self.search_timeouts.get(name, self.search_timeout)):
+                state = 'degraded'
+            else:
+                state = 'healthy'
             status[name] = {
-                'available': available,
-                'has_credentials': available,
-                'mock_mode': not available
+                'available': has_credentials and health.available(),
+                'has_credentials': has_credentials,
+                'mock_mode': not has_credentials,
+                'status': state,
+                'rank': ranked.index(name) + 1 if name in ranked else None,
+                'health': health.snapshot()
             }
         return status
     
@@ -8,6 +8,7 @@ import requests
 import json
 from typing import List, Dict, Optional
 from datetime import datetime, timezone
+from provider_http import ProviderSession
 
 
 class PlivoAPI:
@@ -23,6 +24,9 @@ class PlivoAPI:
             self.use_mock = True
         else:
             self.use_mock = False
+
+        # Keep-alive pool shared by this provider's requests
+        self.http = ProviderSession()
     
     def _make_request(self, method: str, endpoint: str, data: Dict = None) -> Dict:
         """Make authenticated request to Plivo API"""
@@ -35,11 +39,11 @@ class PlivoAPI:
         
         try:
             if method == 'GET':
-                response = requests.get(url, headers=headers, auth=auth, params=data)
+                response = self.http.request('GET', url, headers=headers, auth=auth, params=data)
             elif method == 'POST':
-                response = requests.post(url, headers=headers, auth=auth, json=data)
+                response = self.http.request('POST', url, headers=headers, auth=auth, json=data)
             elif method == 'DELETE':
-                response = requests.delete(url, headers=headers, auth=auth)
+                response = self.http.request('DELETE', url, headers=headers, auth=auth)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
@@ -0,0 +1,128 @@
+"""
+Phone Provider Health
+Per-provider latency and error-rate EWMAs with a circuit breaker, used by
+PhoneProviderManager to skip providers that are failing, cut slow ones off
+early and route searches to whichever provider is currently healthiest.
+"""
+
+import os
+import time
+import threading
+from typing import Dict
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ProviderHealth:
+    """Rolling health of one provider API, updated after every call"""
+
+    def __init__(self, name: str, alpha: float = None, failure_threshold: int = None,
+                 error_rate_threshold: float = None, min_calls: int = None, cooldown: float = None):
+        self.name = name
+        self.alpha = alpha or float(os.getenv('PHONE_PROVIDER_HEALTH_ALPHA', '0.2'))
+        # Open after this many failures in a row, or once the error EWMA passes the rate
+        self.failure_threshold = failure_threshold or int(os.getenv('PHONE_PROVIDER_CIRCUIT_FAILURES', '5'))
+        self.error_rate_threshold = error_rate_threshold or float(os.getenv('PHONE_PROVIDER_CIRCUIT_ERROR_RATE', '0.5'))
+        self.min_calls = min_calls or int(os.getenv('PHONE_PROVIDER_CIRCUIT_MIN_CALLS', '10'))
+        # How long an open circuit waits before letting a single probe call through
+        self.cooldown = cooldown or float(os.getenv('PHONE_PROVIDER_CIRCUIT_COOLDOWN', '30'))
+
+        self.state = CLOSED
+        self.latency_ms = None  # EWMA, None until the first call
+        self.error_rate = 0.0  # EWMA of failures (0..1)
+        self.consecutive_failures = 0
+        self.calls = 0
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self._probe_in_flight = False
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go to this provider now (an open circuit admits one probe after the cooldown)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN:
+                # A probe that never reported back doesn't keep the circuit half-open forever
+                now = time.monotonic()
+                if not self._probe_in_flight or now - self._probe_started >= self.cooldown:
+                    self._probe_in_flight = True
+                    self._probe_started = now
+                    return True
+            return False
+
+    def available(self) -> bool:
+        """Whether allow() could admit a call now, without claiming the half-open probe"""
+        return self.state != OPEN or time.monotonic() - self.opened_at >= self.cooldown
+
+    def record(self, latency: float, ok: bool, error: str = None):
+        """Fold one call (latency in seconds) into the EWMAs and move the breaker"""
+        with self._lock:
+            self.calls += 1
+            latency_ms = latency * 1000
+            if self.latency_ms is None:
+                self.latency_ms = latency_ms
+            else:
+                self.latency_ms += self.alpha * (latency_ms - self.latency_ms)
+            self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+
+            if ok:
+                self.consecutive_failures = 0
+                if self.state != CLOSED:
+                    print(f"✅ Phone provider {self.name} recovered, circuit closed")
+                self.state = CLOSED
+                self._probe_in_flight = False
+                return
+
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = error
+            tripped = (self.consecutive_failures >= self.failure_threshold or
+                       (self.calls >= self.min_calls and self.error_rate >= self.error_rate_threshold))
+            if self.state == HALF_OPEN or (self.state == CLOSED and tripped):
+                if self.state == CLOSED:
+                    print(f"⚠️  Phone provider {self.name} circuit opened: {error}")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def observe_latency(self, latency: float):
+        """A latency lower bound without an outcome yet (a call still running past its search deadline)"""
+        with self._lock:
+            latency_ms = latency * 1000
+            self.latency_ms = latency_ms if self.latency_ms is None else (
+                self.latency_ms + self.alpha * (latency_ms - self.latency_ms))
+
+    def is_degraded(self, deadline: float) -> bool:
+        """Failing often or running close to its deadline, though not bad enough to open"""
+        return self.error_rate >= self.error_rate_threshold / 2 or (
+            self.latency_ms is not None and self.latency_ms >= deadline * 1000 / 2)
+
+    def score(self) -> float:
+        """Routing cost, lower is better; an open circuit sorts last"""
+        if not self.available():
+            return float('inf')
+        latency_ms = self.latency_ms if self.latency_ms is not None else 0.0
+        return latency_ms * (1 + 4 * self.error_rate) + 1000 * self.error_rate
+
+    def snapshot(self) -> Dict:
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = round(max(0.0, self.cooldown - (time.monotonic() - self.opened_at)), 1)
+        return {
+            'circuit': self.state,
+            'latency_ms': round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            'error_rate': round(self.error_rate, 3),
+            'consecutive_failures': self.consecutive_failures,
+            'calls': self.calls,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'retry_in_seconds': retry_in
+        }
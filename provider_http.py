@@ -0,0 +1,62 @@
+"""
+Phone Provider HTTP Sessions
+Keep-alive, pooled HTTP sessions with (connect, read) timeouts for the
+Twilio, Telnyx and Plivo REST APIs, rebuilt per forked gunicorn worker.
+Every request is reported to the provider's ProviderHealth when one is attached.
+"""
+
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ProviderSession:
+    """Per-worker pooled session for one provider API"""
+
+    def __init__(self, pool_maxsize: int = None, connect_timeout: float = None, read_timeout: float = None):
+        self.pool_maxsize = pool_maxsize or int(os.getenv('PHONE_PROVIDER_POOL_MAXSIZE', '10'))
+        self.connect_timeout = connect_timeout or float(os.getenv('PHONE_PROVIDER_CONNECT_TIMEOUT', '3.05'))
+        self.read_timeout = read_timeout or float(os.getenv('PHONE_PROVIDER_READ_TIMEOUT', '10'))
+
+        # Set by PhoneProviderManager; transport errors, 5xx and 429 count as failures
+        self.health = None
+
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    @property
+    def session(self) -> requests.Session:
+        """Keep-alive session for the current worker process (rebuilt after a fork)"""
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            with self._lock:
+                if self._session is None or self._session_pid != pid:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+                    self._session_pid = pid
+        return self._session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        started = time.monotonic()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if self.health is not None:
+                self.health.record(time.monotonic() - started, ok=False, error=str(e))
+            raise
+        if self.health is not None:
+            # A 4xx is the caller's problem (number taken, bad filter), not the provider's
+            ok = response.status_code < 500 and response.status_code != 429
+            self.health.record(time.monotonic() - started, ok=ok, error=None if ok else f'HTTP {response.status_code}')
+        return response
@@ -2,4 +2,6 @@
 echo "Starting bhashai.com on port $PORT"
 echo "Using full app with JS fixes and debug route..."
 
+# Single worker: campaign call quotas (LiveCallTracker) live in process memory,
+# gunicorn.conf.py refuses to start more workers while the campaign worker is on
 python3 -m gunicorn main:app --bind 0.0.0.0:$PORT --timeout 120 --log-level info --workers 1
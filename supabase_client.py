@@ -0,0 +1,184 @@
+"""
+Supabase Data Access Client
+Pooled, keep-alive HTTP session layer for the Supabase PostgREST API
+"""
+
+import os
+import threading
+import requests
+from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class SupabaseClient:
+    """Shared PostgREST client with per-worker connection pooling and timeouts"""
+
+    def __init__(self,
+                 url: str = None,
+                 service_key: str = None,
+                 pool_connections: int = None,
+                 pool_maxsize: int = None,
+                 connect_timeout: float = None,
+                 read_timeout: float = None):
+        self.url = url or os.getenv('SUPABASE_URL')
+        self.service_key = service_key or os.getenv('SUPABASE_SERVICE_KEY')
+
+        # Pool sizing and timeouts (no timeout at all used to be the default)
+        self.pool_connections = pool_connections or int(os.getenv('SUPABASE_POOL_CONNECTIONS', '10'))
+        self.pool_maxsize = pool_maxsize or int(os.getenv('SUPABASE_POOL_MAXSIZE', '20'))
+        self.connect_timeout = connect_timeout or float(os.getenv('SUPABASE_CONNECT_TIMEOUT', '3.05'))
+        self.read_timeout = read_timeout or float(os.getenv('SUPABASE_READ_TIMEOUT', '15'))
+
+        self.available = bool(self.url and self.service_key)
+        self.headers = {}
+        if self.available:
+            self.headers = {
+                'apikey': self.service_key,
+                'Authorization': f'Bearer {self.service_key}',
+                'Content-Type': 'application/json'
+            }
+
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self):
+        """(connect, read) timeout tuple passed to every request"""
+        return (self.connect_timeout, self.read_timeout)
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        Keep-alive session for the current worker process.
+
+        Gunicorn forks workers after import, so the session is rebuilt when the
+        pid changes instead of sharing sockets with the parent process.
+        """
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            with self._lock:
+                if self._session is None or self._session_pid != pid:
+                    self._session = self._build_session()
+                    self._session_pid = pid
+        return self._session
+
+    def _build_session(self) -> requests.Session:
+        """Create a session with a sized connection pool mounted for http and https"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def rest_url(self, endpoint: str) -> str:
+        """Build the PostgREST URL for a table, view or rpc endpoint"""
+        return f"{self.url}/rest/v1/{endpoint.lstrip('/')}"
+
+    def request(self,
+                method: str,
+                endpoint: str,
+                data=None,
+                params: Dict = None,
+                headers: Dict = None,
+                timeout=None) -> requests.Response:
+        """
+        Send a request to the Supabase REST API over the pooled session
+
+        Args:
+            method: HTTP method ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+            endpoint: PostgREST path, optionally with a query string
+            data: JSON body for write requests
+            params: Query parameters
+            headers: Headers to use instead of the client defaults
+            timeout: Override for the (connect, read) timeout
+
+        Returns:
+            requests.Response (callers decide how to treat the status code)
+        """
+        method = method.upper()
+        if method not in ('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        return self.session.request(
+            method,
+            self.rest_url(endpoint),
+            headers=headers if headers is not None else self.headers,
+            params=params,
+            json=data if method in ('POST', 'PUT', 'PATCH') else None,
+            timeout=timeout or self.timeout
+        )
+
+    def get(self, endpoint: str, params: Dict = None, **kwargs) -> requests.Response:
+        return self.request('GET', endpoint, params=params, **kwargs)
+
+    def post(self, endpoint: str, data=None, **kwargs) -> requests.Response:
+        return self.request('POST', endpoint, data=data, **kwargs)
+
+    def count(self, endpoint: str, params: Dict = None, method: str = 'exact') -> Optional[int]:
+        """
+        Number of rows matching a filter, without transferring them
+
+        Sends a HEAD request with `Prefer: count=<method>` ('exact', 'planned' or
+        'estimated') and reads the total from the Content-Range header ('*/42').
+        Returns None if the count is unavailable.
+        """
+        if not self.available:
+            return None
+        try:
+            response = self.request('HEAD', endpoint, params=params,
+                                    headers={**self.headers, 'Prefer': f'count={method}'})
+            response.raise_for_status()
+            total = response.headers.get('Content-Range', '').rsplit('/', 1)[-1]
+            return int(total) if total.isdigit() else None
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"⚠️  Supabase count failed ({endpoint}): {e}")
+            return None
+
+    def patch(self, endpoint: str, data=None, **kwargs) -> requests.Response:
+        return self.request('PATCH', endpoint, data=data, **kwargs)
+
+    def delete(self, endpoint: str, **kwargs) -> requests.Response:
+        return self.request('DELETE', endpoint, **kwargs)
+
+    def close(self):
+        """Close pooled connections held by this worker"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._session_pid = None
+
+
+# Global instance shared by main, auth and middleware modules
+supabase_client = SupabaseClient()
+
+
+def supabase_request(method, endpoint, data=None, params=None):
+    """Make a request to Supabase REST API with graceful error handling"""
+    # Check if Supabase is available
+    if not supabase_client.available:
+        print(f"⚠️  Supabase not available - {method} request to {endpoint} skipped")
+        return [] if method == 'GET' else None
+
+    try:
+        # Pooled keep-alive session with connect/read timeouts
+        response = supabase_client.request(method, endpoint, data=data, params=params,
+                                           headers={**supabase_client.headers, 'Prefer': 'return=representation'})
+
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️  Supabase API error ({method} {endpoint}): {e}")
+        if hasattr(e, 'response') and e.response is not None:
+            print(f"   Response content: {e.response.text}")
+        # Return empty data instead of raising exception
+        return [] if method == 'GET' else None
+    except Exception as e:
+        print(f"⚠️  Unexpected error in supabase_request: {e}")
+        return [] if method == 'GET' else None
@@ -8,6 +8,7 @@ import requests
 import json
 from typing import List, Dict, Optional
 from datetime import datetime, timezone
+from provider_http import ProviderSession
 
 
 class TelnyxAPI:
@@ -22,6 +23,9 @@ class TelnyxAPI:
             self.use_mock = True
         else:
             self.use_mock = False
+
+        # Keep-alive pool shared by this provider's requests
+        self.http = ProviderSession()
     
     def _make_request(self, method: str, endpoint: str, data: Dict = None) -> Dict:
         """Make authenticated request to Telnyx API"""
@@ -36,11 +40,11 @@ class TelnyxAPI:
         
         try:
             if method == 'GET':
-                response = requests.get(url, headers=headers, params=data)
+                response = self.http.request('GET', url, headers=headers, params=data)
             elif method == 'POST':
-                response = requests.post(url, headers=headers, json=data)
+                response = self.http.request('POST', url, headers=headers, json=data)
             elif method == 'DELETE':
-                response = requests.delete(url, headers=headers)
+                response = self.http.request('DELETE', url, headers=headers)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
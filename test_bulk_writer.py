@@ -0,0 +1,127 @@
+import requests
+
+from bulk_writer import BulkWriter, bulk_write, write_isolating, bulk_write_status, chunk_rows, retryable_status
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f'{self.status_code} error', response=self)
+
+
+class FakeClient:
+    """Records each POSTed chunk; fails the request numbered fail_at with status (None: no response)
+    and answers 400 to any chunk holding a row whose id is in bad_ids"""
+
+    available = True
+    headers = {}
+
+    def __init__(self, fail_at=None, status=None, bad_ids=()):
+        self.fail_at = fail_at
+        self.status = status
+        self.bad_ids = set(bad_ids)
+        self.chunks = []
+
+    def post(self, endpoint, data=None, headers=None):
+        if len(self.chunks) == self.fail_at:
+            self.fail_at = None
+            if self.status is None:
+                raise requests.exceptions.ConnectionError('connection reset')
+            return FakeResponse(self.status)
+        if any(row['id'] in self.bad_ids for row in data):
+            return FakeResponse(400)
+        self.chunks.append((endpoint, headers.get('Prefer'), data))
+        return FakeResponse(201)
+
+
+def rows(count, **extra):
+    return [{'id': i, 'name': f'row {i}', **extra} for i in range(count)]
+
+
+def test_chunk_by_rows():
+    """Chunks hold at most max_rows rows, in order"""
+    chunks = list(chunk_rows(rows(7), max_rows=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert [row['id'] for chunk in chunks for row in chunk] == list(range(7))
+
+
+def test_chunk_by_bytes():
+    """Chunks stay under max_bytes, and an oversized row goes on its own"""
+    big = {'id': 99, 'name': 'x' * 500}
+    chunks = list(chunk_rows(rows(2) + [big] + rows(2), max_rows=100, max_bytes=200))
+    assert [len(chunk) for chunk in chunks] == [2, 1, 2]
+
+
+def test_chunk_by_keys():
+    """Rows with different keys never share a chunk"""
+    mixed = rows(2) + rows(2, status='active') + rows(1)
+    assert [len(chunk) for chunk in chunk_rows(mixed, max_rows=100)] == [2, 2, 1]
+
+
+def test_bulk_write_upsert_headers():
+    """on_conflict turns the insert into a merge-duplicates upsert"""
+    client = FakeClient()
+    assert bulk_write('contacts', rows(5), on_conflict='phone', client=client, max_rows=2) == 5
+    endpoint, prefer, _ = client.chunks[0]
+    assert endpoint == 'contacts?on_conflict=phone'
+    assert prefer == 'resolution=merge-duplicates,return=minimal'
+    assert len(client.chunks) == 3
+
+
+def test_failed_chunk_stops_at_prefix():
+    """A failed chunk stops the write; the return value is the prefix written"""
+    client = FakeClient(fail_at=1, status=500)
+    assert bulk_write('call_logs', rows(7), client=client, max_rows=3) == 3
+    assert len(client.chunks) == 1
+
+
+def test_failure_status():
+    """bulk_write_status reports the failing HTTP status, or None when there was no response"""
+    assert bulk_write_status('call_logs', rows(4), client=FakeClient(fail_at=0, status=422), max_rows=2) == (0, 422)
+    assert bulk_write_status('call_logs', rows(4), client=FakeClient(fail_at=1), max_rows=2) == (2, None)
+    assert bulk_write_status('call_logs', rows(4), client=FakeClient(), max_rows=2) == (4, None)
+    assert [retryable_status(status) for status in (None, 408, 429, 503, 400, 409)] == [
+        True, True, True, True, False, False]
+
+
+def test_write_isolating_skips_rejected_rows():
+    """A 400 row is isolated by halving its chunk; every other row is written"""
+    client = FakeClient(bad_ids={5})
+    written, _, retry, rejected = write_isolating('call_logs', rows(8), client=client, max_rows=8)
+    assert written == 7
+    assert retry == [] and rejected == [(5, 400)]
+    assert sorted(row['id'] for _, _, chunk in client.chunks for row in chunk) == [0, 1, 2, 3, 4, 6, 7]
+
+
+def test_write_isolating_stops_on_retryable_failure():
+    """After a 503 nothing more is sent and the unwritten rows are left for retry"""
+    client = FakeClient(fail_at=1, status=503)
+    written, _, retry, rejected = write_isolating('call_logs', rows(6), client=client, max_rows=2)
+    assert (written, retry, rejected) == (2, [2, 3, 4, 5], [])
+
+
+def test_buffer_drops_rejected_row():
+    """BulkWriter writes the rest of a buffer around a rejected row instead of requeueing it"""
+    client = FakeClient(bad_ids={2})
+    writer = BulkWriter(client=client, flush_interval=60, max_rows=10)
+    for row in rows(5):
+        writer.add('activity_logs', row)
+    assert writer.flush() == 4
+    assert writer.pending() == 0
+    assert writer.stats['rejected'] == 1
+    assert writer.flush() == 0
+
+
+def test_buffer_requeues_retryable_failure():
+    """Rows that fail with a 5xx stay queued, in order, for the next flush"""
+    client = FakeClient(fail_at=0, status=502)
+    writer = BulkWriter(client=client, flush_interval=60, max_rows=10)
+    for row in rows(3):
+        writer.add('activity_logs', row)
+    assert writer.flush() == 0
+    assert writer.pending() == 3
+    assert writer.flush() == 3
+    assert [row['id'] for _, _, chunk in client.chunks for row in chunk] == [0, 1, 2]
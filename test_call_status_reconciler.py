@@ -0,0 +1,111 @@
+import copy
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import call_status_reconciler as reconciler_module
+from call_status_reconciler import CallStatusReconciler
+
+
+class FakeCallLogs:
+    """Shared call_logs table; PATCH applies only where the last_status_check filter still matches"""
+
+    def __init__(self, rows):
+        self.rows = {row['id']: row for row in rows}
+        self.claims = 0
+
+    def request(self, method, endpoint, data=None, params=None):
+        if method == 'GET':
+            return [copy.deepcopy(row) for row in self.rows.values()]
+        row = self.rows.get(params['id'][len('eq.'):])
+        expected = params['metadata->>last_status_check']
+        current = row['metadata'].get('last_status_check') if row else None
+        if row is None or expected != (f'eq.{current}' if current else 'is.null'):
+            return []
+        row.update(copy.deepcopy(data))
+        self.claims += 1
+        return [copy.deepcopy(row)]
+
+
+class FakeWriter:
+    batch_size = 50
+
+    def __init__(self):
+        self.events = []
+
+    def pending_event(self, call_id):
+        return None
+
+    def submit(self, event):
+        self.events.append(event)
+
+    def flush(self):
+        return len(self.events)
+
+
+class FakeBolna:
+    def __init__(self, status='completed'):
+        self.status = status
+        self.calls = []
+
+    def get_call_status(self, call_id):
+        self.calls.append(call_id)
+        return {'status': self.status, 'duration': 42}
+
+
+def call_log(row_id, call_id, age_seconds=60):
+    created_at = datetime.now(timezone.utc) - timedelta(seconds=age_seconds)
+    return {'id': row_id, 'status': 'initiated', 'created_at': created_at.isoformat(),
+            'metadata': {'bolna_call_id': call_id}}
+
+
+def reconciler(bolna):
+    worker = CallStatusReconciler(writer=FakeWriter(), base_interval=10, max_workers=2)
+    worker._bolna_api = bolna
+    return worker
+
+
+@pytest.fixture
+def call_logs(monkeypatch):
+    table = FakeCallLogs([call_log('r1', 'c1'), call_log('r2', 'c2')])
+    monkeypatch.setattr(reconciler_module, 'supabase_request', table.request)
+    monkeypatch.setattr(reconciler_module.campaign_scheduler, 'release_call', lambda call_id: None)
+    return table
+
+
+def test_due_calls_are_claimed_then_polled(call_logs):
+    bolna = FakeBolna()
+    worker = reconciler(bolna)
+
+    assert worker.reconcile() == 2
+    assert sorted(bolna.calls) == ['c1', 'c2']
+    assert call_logs.claims == 2
+    assert all(row['metadata'].get('last_status_check') for row in call_logs.rows.values())
+    # The queued update carries the claimed row, so the writer keeps the new stamp
+    assert all(event['call_log']['metadata'].get('last_status_check') for event in worker.writer.events)
+
+
+def test_second_worker_skips_calls_already_claimed(call_logs):
+    first_bolna, second_bolna = FakeBolna(), FakeBolna()
+    first, second = reconciler(first_bolna), reconciler(second_bolna)
+
+    # Both workers read the rows before either claims them
+    rows = second._in_flight_rows()
+    first.reconcile()
+    second._in_flight_rows = lambda: rows
+    assert second.reconcile() == 0
+
+    assert sorted(first_bolna.calls) == ['c1', 'c2']
+    assert second_bolna.calls == []
+    assert second.get_stats()['skipped_claimed'] == 2
+
+
+def test_claimed_call_is_not_due_on_the_next_pass(call_logs):
+    bolna = FakeBolna(status='ringing')
+    first, second = reconciler(bolna), reconciler(bolna)
+
+    first.reconcile()
+    second.reconcile()
+
+    assert sorted(bolna.calls) == ['c1', 'c2']
+    assert second.get_stats()['skipped_not_due'] == 2
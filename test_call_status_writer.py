@@ -0,0 +1,121 @@
+import pytest
+import requests
+
+import call_status_writer as writer_module
+from call_status_writer import CallStatusWriter, parse_bolna_event
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f'{self.status_code} error', response=self)
+
+
+class FakeSupabase:
+    """call_logs rows keyed by id; upserts fail with status, or 400 for rows whose id is in bad_ids"""
+
+    available = True
+    headers = {}
+
+    def __init__(self, rows=()):
+        self.rows = {row['id']: row for row in rows}
+        self.status = None
+        self.bad_ids = set()
+
+    def get(self, method, endpoint, data=None, params=None):
+        wanted = params['metadata->>bolna_call_id'][len('in.('):-1].replace('"', '').split(',')
+        return [row for row in self.rows.values() if row['metadata']['bolna_call_id'] in wanted]
+
+    def post(self, endpoint, data=None, headers=None):
+        if self.status:
+            return FakeResponse(self.status)
+        if any(row['id'] in self.bad_ids for row in data):
+            return FakeResponse(400)
+        for row in data:
+            self.rows[row['id']] = row
+        return FakeResponse(201)
+
+
+def call_log(row_id, call_id, status='initiated'):
+    return {'id': row_id, 'status': status, 'duration': None, 'user_id': 'u1',
+            'metadata': {'bolna_call_id': call_id}}
+
+
+def event(call_id, status, duration=None):
+    return parse_bolna_event({'call_id': call_id, 'status': status, 'duration': duration})
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setattr(writer_module, 'supabase_request', fake.get)
+    recorded = []
+    monkeypatch.setattr(writer_module.usage_counters, 'record',
+                        lambda user_id, **deltas: recorded.append((user_id, deltas)))
+    fake.recorded = recorded
+    return fake
+
+
+def make_writer(supabase, **kwargs):
+    return CallStatusWriter(batch_size=10, flush_interval=60, client=supabase, **kwargs)
+
+
+def test_latest_event_per_call_wins(supabase):
+    supabase.rows = {'r1': call_log('r1', 'c1')}
+    writer = make_writer(supabase)
+    writer.submit(event('c1', 'ringing'))
+    writer.submit(event('c1', 'completed', duration=42))
+    assert writer.stats['coalesced'] == 1
+    assert writer.flush() == 1
+    assert supabase.rows['r1']['status'] == 'completed'
+    assert supabase.recorded == [('u1', {'voice_seconds': 42.0})]
+
+
+def test_unmatched_event_waits_for_its_row(supabase):
+    writer = make_writer(supabase)
+    writer.submit(event('c2', 'completed', duration=7))
+    assert writer.flush() == 0
+    assert writer.pending_event('c2')['status'] == 'completed'
+    # The campaign batch lands the call_logs row; the next flush applies the status
+    supabase.rows = {'r2': call_log('r2', 'c2')}
+    assert writer.flush() == 1
+    assert supabase.rows['r2']['status'] == 'completed'
+    assert writer.pending_event('c2') is None
+
+
+def test_unmatched_event_dropped_after_ttl(supabase):
+    writer = make_writer(supabase, unmatched_ttl=60)
+    writer.submit(event('c3', 'completed'))
+    writer.flush()
+    writer.pending_event('c3')['unmatched_since'] -= 61
+    writer.flush()
+    assert writer.pending_event('c3') is None
+    assert writer.stats['unmatched_dropped'] == 1
+
+
+def test_retryable_failure_requeued(supabase):
+    supabase.rows = {'r4': call_log('r4', 'c4')}
+    supabase.status = 503
+    writer = make_writer(supabase)
+    writer.submit(event('c4', 'completed', duration=5))
+    assert writer.flush() == 0
+    assert writer.pending_event('c4')
+    assert supabase.recorded == []
+    supabase.status = None
+    assert writer.flush() == 1
+    assert supabase.recorded == [('u1', {'voice_seconds': 5.0})]
+
+
+def test_rejected_update_dropped(supabase):
+    supabase.rows = {'r5': call_log('r5', 'c5'), 'r6': call_log('r6', 'c6')}
+    supabase.bad_ids = {'r5'}
+    writer = make_writer(supabase)
+    writer.submit(event('c5', 'weird-status'))
+    writer.submit(event('c6', 'completed'))
+    assert writer.flush() == 1
+    assert supabase.rows['r6']['status'] == 'completed'
+    assert writer.pending_event('c5') is None
+    assert writer.stats['rejected'] == 1
@@ -0,0 +1,63 @@
+import sqlite3
+import time
+
+import pytest
+
+import campaign_queue as queue_module
+from campaign_queue import CampaignQueue
+
+
+def call(phone):
+    return {'recipient_phone': phone, 'agent_id': 'bolna-agent', 'metadata': {'voice_agent_id': 'va1'}}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'campaign_queue.db')
+
+
+def test_database_created_on_first_use(db_path, tmp_path):
+    queue = CampaignQueue(db_path=db_path)
+    assert not list(tmp_path.iterdir())
+    queue.enqueue([call('+14155550101')])
+    assert (tmp_path / 'campaign_queue.db').exists()
+
+
+def test_unwritable_path_fails_on_use_not_construction(tmp_path):
+    queue = CampaignQueue(db_path=str(tmp_path / 'missing' / 'campaign_queue.db'))
+    with pytest.raises(sqlite3.OperationalError):
+        queue.enqueue([call('+14155550101')])
+
+
+def test_expired_lease_recovered_without_redialing(db_path):
+    first = CampaignQueue(db_path=db_path, lease_seconds=60)
+    second = CampaignQueue(db_path=db_path, lease_seconds=60)
+    campaign_id = first.enqueue([call('+14155550101'), call('+14155550102'), call('+14155550103')])
+
+    now = time.time()
+    assert [row['id'] for row in first.claim_due(now)] == [campaign_id]
+    first.record_result(campaign_id, 0, {'success': True, 'call_id': 'c0', 'original_config': call('+14155550101')})
+    # The first worker dies holding the lease
+    assert second.claim_due(now + 30) == []
+    assert [row['id'] for row in second.claim_due(now + 61)] == [campaign_id]
+    assert second.campaign_row(campaign_id)['lease_owner'] == second.worker_id
+    assert [config['_seq'] for config in second.pending_calls(campaign_id, 10)] == [1, 2]
+
+
+def test_call_log_prefix_marked_on_partial_write(db_path, monkeypatch):
+    queue = CampaignQueue(db_path=db_path, batch_size=10)
+    campaign_id = queue.enqueue([call('+14155550101'), call('+14155550102')])
+    queue.claim_due()
+    for seq in (0, 1):
+        queue.record_result(campaign_id, seq, {'success': True, 'call_id': f'c{seq}',
+                                               'original_config': call('+1415555010' + str(seq + 1))})
+
+    monkeypatch.setattr(queue_module, 'bulk_write', lambda table, rows: 1)
+    assert queue.flush_call_logs(campaign_id) == 1
+    assert queue.unflushed_count(campaign_id) == 1
+    assert not queue.complete_or_retry(campaign_id)
+
+    monkeypatch.setattr(queue_module, 'bulk_write', lambda table, rows: len(rows))
+    assert queue.flush_call_logs(campaign_id) == 1
+    assert queue.complete_or_retry(campaign_id)
+    assert queue.get_campaign(campaign_id)['status'] == 'completed'
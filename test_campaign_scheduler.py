@@ -0,0 +1,60 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from campaign_scheduler import CallingWindow
+
+
+def at(text, tz):
+    """Epoch seconds for a local wall-clock time in tz"""
+    return datetime.fromisoformat(text).replace(tzinfo=ZoneInfo(tz)).timestamp()
+
+
+def test_window_uses_campaign_timezone():
+    """The same instant is inside a Kolkata window and outside a New York one"""
+    now = at('2025-03-03T10:00', 'Asia/Kolkata')  # 23:30 the night before in New York
+    assert CallingWindow('09:00', '21:00', 'Asia/Kolkata').is_open(now)
+    assert not CallingWindow('09:00', '21:00', 'America/New_York').is_open(now)
+
+
+def test_window_bounds():
+    """The window includes its start and excludes its end"""
+    window = CallingWindow('09:00', '21:00', 'Europe/London')
+    assert window.is_open(at('2025-06-01T09:00', 'Europe/London'))
+    assert not window.is_open(at('2025-06-01T21:00', 'Europe/London'))
+    assert not window.is_open(at('2025-06-01T08:59', 'Europe/London'))
+
+
+def test_next_open_later_today_and_tomorrow():
+    """A closed window opens at its start, today if still ahead, otherwise tomorrow"""
+    window = CallingWindow('09:00', '21:00', 'Asia/Kolkata')
+    assert window.next_open(at('2025-03-03T07:30', 'Asia/Kolkata')) == at('2025-03-03T09:00', 'Asia/Kolkata')
+    assert window.next_open(at('2025-03-03T22:00', 'Asia/Kolkata')) == at('2025-03-04T09:00', 'Asia/Kolkata')
+    now = at('2025-03-03T12:00', 'Asia/Kolkata')
+    assert window.next_open(now) == now
+
+
+def test_window_spanning_midnight():
+    """A 20:00-02:00 window is open late evening and after midnight but not mid-morning"""
+    window = CallingWindow('20:00', '02:00', 'America/Sao_Paulo')
+    assert window.is_open(at('2025-05-10T23:00', 'America/Sao_Paulo'))
+    assert window.is_open(at('2025-05-11T01:30', 'America/Sao_Paulo'))
+    assert not window.is_open(at('2025-05-11T10:00', 'America/Sao_Paulo'))
+    assert window.next_open(at('2025-05-11T10:00', 'America/Sao_Paulo')) == at('2025-05-11T20:00', 'America/Sao_Paulo')
+
+
+def test_next_open_across_dst_change():
+    """Across a clock change the window still opens at 09:00 local, 23 hours later"""
+    window = CallingWindow('09:00', '17:00', 'America/New_York')
+    # Clocks go forward at 02:00 on 9 March 2025
+    now = at('2025-03-08T18:00', 'America/New_York')
+    opens = window.next_open(now)
+    assert opens == at('2025-03-09T09:00', 'America/New_York')
+    assert opens - at('2025-03-08T09:00', 'America/New_York') == 23 * 3600
+
+
+def test_from_campaign():
+    """Campaigns without both window bounds have no window"""
+    campaign = {'window_start': '10:00', 'window_end': '18:00', 'window_timezone': 'Europe/Berlin'}
+    window = CallingWindow.from_campaign(campaign)
+    assert window.tz == ZoneInfo('Europe/Berlin')
+    assert CallingWindow.from_campaign({**campaign, 'window_end': None}) is None
@@ -0,0 +1,131 @@
+import pytest
+import requests
+
+from inbound_log_queue import InboundLogQueue
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f'{self.status_code} error', response=self)
+
+
+class FakeClient:
+    """Accepts upserts unless down (no response) or failing with a status; rows with a bad id get a 400"""
+
+    available = True
+    headers = {}
+
+    def __init__(self):
+        self.down = False
+        self.status = None
+        self.bad_ids = set()
+        self.tables = {}
+
+    def post(self, endpoint, data=None, headers=None):
+        if self.down:
+            raise requests.exceptions.ConnectionError('connection refused')
+        if self.status:
+            return FakeResponse(self.status)
+        if any(row['id'] in self.bad_ids for row in data):
+            return FakeResponse(400)
+        table = endpoint.split('?')[0]
+        for row in data:
+            self.tables.setdefault(table, {})[row['id']] = row
+        return FakeResponse(201)
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    def make(client, batch_size=10, max_pending=100):
+        return InboundLogQueue(db_path=str(tmp_path / 'inbound.db'), client=client, batch_size=batch_size,
+                               flush_interval=60, max_pending=max_pending)
+    return make
+
+
+def log(i):
+    return {'id': f'call-{i}', 'status': 'ringing'}
+
+
+def test_flush_writes_queued_rows(make_queue):
+    """Queued rows are upserted and leave nothing pending"""
+    client = FakeClient()
+    queue = make_queue(client)
+    for i in range(25):
+        queue.submit('call_logs', log(i))
+    assert queue.flush() == 25
+    assert len(client.tables['call_logs']) == 25
+    assert queue.pending() == {'memory': 0, 'disk': 0}
+
+
+def test_transport_failure_spills_then_replays(make_queue):
+    """Rows that fail without a response wait on disk and are replayed when Supabase is back"""
+    client = FakeClient()
+    queue = make_queue(client)
+    client.down = True
+    for i in range(15):
+        queue.submit('call_logs', log(i))
+    queue.flush()
+    # The flush stops at the first failed batch; the rest stays in memory
+    assert queue.pending() == {'memory': 5, 'disk': 10}
+    client.down = False
+    queue.flush()
+    assert len(client.tables['call_logs']) == 15
+    assert queue.spilled_count() == 0
+    assert queue.stats['replayed'] == 10
+
+
+def test_overflow_spills_on_submit(make_queue):
+    """Beyond max_pending, submit() spills straight to disk"""
+    client = FakeClient()
+    queue = make_queue(client, max_pending=5)
+    for i in range(8):
+        queue.submit('sms_logs', log(i))
+    assert queue.pending() == {'memory': 5, 'disk': 3}
+    queue.flush()
+    assert len(client.tables['sms_logs']) == 8
+
+
+def test_server_errors_are_retried(make_queue):
+    """429 and 5xx responses are spilled for replay, not dead-lettered"""
+    client = FakeClient()
+    queue = make_queue(client)
+    for status in (429, 503):
+        client.status = status
+        queue.submit('call_logs', log(status))
+        queue.flush()
+    assert queue.spilled_count() == 2
+    assert queue.dead_letter_count() == 0
+
+
+def test_rejected_row_dead_lettered(make_queue):
+    """A 4xx row is isolated and dead-lettered; the rest of its batch is written"""
+    client = FakeClient()
+    client.bad_ids = {'call-3'}
+    queue = make_queue(client)
+    for i in range(10):
+        queue.submit('call_logs', log(i))
+    queue.flush()
+    assert sorted(client.tables['call_logs']) == sorted(f'call-{i}' for i in range(10) if i != 3)
+    assert queue.dead_letter_count() == 1
+    assert queue.spilled_count() == 0
+
+
+def test_rejected_row_removed_from_spill(make_queue):
+    """A spilled row rejected on replay moves to the dead-letter table instead of blocking replay"""
+    client = FakeClient()
+    queue = make_queue(client)
+    client.down = True
+    for i in range(5):
+        queue.submit('call_logs', log(i))
+    queue.flush()
+    client.down = False
+    client.bad_ids = {'call-0'}
+    queue.flush()
+    assert queue.spilled_count() == 0
+    assert queue.dead_letter_count() == 1
+    assert queue.stats['replayed'] == 4
+    assert len(client.tables['call_logs']) == 4
@@ -0,0 +1,73 @@
+from number_inventory import DigitTrie, NumberInventory, parse_targets
+
+
+def number(phone, cost, provider='twilio', sms=True):
+    return {'phone_number': phone, 'monthly_cost': cost, 'provider': provider,
+            'capabilities': {'voice': True, 'sms': sms}}
+
+
+class FakeManager:
+    """Stands in for PhoneProviderManager: one canned answer per (country, area code)"""
+
+    providers = {'twilio': None}
+
+    def __init__(self, answers):
+        self.answers = answers
+
+    def search_all_providers(self, providers, country_code, area_code=None, limit=20, use_cache=True, **kwargs):
+        numbers = self.answers.get((country_code, area_code or ''), [])
+        return {'success': True, 'available_numbers': [dict(n) for n in numbers][:limit],
+                'total_found': len(numbers), 'providers_failed': {}}
+
+
+def test_trie_prefix_cheapest_first():
+    """Every node lists its subtree's numbers cheapest first"""
+    trie = DigitTrie.build([number('+14155550101', 2.0), number('+14155550102', 1.0),
+                            number('+12125550101', 1.5)])
+    assert [n['phone_number'] for n in trie.prefix('415')] == ['+14155550102', '+14155550101']
+    assert [n['phone_number'] for n in trie.prefix('')] == ['+14155550102', '+12125550101', '+14155550101']
+    assert trie.prefix('999') == []
+
+
+def test_trie_remove():
+    """A removed number disappears from every node on its path"""
+    trie = DigitTrie.build([number('+14155550101', 2.0), number('+14155550102', 1.0)])
+    assert trie.remove('+14155550102')
+    assert [n['phone_number'] for n in trie.prefix('415')] == ['+14155550101']
+    assert not trie.remove('+14155550102')
+
+
+def test_parse_targets():
+    """country:area_code pairs, empty area code meaning country-wide"""
+    assert parse_targets('us:, US:415 ,gb') == [('US', ''), ('US', '415'), ('GB', '')]
+
+
+def test_fetched_target_answered_exactly():
+    """A fetched (country, area code) is served from memory with an exact total"""
+    manager = FakeManager({('US', '415'): [number('+14155550101', 2.0), number('+14155550102', 1.0)]})
+    inventory = NumberInventory(manager=manager, targets='US:415', fetch_limit=100)
+    inventory.refresh()
+    result = inventory.search('US', area_code='415', limit=20)
+    assert [n['phone_number'] for n in result['available_numbers']] == ['+14155550102', '+14155550101']
+    assert result['total_found'] == 2
+
+
+def test_unfetched_area_code_falls_back():
+    """An area code only seen in a country-wide sample is not answered unless it fills the page"""
+    sample = [number(f'+1917555{i:04d}', 1.0 + i) for i in range(3)]
+    inventory = NumberInventory(manager=FakeManager({('US', ''): sample}), targets='US:', fetch_limit=100)
+    inventory.refresh()
+    assert inventory.search('US', area_code='917', limit=20) is None
+    result = inventory.search('US', area_code='917', limit=3)
+    assert len(result['available_numbers']) == 3
+    assert result['total_found'] is None
+
+
+def test_filters_and_missing_country():
+    """Capability filters apply, and countries never fetched need a live search"""
+    manager = FakeManager({('US', '415'): [number('+14155550101', 1.0, sms=False), number('+14155550102', 2.0)]})
+    inventory = NumberInventory(manager=manager, targets='US:415', fetch_limit=100)
+    inventory.refresh()
+    result = inventory.search('US', area_code='415', capabilities=['sms'])
+    assert [n['phone_number'] for n in result['available_numbers']] == ['+14155550102']
+    assert inventory.search('GB', area_code='20') is None
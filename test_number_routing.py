@@ -0,0 +1,84 @@
+import pytest
+
+from number_routing import NumberRoutingTable
+
+
+class FakeTable(NumberRoutingTable):
+    """Routing table reading canned rows instead of Supabase; fail=True makes every read raise"""
+
+    def __init__(self, numbers, agents=()):
+        super().__init__(interval=60, negative_ttl=60, lookup_timeout=1)
+        self.numbers, self.agents = list(numbers), list(agents)
+        self.fail = False
+        self.reads = []
+
+    def _get(self, table, params, timeout=None):
+        self.reads.append((table, timeout))
+        if self.fail:
+            raise ConnectionError('connection refused')
+        return list(self.numbers if table == 'purchased_phone_numbers' else self.agents)
+
+
+def number(row_id, phone, enterprise='e1'):
+    return {'id': row_id, 'enterprise_id': enterprise, 'phone_number': phone, 'created_at': None}
+
+
+def test_rebuild_routes_numbers_to_agents():
+    """A rebuild routes each active number to the agent pointing at it"""
+    table = FakeTable([number('n1', '+14155550101')],
+                      [{'id': 'a1', 'configuration': {'outbound_phone_number_id': 'n1'}, 'created_at': None}])
+    table.rebuild()
+    route = table.lookup('+1 415 555 0101')
+    assert route == {'enterprise_id': 'e1', 'phone_number_id': 'n1',
+                     'phone_number': '+14155550101', 'voice_agent_id': 'a1'}
+    assert table.stats['hits'] == 1
+
+
+def test_failed_rebuild_keeps_table():
+    """A read error raises, counts as a rebuild error and keeps serving the current table"""
+    table = FakeTable([number('n1', '+14155550101')])
+    table.rebuild()
+    table.fail = True
+    with pytest.raises(ConnectionError):
+        table.rebuild()
+    assert table.stats['rebuild_errors'] == 1
+    assert table.stats['rebuilds'] == 1
+    assert table._routes
+
+
+def test_empty_rebuild_replaces_table():
+    """An empty result is a real empty table, not a failure"""
+    table = FakeTable([number('n1', '+14155550101')])
+    table.rebuild()
+    table.numbers = []
+    table.rebuild()
+    assert table.stats['routes'] == 0
+    assert table.stats['rebuilds'] == 2
+
+
+def test_miss_looked_up_once_with_timeout():
+    """A miss is read with the lookup timeout, then served from the table"""
+    table = FakeTable([])
+    table.numbers = [number('n2', '+14155550102')]
+    assert table.lookup('+14155550102')['phone_number_id'] == 'n2'
+    assert table.lookup('+14155550102')['phone_number_id'] == 'n2'
+    assert table.stats['db_lookups'] == 1
+    assert all(timeout[1] == 1 for _, timeout in table.reads)
+
+
+def test_failed_lookup_not_negatively_cached():
+    """A lookup error is counted and the number is tried again next time"""
+    table = FakeTable([number('n3', '+14155550103')])
+    table.fail = True
+    assert table.lookup('+14155550103') is None
+    assert table.stats['db_lookup_errors'] == 1
+    table.fail = False
+    assert table.lookup('+14155550103')['phone_number_id'] == 'n3'
+
+
+def test_unknown_number_negatively_cached():
+    """A number with no active row is remembered as unknown"""
+    table = FakeTable([])
+    assert table.lookup('+14155550104') is None
+    assert table.lookup('+14155550104') is None
+    assert table.stats['db_lookups'] == 1
@@ -0,0 +1,41 @@
+import pytest
+
+from pagination import encode_cursor, decode_cursor, keyset_params, parse_page_args
+
+
+def test_cursor_round_trip():
+    """A cursor decodes back to the row's (created_at, id)"""
+    row = {'created_at': '2025-01-31T10:15:00.123456+00:00', 'id': 'a1b2c3'}
+    assert decode_cursor(encode_cursor(row)) == ('2025-01-31T10:15:00.123456+00:00', 'a1b2c3')
+
+
+def test_null_created_at_round_trip():
+    """Rows without created_at get a cursor that decodes instead of a 400"""
+    cursor = encode_cursor({'created_at': None, 'id': 42})
+    assert decode_cursor(cursor) == (None, '42')
+    assert parse_page_args({'cursor': cursor, 'limit': '10'}) == (cursor, 10)
+
+
+def test_malformed_cursors_rejected():
+    """Garbage, a missing id or a non-string timestamp are invalid"""
+    for bad in ('not-a-cursor', encode_cursor({'created_at': '2025-01-31'}),
+                encode_cursor({'created_at': 5, 'id': 'x'})):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+def test_keyset_params_dated_cursor():
+    """After a dated row: older rows, same-timestamp rows with a smaller id, then undated rows"""
+    params = keyset_params(encode_cursor({'created_at': '2025-01-31T10:15:00Z', 'id': 'b'}), 25)
+    assert params['order'] == 'created_at.desc.nullslast,id.desc'
+    assert params['limit'] == '26'
+    assert params['or'] == ('(created_at.lt."2025-01-31T10:15:00Z",'
+                            'and(created_at.eq."2025-01-31T10:15:00Z",id.lt."b"),'
+                            'created_at.is.null)')
+
+
+def test_keyset_params_undated_cursor():
+    """After an undated row only undated rows with a smaller id remain"""
+    params = keyset_params(encode_cursor({'created_at': None, 'id': 'b'}), 25)
+    assert params['and'] == '(created_at.is.null,id.lt."b")'
+    assert 'or' not in params
@@ -0,0 +1,52 @@
+from phone_normalizer import PhoneNormalizer
+
+normalizer = PhoneNormalizer(default_region='IN')
+
+
+def test_international_input():
+    """'+' numbers from different plans normalise to E.164"""
+    assert normalizer.normalize('+91 98765 43210') == '+919876543210'
+    assert normalizer.normalize('+1 (415) 555-0123') == '+14155550123'
+    assert normalizer.normalize('+44 20 7946 0958') == '+442079460958'
+    assert normalizer.normalize('+49 30 123456') == '+4930123456'
+
+
+def test_trunk_prefix_stripped():
+    """National input drops the region's trunk prefix"""
+    assert normalizer.normalize('098765 43210', 'IN') == '+919876543210'
+    assert normalizer.normalize('020 7946 0958', 'GB') == '+442079460958'
+    assert normalizer.normalize('8 912 345 67 89', 'RU') == '+79123456789'
+    assert normalizer.normalize('06 1 234 5678', 'HU') == '+3612345678'
+
+
+def test_trunk_zero_rejected_after_country_code():
+    """A trunk 0 kept after the country code is not a valid number in plans that strip it"""
+    assert normalizer.normalize('+44 020 7946 0958') is None
+    assert normalizer.normalize('+91 098765 43210') is None
+
+
+def test_leading_zero_plans():
+    """Italy, Vatican, San Marino and Cote d'Ivoire keep the 0 as part of the number"""
+    assert normalizer.normalize('+39 06 6982 1234') == '+390669821234'
+    assert normalizer.normalize('06 6982 1234', 'IT') == '+390669821234'
+    assert normalizer.normalize('+378 0549 123456') == '+3780549123456'
+    assert normalizer.normalize('+225 07 12 34 56 78') == '+2250712345678'
+    assert normalizer.region_of('+390669821234') == 'IT'
+
+
+def test_international_dialling_prefixes():
+    """00 (and 011 from the US) are read as the start of an international number"""
+    assert normalizer.normalize('0039 06 6982 1234', 'IT') == '+390669821234'
+    assert normalizer.normalize('011 44 20 7946 0958', 'US') == '+442079460958'
+
+
+def test_invalid_numbers():
+    """Wrong lengths, empty input and unknown codes give None"""
+    for raw in (None, '', 'abc', '+91 98765', '+1 415 555 01234', '+999 1234567'):
+        assert normalizer.normalize(raw) is None, raw
+
+
+def test_find_numbers():
+    """Numbers in free text come back once each, in order"""
+    text = 'Call +39 06 6982 1234 or 98765 43210, again +390669821234'
+    assert normalizer.find_numbers(text) == ['+390669821234', '+919876543210']
@@ -0,0 +1,109 @@
+import pytest
+
+from provider_health import CLOSED, HALF_OPEN, OPEN, ProviderHealth
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr('time.monotonic', fake)
+    return fake
+
+
+def make_health(**kwargs):
+    settings = {'alpha': 0.2, 'failure_threshold': 3, 'error_rate_threshold': 0.5, 'min_calls': 10, 'cooldown': 30}
+    return ProviderHealth('twilio', **{**settings, **kwargs})
+
+
+def test_consecutive_failures_open_circuit(clock):
+    """failure_threshold failures in a row open the circuit and stop admitting calls"""
+    health = make_health()
+    for _ in range(2):
+        health.record(0.1, ok=False, error='timeout')
+    assert health.state == CLOSED and health.allow()
+    health.record(0.1, ok=False, error='timeout')
+    assert health.state == OPEN
+    assert not health.allow() and not health.available()
+    assert health.score() == float('inf')
+    assert health.snapshot()['retry_in_seconds'] == 30
+
+
+def test_success_resets_failure_run():
+    """A success in between resets the run of failures"""
+    health = make_health()
+    for ok in (False, False, True, False, False):
+        health.record(0.1, ok=ok)
+    assert health.state == CLOSED
+    assert health.consecutive_failures == 2
+
+
+def test_error_rate_opens_after_min_calls():
+    """A high error EWMA opens the circuit once min_calls calls have been seen"""
+    health = make_health(failure_threshold=100, min_calls=4, alpha=0.5)
+    health.record(0.1, ok=False)
+    health.record(0.1, ok=False)
+    assert health.error_rate == 0.75 and health.state == CLOSED
+    health.record(0.1, ok=True)
+    health.record(0.1, ok=False)
+    assert health.state == OPEN
+
+
+def test_half_open_admits_one_probe(clock):
+    """After the cooldown exactly one probe is admitted; a success closes the circuit"""
+    health = make_health()
+    for _ in range(3):
+        health.record(0.1, ok=False)
+    clock.now += 30
+    assert health.available()
+    assert health.allow()
+    assert health.state == HALF_OPEN
+    assert not health.allow()
+    health.record(0.2, ok=True)
+    assert health.state == CLOSED
+    assert health.allow() and health.allow()
+
+
+def test_failed_probe_reopens(clock):
+    """A failed probe reopens the circuit for another cooldown"""
+    health = make_health()
+    for _ in range(3):
+        health.record(0.1, ok=False)
+    clock.now += 30
+    assert health.allow()
+    health.record(0.1, ok=False, error='500')
+    assert health.state == OPEN
+    assert not health.allow()
+    clock.now += 30
+    assert health.allow()
+
+
+def test_lost_probe_expires(clock):
+    """A probe that never reports back stops blocking the circuit after another cooldown"""
+    health = make_health()
+    for _ in range(3):
+        health.record(0.1, ok=False)
+    clock.now += 30
+    assert health.allow()
+    clock.now += 10
+    assert not health.allow()
+    clock.now += 20
+    assert health.allow()
+
+
+def test_score_prefers_fast_reliable_provider():
+    """Lower latency and fewer errors give a lower routing score"""
+    fast, slow, flaky = make_health(), make_health(), make_health()
+    fast.record(0.1, ok=True)
+    slow.record(0.8, ok=True)
+    flaky.record(0.1, ok=True)
+    flaky.record(0.1, ok=False)
+    assert fast.score() < flaky.score()
+    assert fast.score() < slow.score()
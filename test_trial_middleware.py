@@ -0,0 +1,98 @@
+import sys
+import types
+
+import pytest
+from flask import Flask, g
+
+import trial_middleware
+import trial_rate_limiter
+import user_context
+
+
+class FakeLimiter:
+    def __init__(self):
+        self.shared = 0
+        self.local = 0
+
+    def acquire(self, key, cost=1.0):
+        self.shared += 1
+        return {'allowed': True, 'remaining': 10, 'limit': 100, 'retry_after': 0}
+
+    def acquire_local(self, key, cost=1.0):
+        self.local += 1
+        return {'allowed': True, 'remaining': 10, 'limit': 100, 'retry_after': 0}
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    fake = FakeLimiter()
+    monkeypatch.setattr(trial_rate_limiter, 'trial_api_limiter', fake)
+    monkeypatch.setitem(sys.modules, 'main', types.SimpleNamespace(
+        check_trial_status=lambda user: {'is_trial': user.get('plan') == 'trial', 'expired': False}))
+    trial_middleware._known_trial_users.clear()
+    return fake
+
+
+def call_route(user_id='u1'):
+    @trial_middleware.check_trial_limits()
+    def route():
+        return 'ok'
+
+    with Flask(__name__).test_request_context():
+        g.current_user = {'user_id': user_id}
+        g.user_id = user_id
+        return route()
+
+
+def lookup(monkeypatch, user=None, error=None):
+    def get_user_context(user_id):
+        if error:
+            raise error
+        return user
+    monkeypatch.setattr(user_context, 'get_user_context', get_user_context)
+
+
+def test_trial_user_charged_once(monkeypatch, limiter):
+    lookup(monkeypatch, user={'plan': 'trial'})
+    assert call_route() == 'ok'
+    assert (limiter.shared, limiter.local) == (1, 0)
+
+
+def test_failed_lookup_for_unknown_user_not_limited(monkeypatch, limiter):
+    lookup(monkeypatch, error=ConnectionError('supabase down'))
+    assert call_route() == 'ok'
+    assert (limiter.shared, limiter.local) == (0, 0)
+
+
+def test_failed_lookup_for_paid_user_not_limited(monkeypatch, limiter):
+    lookup(monkeypatch, user={'plan': 'pro'})
+    call_route()
+    lookup(monkeypatch, error=ConnectionError('supabase down'))
+    assert call_route() == 'ok'
+    assert limiter.local == 0
+
+
+def test_failed_lookup_for_known_trial_user_uses_local_quota(monkeypatch, limiter):
+    lookup(monkeypatch, user={'plan': 'trial'})
+    call_route()
+    lookup(monkeypatch, error=ConnectionError('supabase down'))
+    assert call_route() == 'ok'
+    assert (limiter.shared, limiter.local) == (1, 1)
+
+
+def test_error_after_charge_not_charged_again(monkeypatch, limiter):
+    lookup(monkeypatch, user={'plan': 'trial'})
+
+    def broken(*args):
+        raise RuntimeError('usage check failed')
+    monkeypatch.setattr(trial_middleware, 'check_usage_limits', broken)
+
+    @trial_middleware.check_trial_limits(usage_type='api_calls')
+    def route():
+        return 'ok'
+
+    with Flask(__name__).test_request_context():
+        g.current_user = {'user_id': 'u1'}
+        g.user_id = 'u1'
+        assert route() == 'ok'
+    assert (limiter.shared, limiter.local) == (1, 0)
@@ -0,0 +1,73 @@
+import pytest
+
+from trial_rate_limiter import TokenBucketLimiter
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr('time.time', fake)
+    return fake
+
+
+@pytest.fixture
+def make_limiter(tmp_path):
+    def make(capacity=3, refill_per_second=0.5, seed=None):
+        return TokenBucketLimiter(capacity=capacity, refill_per_second=refill_per_second,
+                                  db_path=str(tmp_path / 'trial.db'), seed=seed)
+    return make
+
+
+def test_bucket_empties_then_refills(clock, make_limiter):
+    """Capacity requests pass, the next waits retry_after, and refilled tokens let it through"""
+    limiter = make_limiter()
+    assert [limiter.acquire('u1')['allowed'] for _ in range(3)] == [True, True, True]
+    denied = limiter.acquire('u1')
+    assert not denied['allowed']
+    assert denied['retry_after'] == 2.0
+    clock.now += 2
+    assert limiter.acquire('u1')['allowed']
+    assert not limiter.acquire('u1')['allowed']
+
+
+def test_refill_capped_at_capacity(clock, make_limiter):
+    """A long idle period refills the bucket only to capacity"""
+    limiter = make_limiter()
+    limiter.acquire('u1', cost=3)
+    clock.now += 3600
+    assert limiter.peek('u1') == 3
+    assert limiter.acquire('u1')['remaining'] == 2
+
+
+def test_seed_counts_usage_already_spent(clock, make_limiter):
+    """A new bucket starts with capacity minus the seeded usage"""
+    limiter = make_limiter(seed=lambda key: 2)
+    assert limiter.acquire('u1')['remaining'] == 0
+    assert not limiter.acquire('u1')['allowed']
+
+
+def test_local_bucket_refills(clock, make_limiter):
+    """acquire_local keeps a per-process bucket with the same refill"""
+    limiter = make_limiter()
+    assert limiter.acquire_local('u1', cost=3)['allowed']
+    assert not limiter.acquire_local('u1')['allowed']
+    clock.now += 4
+    assert limiter.acquire_local('u1')['remaining'] == 1
+
+
+def test_buckets_independent_and_reset(clock, make_limiter):
+    """Keys have separate buckets and reset() refills one"""
+    limiter = make_limiter()
+    limiter.acquire('u1', cost=3)
+    assert limiter.acquire('u2')['allowed']
+    limiter.reset('u1')
+    assert limiter.peek('u1') is None
+    assert limiter.acquire('u1')['remaining'] == 2
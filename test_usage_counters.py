@@ -0,0 +1,101 @@
+import pytest
+import requests
+
+import usage_counters as counters_module
+from usage_counters import UsageCounters
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f'{self.status_code} error', response=self)
+
+
+class FakeRpc:
+    """increment_user_usage: applies each batch id once; lose_response commits the batch, then fails"""
+
+    available = True
+    headers = {}
+
+    def __init__(self):
+        self.totals = {}
+        self.applied = set()
+        self.batches = []
+        self.lose_response = False
+        self.status = None
+
+    def post(self, endpoint, data=None, headers=None):
+        self.batches.append((data['p_batch_id'], [dict(delta) for delta in data['p_deltas']]))
+        if self.status:
+            return FakeResponse(self.status)
+        if data['p_batch_id'] not in self.applied:
+            self.applied.add(data['p_batch_id'])
+            for delta in data['p_deltas']:
+                totals = self.totals.setdefault(delta['user_id'], {'voice_seconds': 0, 'api_calls': 0})
+                totals['voice_seconds'] += delta['voice_seconds']
+                totals['api_calls'] += delta['api_calls']
+        if self.lose_response:
+            self.lose_response = False
+            raise requests.exceptions.ReadTimeout('read timed out')
+        return FakeResponse(204)
+
+
+@pytest.fixture
+def rpc(monkeypatch):
+    fake = FakeRpc()
+    monkeypatch.setattr(counters_module, 'supabase_client', fake)
+    return fake
+
+
+@pytest.fixture
+def counters():
+    usage = UsageCounters(ttl=60, flush_interval=60)
+    usage.start = lambda: None  # flush by hand
+    return usage
+
+
+def test_flush_sends_one_batch(rpc, counters):
+    """Increments for the same user and day are summed into one RPC"""
+    counters.record('u1', voice_seconds=30, day='2025-01-31')
+    counters.record('u1', api_calls=1, day='2025-01-31')
+    counters.record('u2', api_calls=2, day='2025-01-31')
+    assert counters.flush() == 2
+    assert len(rpc.batches) == 1
+    assert rpc.totals == {'u1': {'voice_seconds': 30, 'api_calls': 1}, 'u2': {'voice_seconds': 0, 'api_calls': 2}}
+    assert counters.flush() == 0
+
+
+def test_lost_response_retry_applied_once(rpc, counters):
+    """A batch committed before its response was lost is resent with the same id and not counted twice"""
+    counters.record('u1', voice_seconds=30, day='2025-01-31')
+    rpc.lose_response = True
+    assert counters.flush() == 0
+    counters.record('u1', voice_seconds=5, day='2025-01-31')
+
+    # The retry is the unchanged batch; the newer increment waits for the next one
+    assert counters.flush() == 1
+    (first_id, first), (retry_id, retried) = rpc.batches
+    assert retry_id == first_id and retried == first
+    assert rpc.totals['u1']['voice_seconds'] == 30
+
+    assert counters.flush() == 1
+    assert rpc.batches[2][0] != first_id
+    assert rpc.totals['u1']['voice_seconds'] == 35
+    assert counters.get_stats()['pending'] == 0
+
+
+def test_failed_batch_stays_visible_to_reads(rpc, counters, monkeypatch):
+    """Unacknowledged increments are added to what a reload reads from the table"""
+    monkeypatch.setattr(counters_module, 'supabase_request', lambda *args, **kwargs: [
+        {'period': 'total', 'voice_seconds': 100, 'api_calls': 4}])
+    counters.record('u1', voice_seconds=20, api_calls=1)
+    rpc.status = 503
+    assert counters.flush() == 0
+    counters.record('u1', api_calls=1)
+
+    usage = counters.get('u1')
+    assert usage['total'] == {'voice_seconds': 120, 'api_calls': 6}
+    assert usage['today'] == {'voice_seconds': 20, 'api_calls': 2}
@@ -0,0 +1,158 @@
+"""
+Verified Token Cache
+Bounded LRU of decoded JWT claims keyed by token digest, plus a revocation
+set so logout and status changes take effect immediately in this worker.
+Logouts are also persisted to the revoked_tokens table (see
+add_revoked_tokens.sql); other gunicorn workers re-check it whenever a cached
+token is older than TOKEN_REVOCATION_CHECK_TTL, so a logged-out token stops
+working everywhere within that window.
+"""
+
+import os
+import time
+import hashlib
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+import requests
+
+from supabase_client import SupabaseClient, supabase_client
+from ttl_cache import TTLCache
+
+
+def token_digest(token: str) -> str:
+    """SHA-256 of the raw token so cache keys never hold usable credentials"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class VerifiedTokenCache:
+    """Decoded-claims cache with per-token revocation"""
+
+    def __init__(self,
+                 maxsize: int = None,
+                 max_ttl: float = None,
+                 client: SupabaseClient = None,
+                 shared_revocations: bool = None,
+                 revocation_check_ttl: float = None):
+        maxsize = maxsize or int(os.getenv('TOKEN_CACHE_SIZE', '10000'))
+        # Upper bound on how long a decoded token is trusted without re-verifying
+        self.max_ttl = max_ttl or float(os.getenv('TOKEN_CACHE_MAX_TTL', '86400'))
+        self.client = client or supabase_client
+        if shared_revocations is None:
+            shared_revocations = os.getenv('TOKEN_REVOCATION_SHARED', 'true').lower() == 'true'
+        self.shared_revocations = shared_revocations and self.client.available
+        # How stale another worker's view of a logout may be
+        self.revocation_check_ttl = revocation_check_ttl or float(os.getenv('TOKEN_REVOCATION_CHECK_TTL', '60'))
+        self._claims = TTLCache(maxsize=maxsize, ttl=self.max_ttl)
+        # digest -> True until the revoked token would have expired anyway
+        self._revoked = TTLCache(maxsize=maxsize, ttl=self.max_ttl)
+
+    def _ttl_for(self, claims: Dict) -> float:
+        exp = claims.get('exp')
+        if exp is None:
+            return self.max_ttl
+        return min(self.max_ttl, float(exp) - time.time())
+
+    def _revoked_elsewhere(self, digest: str) -> bool:
+        """True if another worker persisted a logout for this token (fails open on read errors)"""
+        try:
+            response = self.client.get('revoked_tokens', params={
+                'token_digest': f'eq.{digest}',
+                'select': 'token_digest'
+            })
+            response.raise_for_status()
+            return bool(response.json())
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"⚠️  Token revocation check failed: {e}")
+            return False
+
+    def _persist_revocation(self, digest: str, claims: Optional[Dict], ttl: float):
+        expires_at = datetime.fromtimestamp(time.time() + ttl, tz=timezone.utc)
+        try:
+            response = self.client.post(
+                'revoked_tokens',
+                data={
+                    'token_digest': digest,
+                    'user_id': (claims or {}).get('user_id'),
+                    'expires_at': expires_at.isoformat()
+                },
+                headers={**self.client.headers, 'Prefer': 'resolution=ignore-duplicates,return=minimal'}
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️  Could not persist token revocation, other workers may accept it until exp: {e}")
+
+    def verify(self, token: str, verify_token: Callable[[str], Optional[Dict]]) -> Optional[Dict]:
+        """
+        Return claims for a token, decoding with verify_token only on a cache miss
+
+        Returns:
+            A copy of the decoded claims, or None if the token is invalid,
+            expired or revoked
+        """
+        digest = token_digest(token)
+        if self._revoked.get(digest):
+            return None
+
+        claims = self._claims.get(digest)
+        if claims is None:
+            claims = verify_token(token)
+            if not claims:
+                return None
+            ttl = self._ttl_for(claims)
+            if self.shared_revocations:
+                if self._revoked_elsewhere(digest):
+                    if ttl > 0:
+                        self._revoked.set(digest, True, ttl=ttl)
+                    return None
+                # Re-check the shared table once this entry is older than the check TTL
+                ttl = min(ttl, self.revocation_check_ttl)
+            if ttl > 0:
+                self._claims.set(digest, claims, ttl=ttl)
+
+        # Callers (apply_token_context, routes) may replace fields on their copy
+        return dict(claims)
+
+    def revoke(self, token: str, claims: Dict = None):
+        """Reject a token from now until its exp (logout), in every worker"""
+        digest = token_digest(token)
+        claims = claims or self._claims.get(digest)
+        ttl = self._ttl_for(claims) if claims else self.max_ttl
+        self._claims.invalidate(digest)
+        if ttl > 0:
+            self._revoked.set(digest, True, ttl=ttl)
+            if self.shared_revocations:
+                self._persist_revocation(digest, claims, ttl)
+
+    def invalidate_user(self, user_id, revoke: bool = False) -> int:
+        """
+        Drop every cached token for a user so the next request re-verifies it
+
+        With revoke=True (user deactivated) those tokens are also rejected
+        outright rather than re-checked against the current token_version.
+        Other workers see the deactivation through the token_version bump.
+        """
+        dropped = []
+
+        def belongs_to_user(digest, claims):
+            if claims.get('user_id') != user_id:
+                return False
+            dropped.append((digest, self._ttl_for(claims)))
+            return True
+
+        self._claims.invalidate_where(belongs_to_user)
+        if revoke:
+            for digest, ttl in dropped:
+                if ttl > 0:
+                    self._revoked.set(digest, True, ttl=ttl)
+        return len(dropped)
+
+    def stats(self) -> Dict:
+        return {
+            'claims': self._claims.stats(),
+            'revoked': len(self._revoked)
+        }
+
+
+# Global instance shared by both login_required decorators
+verified_token_cache = VerifiedTokenCache()
@@ -6,8 +6,14 @@ Handles trial limitations and access controls for BhashAI platform
 from functools import wraps
 from flask import jsonify, g, request
 from datetime import datetime, timezone
+import os
 import json
 
+from bulk_writer import bulk_writer
+from supabase_client import supabase_client
+from ttl_cache import TTLCache
+from usage_counters import usage_counters
+
 class TrialLimitations:
     """Define trial user limitations"""
     
@@ -41,6 +47,90 @@ class TrialLimitations:
     MAX_USERS_PER_ENTERPRISE = 3
     MAX_VOICE_AGENTS = 2
 
+# Last trial status seen per user, so a failed lookup only rate-limits known trial users
+_known_trial_users = TTLCache(maxsize=10000, ttl=float(os.getenv('TRIAL_STATUS_MEMORY_TTL', '86400')))
+
+
+def _trial_limit_response(user_id, feature=None, usage_type=None, progress=None):
+    """
+    Error response if a trial limit blocks this request, else None
+
+    progress (a dict) records how far the check got: 'trial' once the user is
+    known to be on a trial, 'charged' once the shared API quota was taken.
+    """
+    progress = {} if progress is None else progress
+    # Get user data from request context or database
+    from main import check_trial_status
+    from user_context import get_user_context
+    
+    # Shares the lookup made by require_enterprise_context in this request
+    user = get_user_context(user_id)
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    trial_status = check_trial_status(user)
+    is_trial = bool(trial_status.get('is_trial', False))
+    _known_trial_users.set(user_id, is_trial)
+    
+    # If not a trial user, allow access
+    if not is_trial:
+        return None
+    progress['trial'] = True
+    
+    # Check if trial has expired
+    if trial_status.get('expired', False):
+        return jsonify({
+            'error': 'Trial expired',
+            'message': 'Your 14-day free trial has expired. Please upgrade to continue using BhashAI.',
+            'trial_status': trial_status,
+            'upgrade_url': '/upgrade'
+        }), 403
+    
+    # Check feature restrictions
+    if feature and feature in TrialLimitations.RESTRICTED_FEATURES:
+        return jsonify({
+            'error': 'Feature not available in trial',
+            'message': f'The {feature} feature is not available in the trial version. Please upgrade to access this feature.',
+            'trial_status': trial_status,
+            'upgrade_url': '/upgrade'
+        }), 403
+    
+    # Daily API quota: local token bucket shared by this host's workers
+    from trial_rate_limiter import trial_api_limiter
+    quota = trial_api_limiter.acquire(user_id)
+    progress['charged'] = True
+    if not quota['allowed']:
+        return _api_quota_response(quota, trial_status)
+    
+    # Check usage limits
+    if usage_type:
+        usage_check = check_usage_limits(user_id, usage_type, trial_status)
+        if not usage_check['allowed']:
+            return jsonify({
+                'error': 'Usage limit exceeded',
+                'message': usage_check['message'],
+                'trial_status': trial_status,
+                'usage_info': usage_check,
+                'upgrade_url': '/upgrade'
+            }), 429
+    
+    # Add trial status to response context
+    g.trial_status = trial_status
+    return None
+
+def _api_quota_response(quota, trial_status=None):
+    """429 for an exhausted daily API quota"""
+    response = jsonify({
+        'error': 'Usage limit exceeded',
+        'message': f'Daily API call limit exceeded ({TrialLimitations.MAX_API_CALLS_PER_DAY} calls/day)',
+        'trial_status': trial_status,
+        'usage_info': quota,
+        'upgrade_url': '/upgrade'
+    })
+    response.headers['Retry-After'] = str(max(1, int(quota['retry_after'])))
+    return response, 429
+
 def check_trial_limits(feature=None, usage_type=None):
     """Decorator to check trial limitations"""
     def decorator(f):
@@ -52,61 +142,23 @@ def check_trial_limits(feature=None, usage_type=None):
             
             user_id = g.user_id
             
+            progress = {}
             try:
-                # Get user data from request context or database
-                from main import supabase_request, check_trial_status
-                
-                users = supabase_request('GET', 'users', params={'id': f'eq.{user_id}'})
-                
-                if not users or len(users) == 0:
-                    return jsonify({'error': 'User not found'}), 404
-                
-                user = users[0]
-                trial_status = check_trial_status(user)
-                
-                # If not a trial user, allow access
-                if not trial_status.get('is_trial', False):
-                    return f(*args, **kwargs)
-                
-                # Check if trial has expired
-                if trial_status.get('expired', False):
-                    return jsonify({
-                        'error': 'Trial expired',
-                        'message': 'Your 14-day free trial has expired. Please upgrade to continue using BhashAI.',
-                        'trial_status': trial_status,
-                        'upgrade_url': '/upgrade'
-                    }), 403
-                
-                # Check feature restrictions
-                if feature and feature in TrialLimitations.RESTRICTED_FEATURES:
-                    return jsonify({
-                        'error': 'Feature not available in trial',
-                        'message': f'The {feature} feature is not available in the trial version. Please upgrade to access this feature.',
-                        'trial_status': trial_status,
-                        'upgrade_url': '/upgrade'
-                    }), 403
-                
-                # Check usage limits
-                if usage_type:
-                    usage_check = check_usage_limits(user_id, usage_type, trial_status)
-                    if not usage_check['allowed']:
-                        return jsonify({
-                            'error': 'Usage limit exceeded',
-                            'message': usage_check['message'],
-                            'trial_status': trial_status,
-                            'usage_info': usage_check,
-                            'upgrade_url': '/upgrade'
-                        }), 429
-                
-                # Add trial status to response context
-                g.trial_status = trial_status
-                
-                return f(*args, **kwargs)
-                
+                denied = _trial_limit_response(user_id, feature, usage_type, progress)
             except Exception as e:
                 print(f"Error checking trial limits: {e}")
-                # Allow access if there's an error (fail open)
-                return f(*args, **kwargs)
+                denied = None
+                # Known trial users not yet charged fall back to this process's in-memory API quota
+                if not progress.get('charged') and (progress.get('trial') or _known_trial_users.get(user_id)):
+                    from trial_rate_limiter import trial_api_limiter
+                    quota = trial_api_limiter.acquire_local(user_id)
+                    if not quota['allowed']:
+                        denied = _api_quota_response(quota)
+            if denied:
+                return denied
+            
+            # Outside the try so an error in the route itself is not swallowed and re-run
+            return f(*args, **kwargs)
         
         return decorated_function
     return decorator
@@ -114,19 +166,11 @@ def check_trial_limits(feature=None, usage_type=None):
 def check_usage_limits(user_id, usage_type, trial_status):
     """Check specific usage limits for trial users"""
     try:
-        from main import supabase_request
-        
         today = datetime.now(timezone.utc).date().isoformat()
         
         if usage_type == 'api_calls':
-            # Check daily API call limit
-            logs = supabase_request('GET', 'activity_logs', params={
-                'user_id': f'eq.{user_id}',
-                'activity_type': f'eq.api_call',
-                'created_at': f'gte.{today}T00:00:00Z'
-            })
-            
-            daily_calls = len(logs) if logs else 0
+            # Check daily API call limit (materialised counters, no activity_logs scan)
+            daily_calls = int(usage_counters.get(user_id)['today']['api_calls'])
             
             if daily_calls >= TrialLimitations.MAX_API_CALLS_PER_DAY:
                 return {
@@ -138,13 +182,8 @@ def check_usage_limits(user_id, usage_type, trial_status):
                 }
         
         elif usage_type == 'voice_minutes':
-            # Check voice usage limits
-            logs = supabase_request('GET', 'call_logs', params={
-                'user_id': f'eq.{user_id}',
-                'created_at': f'gte.{today}T00:00:00Z'
-            })
-            
-            daily_minutes = sum(log.get('duration_minutes', 0) for log in logs) if logs else 0
+            # Check voice usage limits (materialised counters, no call_logs scan)
+            daily_minutes, total_minutes = usage_counters.voice_minutes(user_id)
             
             if daily_minutes >= TrialLimitations.MAX_VOICE_MINUTES_PER_DAY:
                 return {
@@ -156,12 +195,6 @@ def check_usage_limits(user_id, usage_type, trial_status):
                 }
             
             # Check total trial usage
-            all_logs = supabase_request('GET', 'call_logs', params={
-                'user_id': f'eq.{user_id}'
-            })
-            
-            total_minutes = sum(log.get('duration_minutes', 0) for log in all_logs) if all_logs else 0
-            
             if total_minutes >= TrialLimitations.MAX_VOICE_MINUTES_TOTAL:
                 return {
                     'allowed': False,
@@ -172,11 +205,9 @@ def check_usage_limits(user_id, usage_type, trial_status):
         
         elif usage_type == 'enterprise_creation':
             # Check enterprise creation limit
-            enterprises = supabase_request('GET', 'enterprises', params={
+            enterprise_count = supabase_client.count('enterprises', params={
                 'owner_id': f'eq.{user_id}'
-            })
-            
-            enterprise_count = len(enterprises) if enterprises else 0
+            }) or 0
             
             if enterprise_count >= TrialLimitations.MAX_ENTERPRISES:
                 return {
@@ -188,11 +219,9 @@ def check_usage_limits(user_id, usage_type, trial_status):
         
         elif usage_type == 'voice_agent_creation':
             # Check voice agent creation limit
-            agents = supabase_request('GET', 'voice_agents', params={
+            agent_count = supabase_client.count('voice_agents', params={
                 'created_by': f'eq.{user_id}'
-            })
-            
-            agent_count = len(agents) if agents else 0
+            }) or 0
             
             if agent_count >= TrialLimitations.MAX_VOICE_AGENTS:
                 return {
@@ -212,8 +241,6 @@ def check_usage_limits(user_id, usage_type, trial_status):
 def log_trial_activity(user_id, activity_type, details=None):
     """Log trial user activity for usage tracking"""
     try:
-        from main import supabase_request
-        
         activity_data = {
             'user_id': user_id,
             'activity_type': activity_type,
@@ -221,59 +248,58 @@ def log_trial_activity(user_id, activity_type, details=None):
             'created_at': datetime.now(timezone.utc).isoformat()
         }
         
-        supabase_request('POST', 'activity_logs', data=activity_data)
+        # Coalesced with other requests' activity into periodic bulk inserts
+        bulk_writer.add('activity_logs', activity_data)
+        if activity_type == 'api_call':
+            # api_calls counts activity_logs 'api_call' rows, as the counters backfill does
+            usage_counters.record(user_id, api_calls=1)
+        invalidate_trial_usage_summary(user_id)
         
     except Exception as e:
         print(f"Error logging trial activity: {e}")
 
+# Per-user resource counts for the usage summary; usage itself comes from usage_counters
+_resource_counts = TTLCache(maxsize=10000, ttl=float(os.getenv('TRIAL_SUMMARY_TTL', '30')))
+
+
+def invalidate_trial_usage_summary(user_id):
+    """Drop a user's cached summary counts after a usage event"""
+    _resource_counts.invalidate(user_id)
+
+
+def _trial_resource_counts(user_id):
+    """Enterprises and voice agents owned by a user, from count-only (HEAD) requests"""
+    counts = _resource_counts.get(user_id)
+    if counts is None:
+        counts = {
+            'enterprises': supabase_client.count('enterprises', params={'owner_id': f'eq.{user_id}'}) or 0,
+            'voice_agents': supabase_client.count('voice_agents', params={'created_by': f'eq.{user_id}'}) or 0
+        }
+        _resource_counts.set(user_id, counts)
+    return counts
+
 def get_trial_usage_summary(user_id):
     """Get comprehensive usage summary for trial user"""
     try:
-        from main import supabase_request
-        
-        today = datetime.now(timezone.utc).date().isoformat()
-        
-        # Get API calls today
-        api_logs = supabase_request('GET', 'activity_logs', params={
-            'user_id': f'eq.{user_id}',
-            'activity_type': f'eq.api_call',
-            'created_at': f'gte.{today}T00:00:00Z'
-        })
-        
-        # Get voice usage
-        voice_logs_today = supabase_request('GET', 'call_logs', params={
-            'user_id': f'eq.{user_id}',
-            'created_at': f'gte.{today}T00:00:00Z'
-        })
-        
-        voice_logs_total = supabase_request('GET', 'call_logs', params={
-            'user_id': f'eq.{user_id}'
-        })
-        
-        # Get enterprises and voice agents
-        enterprises = supabase_request('GET', 'enterprises', params={
-            'owner_id': f'eq.{user_id}'
-        })
-        
-        voice_agents = supabase_request('GET', 'voice_agents', params={
-            'created_by': f'eq.{user_id}'
-        })
+        usage = usage_counters.get(user_id)
+        api_calls_today = int(usage['today']['api_calls'])
+        resources = _trial_resource_counts(user_id)
         
         return {
             'api_calls': {
-                'today': len(api_logs) if api_logs else 0,
+                'today': api_calls_today,
                 'limit': TrialLimitations.MAX_API_CALLS_PER_DAY,
-                'remaining': max(0, TrialLimitations.MAX_API_CALLS_PER_DAY - (len(api_logs) if api_logs else 0))
+                'remaining': max(0, TrialLimitations.MAX_API_CALLS_PER_DAY - api_calls_today)
             },
             'voice_usage': {
-                'today_minutes': sum(log.get('duration_minutes', 0) for log in voice_logs_today) if voice_logs_today else 0,
-                'total_minutes': sum(log.get('duration_minutes', 0) for log in voice_logs_total) if voice_logs_total else 0,
+                'today_minutes': round(usage['today']['voice_seconds'] / 60.0, 2),
+                'total_minutes': round(usage['total']['voice_seconds'] / 60.0, 2),
                 'daily_limit': TrialLimitations.MAX_VOICE_MINUTES_PER_DAY,
                 'total_limit': TrialLimitations.MAX_VOICE_MINUTES_TOTAL
             },
             'resources': {
-                'enterprises': len(enterprises) if enterprises else 0,
-                'voice_agents': len(voice_agents) if voice_agents else 0,
+                'enterprises': resources['enterprises'],
+                'voice_agents': resources['voice_agents'],
                 'enterprise_limit': TrialLimitations.MAX_ENTERPRISES,
                 'voice_agent_limit': TrialLimitations.MAX_VOICE_AGENTS
             },
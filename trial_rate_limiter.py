@@ -0,0 +1,193 @@
+"""
+Trial Rate Limiter
+Token-bucket limiter for trial API quotas. Buckets live in a local SQLite file
+(WAL mode), so every gunicorn worker on the host draws from the same bucket
+for a user and a check costs tens of microseconds instead of a Supabase query.
+
+A bucket holds up to TrialLimitations.MAX_API_CALLS_PER_DAY tokens and refills
+continuously at that many per day. A user's bucket is seeded once from
+today's usage counters; consumption is checkpointed to Supabase through the
+usage counters' background flush.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Callable, Dict, Optional
+
+from trial_middleware import TrialLimitations
+from usage_counters import usage_counters
+
+
+class TokenBucketLimiter:
+    """SQLite-backed token buckets shared by the processes on one host"""
+
+    def __init__(self,
+                 capacity: float,
+                 refill_per_second: float,
+                 db_path: str = None,
+                 seed: Callable[[str], float] = None):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.db_path = db_path or os.getenv('TRIAL_LIMITER_DB', 'trial_limiter.db')
+        self.seed = seed  # key -> tokens already used, for buckets this host has not seen
+
+        self._local = threading.local()
+        self._memory: Dict[str, tuple] = {}  # fallback buckets if SQLite is unusable
+        self._memory_lock = threading.Lock()
+        self._sqlite_failed = False
+        # Table is created on first use, so importing the module never touches the filesystem
+        self._db_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Per-thread connection, reopened after a fork"""
+        pid = os.getpid()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != pid:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = pid
+        return conn
+
+    def _sqlite_usable(self) -> bool:
+        """Create the buckets table on first use; False once SQLite has failed"""
+        if not self._db_ready and not self._sqlite_failed:
+            with self._memory_lock:
+                if not self._db_ready and not self._sqlite_failed:
+                    self._init_db()
+        return not self._sqlite_failed
+
+    def _init_db(self):
+        try:
+            conn = self._connect()
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+        except sqlite3.Error as e:
+            print(f"⚠️ Trial limiter database unavailable, using per-process buckets: {e}")
+            self._sqlite_failed = True
+            return
+        self._db_ready = True
+
+    def _refill(self, tokens: float, updated_at: float, now: float) -> float:
+        return min(self.capacity, tokens + max(0.0, now - updated_at) * self.refill_per_second)
+
+    def _initial_tokens(self, key: str) -> float:
+        used = 0.0
+        if self.seed:
+            try:
+                used = float(self.seed(key) or 0)
+            except Exception as e:
+                print(f"⚠️ Could not seed trial limiter for {key}: {e}")
+        return max(0.0, self.capacity - used)
+
+    def _result(self, allowed: bool, tokens: float, cost: float) -> Dict:
+        retry_after = 0.0
+        if not allowed and self.refill_per_second > 0:
+            retry_after = (cost - tokens) / self.refill_per_second
+        return {
+            'allowed': allowed,
+            'remaining': int(tokens),
+            'limit': int(self.capacity),
+            'retry_after': round(retry_after, 1)
+        }
+
+    def acquire(self, key: str, cost: float = 1.0) -> Dict:
+        """
+        Take cost tokens from key's bucket if it has them
+
+        Returns:
+            {'allowed', 'remaining', 'limit', 'retry_after' (seconds)}
+        """
+        now = time.time()
+        if self._sqlite_usable():
+            try:
+                return self._acquire_sqlite(key, cost, now)
+            except sqlite3.Error as e:
+                print(f"⚠️ Trial limiter database error, using per-process buckets: {e}")
+                self._sqlite_failed = True
+        return self._acquire_memory(key, cost, now)
+
+    def acquire_local(self, key: str, cost: float = 1.0) -> Dict:
+        """acquire() against this process's in-memory bucket only (no SQLite, no seeding I/O beyond the first use)"""
+        return self._acquire_memory(key, cost, time.time())
+
+    def _acquire_sqlite(self, key: str, cost: float, now: float) -> Dict:
+        conn = self._connect()
+        row = conn.execute('SELECT tokens, updated_at FROM buckets WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            # Seed outside the write lock: it may need a network read
+            conn.execute('INSERT OR IGNORE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)',
+                         (key, self._initial_tokens(key), now))
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            tokens, updated_at = conn.execute('SELECT tokens, updated_at FROM buckets WHERE key = ?',
+                                              (key,)).fetchone()
+            tokens = self._refill(tokens, updated_at, now)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute('UPDATE buckets SET tokens = ?, updated_at = ? WHERE key = ?', (tokens, now, key))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return self._result(allowed, tokens, cost)
+
+    def _acquire_memory(self, key: str, cost: float, now: float) -> Dict:
+        with self._memory_lock:
+            bucket = self._memory.get(key)
+        if bucket is None:
+            bucket = (self._initial_tokens(key), now)
+        with self._memory_lock:
+            tokens, updated_at = self._memory.get(key, bucket)
+            tokens = self._refill(tokens, updated_at, now)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._memory[key] = (tokens, now)
+        return self._result(allowed, tokens, cost)
+
+    def peek(self, key: str) -> Optional[float]:
+        """Tokens currently available to key, or None for an unseen key"""
+        now = time.time()
+        if not self._sqlite_usable():
+            bucket = self._memory.get(key)
+        else:
+            bucket = self._connect().execute('SELECT tokens, updated_at FROM buckets WHERE key = ?',
+                                             (key,)).fetchone()
+        return self._refill(bucket[0], bucket[1], now) if bucket else None
+
+    def reset(self, key: str):
+        """Forget a bucket (e.g. after upgrading a user out of the trial)"""
+        with self._memory_lock:
+            self._memory.pop(key, None)
+        if self._sqlite_usable():
+            self._connect().execute('DELETE FROM buckets WHERE key = ?', (key,))
+
+    def prune(self, idle_seconds: float = 86400) -> int:
+        """Drop buckets untouched for idle_seconds (they would be full again anyway)"""
+        if not self._sqlite_usable():
+            return 0
+        cursor = self._connect().execute('DELETE FROM buckets WHERE updated_at < ?', (time.time() - idle_seconds,))
+        return cursor.rowcount
+
+
+def _api_calls_used_today(user_id: str) -> float:
+    return usage_counters.get(user_id)['today']['api_calls']
+
+
+# Global limiter for trial API calls, shared by all workers through TRIAL_LIMITER_DB
+trial_api_limiter = TokenBucketLimiter(
+    capacity=TrialLimitations.MAX_API_CALLS_PER_DAY,
+    refill_per_second=TrialLimitations.MAX_API_CALLS_PER_DAY / 86400.0,
+    seed=_api_calls_used_today
+)
@@ -0,0 +1,208 @@
+"""
+Usage Counters
+Per-user daily and all-time usage (voice seconds, API calls) for trial limit
+checks. Reads come from an in-process cache loaded from user_usage_counters
+(two rows per user); increments update the cache immediately and are flushed
+to Supabase in batches through the increment_user_usage RPC. Each batch
+carries an id and a failed batch is retried unchanged, so a write whose
+response was lost is not applied twice.
+"""
+
+import os
+import uuid
+import atexit
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+
+from supabase_client import supabase_client, supabase_request
+from ttl_cache import TTLCache
+
+COUNTER_FIELDS = ('voice_seconds', 'api_calls')
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def _empty() -> Dict[str, float]:
+    return {field: 0 for field in COUNTER_FIELDS}
+
+
+class UsageCounters:
+    """Write-through cache of per-user usage counters with batched background flushes"""
+
+    def __init__(self, ttl: float = None, flush_interval: float = None, maxsize: int = 10000):
+        self.ttl = ttl or float(os.getenv('USAGE_COUNTER_TTL', '60'))
+        self.flush_interval = flush_interval or float(os.getenv('USAGE_COUNTER_FLUSH_INTERVAL', '2'))
+
+        self._cache = TTLCache(maxsize=maxsize, ttl=self.ttl)  # user_id -> snapshot
+        self._deltas: Dict[Tuple[str, str], Dict] = {}  # (user_id, day) -> unflushed increments
+        self._in_flight: Dict[Tuple[str, str], Dict] = {}  # increments of the unacknowledged batch
+        self._batch_id = None  # id of that batch, reused until Supabase acknowledges it
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+        self.stats = {'loads': 0, 'increments': 0, 'flushes': 0, 'errors': 0}
+
+    def start(self):
+        """Start the flusher thread for this process (idempotent, fork-aware)"""
+        pid = os.getpid()
+        if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='usage-counters', daemon=True)
+            self._thread_pid = pid
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, user_id: str) -> Dict:
+        """
+        Usage for today (UTC) and all time
+
+        Returns:
+            {'day': 'YYYY-MM-DD', 'today': {voice_seconds, api_calls},
+             'total': {voice_seconds, api_calls}}
+        """
+        today = _today()
+        snapshot = self._cache.get(user_id)
+        if snapshot is None or snapshot['day'] != today:
+            snapshot = self._load(user_id, today)
+        with self._lock:
+            return {'day': snapshot['day'], 'today': dict(snapshot['today']), 'total': dict(snapshot['total'])}
+
+    def voice_minutes(self, user_id: str) -> Tuple[float, float]:
+        """(minutes today, minutes all time)"""
+        usage = self.get(user_id)
+        return usage['today']['voice_seconds'] / 60.0, usage['total']['voice_seconds'] / 60.0
+
+    def _load(self, user_id: str, today: str) -> Dict:
+        rows = supabase_request('GET', 'user_usage_counters', params={
+            'user_id': f'eq.{user_id}',
+            'period': f'in.(total,{today})',
+            'select': 'period,voice_seconds,api_calls'
+        }) or []
+
+        snapshot = {'day': today, 'today': _empty(), 'total': _empty()}
+        for row in rows:
+            target = snapshot['total'] if row.get('period') == 'total' else snapshot['today']
+            for field in COUNTER_FIELDS:
+                target[field] = float(row.get(field) or 0)
+
+        with self._lock:
+            # Increments this worker has not written yet are not in the table
+            for (delta_user, day), delta in list(self._in_flight.items()) + list(self._deltas.items()):
+                if delta_user != user_id:
+                    continue
+                for field in COUNTER_FIELDS:
+                    snapshot['total'][field] += delta[field]
+                    if day == today:
+                        snapshot['today'][field] += delta[field]
+            self.stats['loads'] += 1
+            self._cache.set(user_id, snapshot)
+        return snapshot
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def record(self, user_id: str, voice_seconds: float = 0, api_calls: int = 0, day: str = None):
+        """Add usage for a user; visible to this worker's checks at once, persisted on the next flush"""
+        if not user_id or (not voice_seconds and not api_calls):
+            return
+        day = day or _today()
+        increment = {'voice_seconds': float(voice_seconds or 0), 'api_calls': int(api_calls or 0)}
+
+        with self._lock:
+            delta = self._deltas.setdefault((user_id, day), _empty())
+            for field in COUNTER_FIELDS:
+                delta[field] += increment[field]
+            snapshot = self._cache.get(user_id)
+            if snapshot is not None:
+                for field in COUNTER_FIELDS:
+                    snapshot['total'][field] += increment[field]
+                    if snapshot['day'] == day:
+                        snapshot['today'][field] += increment[field]
+            self.stats['increments'] += 1
+        self.start()
+
+    def invalidate(self, user_id: str):
+        """Forget a cached snapshot so the next check reloads it"""
+        self._cache.invalidate(user_id)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Usage counter flush error: {e}")
+
+    def flush(self) -> int:
+        """Write accumulated increments with one RPC; returns the number of (user, day) deltas written"""
+        with self._flush_lock:
+            with self._lock:
+                if self._batch_id is None:
+                    if not self._deltas:
+                        return 0
+                    # New batch; a batch that failed is resent as-is with its old id first
+                    self._in_flight, self._deltas = self._deltas, {}
+                    self._batch_id = str(uuid.uuid4())
+                batch_id = self._batch_id
+                payload = [
+                    {'user_id': user_id, 'day': day, **delta}
+                    for (user_id, day), delta in self._in_flight.items()
+                ]
+
+            if not supabase_client.available:
+                # Nothing to persist to; the cached snapshots still carry the usage
+                with self._lock:
+                    self._in_flight = {}
+                    self._batch_id = None
+                return 0
+
+            try:
+                response = supabase_client.post(
+                    'rpc/increment_user_usage',
+                    data={'p_deltas': payload, 'p_batch_id': batch_id},
+                    headers={**supabase_client.headers, 'Prefer': 'return=minimal'}
+                )
+                response.raise_for_status()
+            except Exception as e:
+                # The RPC may have committed before the error; the batch id makes the retry a no-op then
+                print(f"⚠️ Failed to write {len(payload)} usage counter updates, will retry: {e}")
+                with self._lock:
+                    self.stats['errors'] += 1
+                return 0
+
+            with self._lock:
+                self._in_flight = {}
+                self._batch_id = None
+                self.stats['flushes'] += 1
+            return len(payload)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, 'pending': len(self._deltas) + len(self._in_flight), 'cache': self._cache.stats()}
+
+
+# Global counters read by trial limit checks and fed by activity/call status writes
+usage_counters = UsageCounters()
+atexit.register(usage_counters.flush)
@@ -0,0 +1,159 @@
+"""
+User Context Cache
+Request-scoped memo plus short-TTL cache of user -> enterprise context
+(enterprise_id, role, status, trial_end_date) used by auth and trial checks.
+
+In claims mode (AUTH_CONTEXT_MODE=claims, the default) the context is taken
+from the verified JWT as long as its token_version matches the user's current
+token_version (see add_token_version.sql), so most requests need no lookup.
+"""
+
+import os
+from flask import g, has_app_context
+from ttl_cache import TTLCache
+from supabase_client import supabase_request
+
+USER_CONTEXT_FIELDS = ('id', 'enterprise_id', 'role', 'status', 'trial_end_date')
+
+# 'claims' trusts current-version JWT claims, 'database' always looks the user up
+AUTH_CONTEXT_MODE = os.getenv('AUTH_CONTEXT_MODE', 'claims').lower()
+
+# Per-worker cache; a stale entry lives at most USER_CONTEXT_CACHE_TTL seconds
+user_context_cache = TTLCache(
+    maxsize=int(os.getenv('USER_CONTEXT_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('USER_CONTEXT_CACHE_TTL', '60'))
+)
+
+# user_id -> current users.token_version. Role/status changes are only seen by
+# other workers once this expires, so it never outlives the context cache
+token_version_cache = TTLCache(
+    maxsize=int(os.getenv('USER_CONTEXT_CACHE_SIZE', '10000')),
+    ttl=min(float(os.getenv('TOKEN_VERSION_CACHE_TTL', '60')), user_context_cache.ttl)
+)
+
+
+def _request_memo():
+    """Per-request dict of user_id -> context stored on flask.g"""
+    if not has_app_context():
+        return {}
+    if not hasattr(g, '_user_contexts'):
+        g._user_contexts = {}
+    return g._user_contexts
+
+
+def get_user_context(user_id):
+    """
+    Get enterprise context for a user with at most one Supabase lookup per request
+
+    Lookup order: request memo -> TTL cache -> users table.
+
+    Returns:
+        Dict with USER_CONTEXT_FIELDS, or None if the user does not exist
+    """
+    if not user_id:
+        return None
+
+    memo = _request_memo()
+    if user_id in memo:
+        return memo[user_id]
+
+    context = user_context_cache.get(user_id)
+    if context is None:
+        users = supabase_request('GET', 'users', params={
+            'id': f'eq.{user_id}',
+            'select': ','.join(USER_CONTEXT_FIELDS)
+        })
+        if not users or len(users) == 0:
+            return None
+
+        context = {field: users[0].get(field) for field in USER_CONTEXT_FIELDS}
+        user_context_cache.set(user_id, context)
+
+    memo[user_id] = context
+    return context
+
+
+def get_token_version(user_id):
+    """Current token_version for a user (TTL-cached), or None if it cannot be read"""
+    version = token_version_cache.get(user_id)
+    if version is None:
+        users = supabase_request('GET', 'users', params={
+            'id': f'eq.{user_id}',
+            'select': 'token_version'
+        })
+        if not users or len(users) == 0:
+            return None
+
+        version = users[0].get('token_version') or 0
+        token_version_cache.set(user_id, version)
+    return version
+
+
+def _claims_are_current(claims):
+    """True if the token was issued for the user's current role/enterprise/status"""
+    # Trial checks need trial_end_date, which older tokens do not carry
+    if claims.get('status') == 'trial' and 'trial_end_date' not in claims:
+        return False
+    current = get_token_version(claims.get('user_id'))
+    return current is not None and claims.get('token_version', 0) == current
+
+
+def apply_token_context(claims):
+    """
+    Populate g.user_id, g.enterprise_id and g.user_role for a verified token
+
+    In claims mode a current-version token seeds the request memo directly, so
+    get_user_context / load_enterprise_context / check_trial_limits make no
+    users lookup. A stale token falls back to the database context and its
+    role, enterprise_id and status are refreshed from it.
+
+    Returns:
+        The claims to expose as request.current_user
+    """
+    user_id = claims.get('user_id')
+    g.user_id = user_id
+    g.current_user = claims
+
+    if AUTH_CONTEXT_MODE != 'claims':
+        return claims
+
+    if _claims_are_current(claims):
+        context = {
+            'id': user_id,
+            'enterprise_id': claims.get('enterprise_id'),
+            'role': claims.get('role'),
+            'status': claims.get('status'),
+            'trial_end_date': claims.get('trial_end_date')
+        }
+        _request_memo()[user_id] = context
+    else:
+        context = get_user_context(user_id)
+        if context:
+            claims = {
+                **claims,
+                'role': context.get('role'),
+                'enterprise_id': context.get('enterprise_id'),
+                'status': context.get('status')
+            }
+            g.current_user = claims
+
+    if context and context.get('enterprise_id'):
+        g.enterprise_id = context['enterprise_id']
+        g.user_role = context.get('role') or 'user'
+
+    return claims
+
+
+def invalidate_user_context(user_id=None, enterprise_id=None):
+    """Drop cached context for a user, or for every cached user of an enterprise"""
+    memo = _request_memo()
+
+    if user_id:
+        user_context_cache.invalidate(user_id)
+        token_version_cache.invalidate(user_id)
+        memo.pop(user_id, None)
+
+    if enterprise_id:
+        user_context_cache.invalidate_where(lambda _, ctx: ctx.get('enterprise_id') == enterprise_id)
+        for cached_id in [uid for uid, ctx in memo.items() if ctx.get('enterprise_id') == enterprise_id]:
+            memo.pop(cached_id, None)